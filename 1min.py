@@ -1,11 +1,14 @@
 # 抓取questgames黑白棋(一分)的紀錄
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from tqdm import tqdm  # Import tqdm for progress bar
 import pandas as pd
-import time
+from questgames.record import read_record
+from questgames.navigation import HashNavigator
+from questgames.readiness import RecordReadiness
+from questgames.store import SnapshotStore
+from datetime import datetime
 
 # Selenium's Chrome driver setup
 chrome_options = Options()
@@ -27,32 +30,42 @@ usernames = ["formosa_slosi", "tetratio", "y86n2qc9dt", "takotime", "beagle529",
 # Store data in a list
 data = []
 
+# Snapshot time, YYYYMMDDHHMM
+current_time = datetime.now().strftime("%Y%m%d%H%M")
+
+# Wait until the record table is filled in instead of a fixed sleep
+readiness = RecordReadiness(baseline_sleep=1)
+
+# Load the app once, then switch users by changing location.hash
+navigator = HashNavigator(driver, readiness=readiness)
+
 # Loop through each username with a progress bar
 for username in tqdm(usernames, desc="Processing Users"):
-    driver.get(f"http://questgames.net/reversi1/#user/{username}")
-    time.sleep(1)  # wait for dynamic content to load 在解析HTML之前等待1秒鐘
+    navigator.open("http://questgames.net/reversi1/#user/", username)  # 以 hash 切換用戶並等到紀錄表內容填好
     try:
-        user_element = driver.find_element(By.CSS_SELECTOR, 'li.record')
-        rank = user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rank"]]/td').text.strip()
-        data.append({
-            'Username': username,
-            'Rating': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rating"]]/td').text,
-            'Rank': int(rank.split()[0]),  # Assumes rank is the first part of the text and is a number
-            'Win/Loss': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Win loss"]]/td').text,
-            'Streak': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Streak"]]/td').text
-        })
+        data.append(read_record(driver, username))  # 一次取得整個紀錄表
     except Exception as e:
         print(f"Failed to retrieve data for {username}: {str(e)}")
 
 # Close the browser
 driver.quit()
 
+# Report how long the page waits took
+readiness.report()
+navigator.report()
+
 # Convert data into a DataFrame
 df = pd.DataFrame(data)
 
 # Sort the DataFrame by 'Rank' in ascending order
 df = df.sort_values(by='Rank')
 
+# 寫入快照資料庫，print-rank-*.py 與 check1-1.py 從資料庫讀取
+store = SnapshotStore('./othello/snapshots.db')
+store.append('1min', current_time, data)
+store.close()
+print(f"{len(data)} 筆數據已寫入 ./othello/snapshots.db")
+
 # Save the DataFrame to an Excel file
 df.to_excel('user_data-1min.xlsx', index=False)
 print("Data has been saved to user_data.xlsx and sorted by Rank.")
@@ -1,49 +1,97 @@
 import pandas as pd
-import re
 import os
 from tqdm import tqdm
+from questgames.dedup import SNAPSHOT_SCOPE, find_duplicates
+from questgames.fileio import FileManifest, atomic_to_excel
+from questgames.loading import load_store_compact
+from questgames.parsing import ParseReport, parse_snapshot_columns
+from questgames.store import SnapshotStore
 
 # 上傳文件的路徑
 file_directory = "./othello/files/"
-file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
+
+# 快照資料庫；存在時 print-rank-*.py 只讀取資料庫，因此改為檢查資料庫中的全部快照，不再處理 xlsx
+store_path = "./othello/snapshots.db"
+
+if os.path.exists(store_path):
+    file_paths = []
+else:
+    file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
+    # 已驗證過且內容未變的文件直接略過
+    manifest = FileManifest('./othello/cache/check_manifest.json')
+    pending = [f for f in file_paths if not manifest.is_current(f)]
+    print(f"略過 {len(file_paths) - len(pending)} 個已驗證的文件，檢查 {len(pending)} 個文件")
+    file_paths = pending
+
+# 同一文件 (快照) 中紀錄相同的用戶少於此數時，視為頁面尚未更新而刪除；達到此數則保留
+min_occurrences = 3
 
 # 用於存儲所有重複資料的列表
 duplicates = []
 
-# 讀取每個文件並檢查重複資料
-for file_path in tqdm(file_paths, desc='檢查文件'):
+# 所有文件讀取並解析後的資料 {文件路徑: DataFrame}
+frames = {}
+
+# 無法解析的資料列統一收集，最後一次輸出
+parse_report = ParseReport()
+
+# 讀取每個文件
+for file_path in tqdm(file_paths, desc='讀取文件'):
     try:
         df = pd.read_excel(file_path)
-        # 提取當前分數 (Rating)
-        df['CurrentRating'] = df['Rating'].apply(lambda x: int(re.search(r'^\d+', x).group()))
-        # 提取歷史最高分 (MaxRating)
-        df['MaxRating'] = df['Rating'].apply(lambda x: int(re.search(r'max:\s*(\d+)', x).group(1)))
-
-        # 只保留 CurrentRating 在 1000 以上的資料
-        df = df[df['CurrentRating'] >= 1000]
-
-        # 檢查重複資料，包括 CurrentRating, MaxRating 和 Win/Loss
-        duplicated = df[df.duplicated(subset=['CurrentRating', 'MaxRating', 'Win/Loss'], keep=False)]
-        if not duplicated.empty:
-            duplicates.append((file_path, duplicated))
-            # 查找每個重複紀錄，確認前兩次是否一致
-            for idx in duplicated.index:
-                duplicate_records = df[(df['CurrentRating'] == df.loc[idx, 'CurrentRating']) &
-                                       (df['MaxRating'] == df.loc[idx, 'MaxRating']) &
-                                       (df['Win/Loss'] == df.loc[idx, 'Win/Loss'])]
-                if len(duplicate_records) < 3:
-                    # 如果不相符，刪除這些重複記錄中的該筆記錄
-                    df = df.drop(idx)
-
-        # 將修改後的 DataFrame 保存至原文件
-        df.to_excel(file_path, index=False)
+        # 提取當前分數 (CurrentRating) 與歷史最高分 (MaxRating)
+        bad_rows = parse_report.count()
+        df = parse_snapshot_columns(df, win_loss=False, report=parse_report, source=file_path)
+        if parse_report.count() > bad_rows:
+            # 有無法解析的 Rating 時不改寫這個文件，避免資料被刪除
+            raise ValueError("Rating 欄位有無法解析的資料")
+        frames[file_path] = df
     except Exception as e:
         print(f"無法讀取文件 {file_path}：{str(e)}")
 
+if frames:
+    # 合併所有文件，以文件為範圍一次找出 CurrentRating, MaxRating 和 Win/Loss 重複的資料
+    history = pd.concat(frames, names=['Source', 'Row']).reset_index(level='Source')
+    history = history.reset_index(drop=True)
+    duplicated, to_drop = find_duplicates(history, scope=['Source'], min_occurrences=min_occurrences)
+    for file_path, rows in duplicated.groupby('Source', sort=False):
+        duplicates.append((f"文件 {file_path}", rows.drop(columns=['Source'])))
+    drop_index = set(to_drop.index)
+
+    # 只保留 CurrentRating 在 1000 以上且不需刪除的資料；有資料被刪除的文件才改寫
+    rewritten = 0
+    for file_path, df in tqdm(history.groupby('Source', sort=False), desc='保存文件'):
+        kept = df[(df['CurrentRating'] >= 1000) & ~df.index.isin(drop_index)]
+        if len(kept) < len(df):
+            atomic_to_excel(kept.drop(columns=['Source']), file_path)
+            rewritten += 1
+    # 解析後沒有資料列的文件不會出現在合併結果中，同樣要記錄，否則每次都會重新讀取
+    for file_path in frames:
+        manifest.mark(file_path)
+    manifest.save()
+    print(f"改寫 {rewritten} 個文件")
+
+if os.path.exists(store_path):
+    # 與 xlsx 相同的規則：以快照為範圍找出重複紀錄，刪除需刪除的重複資料列與 CurrentRating 低於 1000 的資料列
+    store = SnapshotStore(store_path)
+    deleted = 0
+    for game_type, *_ in store.summary():
+        df = load_store_compact(store, game_type, report=parse_report, keep_text=('Win/Loss',), win_loss=False)
+        df['GameType'] = game_type
+        duplicated, to_drop = find_duplicates(df, scope=SNAPSHOT_SCOPE, min_occurrences=min_occurrences)
+        for date, rows in duplicated.groupby('Date', sort=False):
+            duplicates.append((f"快照 {game_type} {date:%Y%m%d%H%M}", rows.drop(columns=['GameType'])))
+        removed = df[(df['CurrentRating'] < 1000) | df.index.isin(to_drop.index)]
+        deleted += store.delete(zip(removed['GameType'], removed['Date'], removed['Username']))
+    store.close()
+    print(f"已從 {store_path} 刪除 {deleted} 筆")
+
+parse_report.report('./othello/parse_errors.csv')
+
 # 輸出重複資料
 if duplicates:
     for file_path, duplicated in duplicates:
-        print(f"文件 {file_path} 中有重複的資料：")
+        print(f"{file_path} 中有重複的資料：")
         print(duplicated.to_string(index=False))
 else:
     print("沒有發現重複的資料。")
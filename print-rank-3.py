@@ -6,6 +6,10 @@ import os
 import matplotlib.font_manager as fm
 import matplotlib.dates as mdates
 from tqdm import tqdm
+from questgames.parsing import ParseReport, parse_snapshot_columns
+from questgames.plotting import build_user_index
+from questgames.store import SnapshotStore
+from questgames.tiles import TileCache
 
 # 確保目錄存在
 if not os.path.exists('./othello/PNG'):
@@ -13,7 +17,12 @@ if not os.path.exists('./othello/PNG'):
 
 # 上傳文件的路徑
 file_directory = "./othello/files/"
-file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
+# 快照資料庫，存在時直接查詢，不再逐一讀取 xlsx
+store_path = "./othello/snapshots.db"
+if os.path.exists(store_path):
+    file_paths = []
+else:
+    file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
 
 # 用於存儲所有數據的列表
 all_data = {
@@ -22,7 +31,28 @@ all_data = {
 }
 
 # 設置中文字體
-zh_font = fm.FontProperties(fname='./font/SimHei.ttf')  # 请将此路径替换为您实际安装的字体路径
+font_path = './font/SimHei.ttf'  # 请将此路径替换为您实际安装的字体路径
+zh_font = fm.FontProperties(fname=font_path)
+
+# 每位用戶的子圖單獨快取，只重畫資料有變動的用戶，再拼成十八宮格圖
+use_tile_cache = True
+
+# 無法解析的資料列統一收集，讀取完畢後一次輸出
+parse_report = ParseReport()
+
+# 解析 Rating 欄位
+def prepare_frame(df, source=None):
+    # 提取當前分數 (Rating)
+    return parse_snapshot_columns(df, max_rating=False, win_loss=False, report=parse_report, source=source)
+
+# 從快照資料庫依棋局類型查詢
+if os.path.exists(store_path):
+    store = SnapshotStore(store_path)
+    for game_type in all_data:
+        df = store.query(game_type=game_type)
+        if not df.empty:
+            all_data[game_type].append(prepare_frame(df, store_path))
+    store.close()
 
 # 讀取每個文件並追加到對應的列表中
 for file_path in tqdm(file_paths, desc='讀取文件'):
@@ -31,8 +61,7 @@ for file_path in tqdm(file_paths, desc='讀取文件'):
         # 提取日期信息
         date_str = re.search(r'\d{12}', file_path).group()
         df['Date'] = datetime.strptime(date_str, '%Y%m%d%H%M')
-        # 提取當前分數 (Rating)
-        df['CurrentRating'] = df['Rating'].apply(lambda x: int(re.search(r'^\d+', x).group()))
+        df = prepare_frame(df, file_path)
         # 根據文件名中的棋局類型區分數據
         if "1min" in file_path:
             all_data["1min"].append(df)
@@ -41,6 +70,10 @@ for file_path in tqdm(file_paths, desc='讀取文件'):
     except Exception as e:
         print(f"無法讀取文件 {file_path}：{str(e)}")
 
+parse_report.report('./othello/parse_errors.csv')
+
+tiles = TileCache('plain', font_path) if use_tile_cache else None
+
 # 分析每個棋局類型
 for game_type, data_list in all_data.items():
     if data_list:
@@ -52,6 +85,16 @@ for game_type, data_list in all_data.items():
         latest_ratings = combined_df.groupby('Username').last().reset_index()
         sorted_users = latest_ratings.sort_values(by='CurrentRating', ascending=False)['Username']
 
+        if use_tile_cache:
+            user_index = build_user_index(combined_df)
+            current_time = datetime.now().strftime("%Y%m%d%H%M")
+            for i in tqdm(range(0, len(sorted_users), 18), desc=f'繪製 {game_type} 十八宮格折線圖'):
+                output_path = f'./othello/PNG/{game_type}_rating_changes_{i+1}_{i+18}_{current_time}.png'
+                tiles.compose([(username, user_index[username]) for username in sorted_users[i:i+18]],
+                              output_path, cols=6, rows=3)
+                print(f"十八宮格折線圖已保存至 {output_path}")
+            continue
+
         # 繪製十八宮格折線圖
         with tqdm(total=(len(sorted_users) + 17) // 18, desc=f'繪製 {game_type} 十八宮格折線圖') as pbar:
             for i in range(0, len(sorted_users), 18):
@@ -89,3 +132,8 @@ for game_type, data_list in all_data.items():
 
                 print(f"十八宮格折線圖已保存至 ./othello/PNG/{game_type}_rating_changes_{i+1}_{i+18}_{current_time}.png")
                 pbar.update(1)
+
+if use_tile_cache:
+    # 清除不再使用的舊子圖
+    tiles.prune()
+    tiles.report()
@@ -1,144 +1,138 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
 import re
 import os
-import matplotlib.font_manager as fm
-import matplotlib.dates as mdates
-from tqdm import tqdm
-
-# 确保目录存在
-if not os.path.exists('./othello/PNG'):
-    os.makedirs('./othello/PNG')
-
-# 获取当前的日期和时间，格式为 YYYYMMDDHHMM
-current_time = datetime.now().strftime("%Y%m%d%H%M")
+from questgames.parse_cache import ParseCache
+from questgames.analytics import PlayerAnalytics
+from questgames.dashboard import build_dashboard
+from questgames.loading import load_store_compact, report_memory
+from questgames.parsing import ParseReport, parse_snapshot_columns
+from questgames.plotting import build_user_index, rank_users, render_grids
+from questgames.store import SnapshotStore
+from questgames.tiles import TileCache
 
 # 上传文件的路径
 file_directory = "./othello/files/"
-file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
-
-# 用于存储所有数据的列表
-all_data = {
-    "1min": [],
-    "5min": []
-}
+# 快照数据库，存在时直接查询，不再逐一读取 xlsx
+store_path = "./othello/snapshots.db"
 
 # 设置中文字体
-zh_font = fm.FontProperties(fname='./font/SimHei.ttf')  # 请将此路径替换为您实际安装的字体路径
+font_path = './font/SimHei.ttf'  # 请将此路径替换为您实际安装的字体路径
 
 # 黑名单设置
 blacklist = ["skyneko1224", "taiwanchan", "formosa_"]
 
-# 定义解析 Win/Loss 栏位的函数
-def parse_win_loss(win_loss):
-    try:
-        wins, losses, rest = win_loss.split('-')
-        draws, win_rate = rest.split(' ')
-        draws = draws.strip()
-        win_rate = win_rate.strip('()')
-        return int(wins), int(losses), int(draws), float(win_rate)
-    except Exception as e:
-        print(f"Error parsing win/loss: {win_loss} - {e}")
-        return None, None, None, None
-
-# 读取每个文件并追加到对应的列表中
-for file_path in tqdm(file_paths, desc='读取文件'):
-    try:
-        df = pd.read_excel(file_path)
-        # 提取日期信息
-        date_str = re.search(r'\d{12}', file_path).group()
-        df['Date'] = datetime.strptime(date_str, '%Y%m%d%H%M')
-        # 提取当前分数 (Rating)
-        df['CurrentRating'] = df['Rating'].apply(lambda x: int(re.search(r'^\d+', x).group()))
-        # 提取历史最高分 (MaxRating)
-        df['MaxRating'] = df['Rating'].apply(lambda x: int(re.search(r'max:\s*(\d+)', x).group(1)))
-        # 解析 Win/Loss 栏位
-        df[['Wins', 'Losses', 'Draws', 'Win Rate']] = df['Win/Loss'].apply(lambda x: pd.Series(parse_win_loss(x)))
-        # 将胜场数、负场数和和局转换为整数类型
-        df['Wins'] = df['Wins'].astype('Int64')
-        df['Losses'] = df['Losses'].astype('Int64')
-        df['Draws'] = df['Draws'].astype('Int64')
-        # 根据文件名中的棋局类型区分数据
-        if "1min" in file_path:
-            all_data["1min"].append(df)
-        elif "5min" in file_path:
-            all_data["5min"].append(df)
-    except Exception as e:
-        print(f"无法读取文件 {file_path}：{str(e)}")
-
-# 设置线条颜色的函数
-def get_line_color(rating):
-    if rating >= 2000:
-        return (238/255, 0, 0)  # RGB(238,0,0)
-    elif 1700 <= rating <= 1999:
-        return (204/255, 170/255, 0)  # RGB(204,170,0)
-    elif 1500 <= rating <= 1699:
-        return (52/255, 52/255, 241/255)  # RGB(52,52,241)
-    elif 1200 <= rating <= 1499:
-        return (0, 169/255, 0)  # RGB(0,169,0)
+# 每张图显示的用户数，每行 6 张子图 (18 即为 3 行 6 列)
+top_n = 18
+
+# 同时绘图的进程数：使用子图缓存时用于重画有变动的子图，否则每个棋局类型一张图
+render_workers = 2
+
+# 每位用户的子图单独缓存，只重画数据有变动的用户，再拼成整张图
+use_tile_cache = True
+
+# 另外输出包含全部用户的互动式 HTML 仪表板
+write_dashboard = True
+
+# 无法解析的数据行统一收集，读取完毕后一次输出
+parse_report = ParseReport()
+
+# 解析 Rating 与 Win/Loss 栏位
+def prepare_frame(df, source=None):
+    # 一次提取 CurrentRating、MaxRating 与 Wins/Losses/Draws (Int64)、Win Rate
+    return parse_snapshot_columns(df, report=parse_report, source=source)
+
+# 读取并解析单个文件，返回 (棋局类型, DataFrame)
+def parse_file(file_path):
+    df = pd.read_excel(file_path)
+    # 提取日期信息
+    date_str = re.search(r'\d{12}', file_path).group()
+    df['Date'] = datetime.strptime(date_str, '%Y%m%d%H%M')
+    df = prepare_frame(df, file_path)
+    # 根据文件名中的棋局类型区分数据
+    if "1min" in file_path:
+        return "1min", df
+    elif "5min" in file_path:
+        return "5min", df
+    return None, df
+
+# 绘图会启动子进程，主程序需放在 __main__ 之下，避免子进程重复读取数据
+if __name__ == '__main__':
+    # 确保目录存在
+    if not os.path.exists('./othello/PNG'):
+        os.makedirs('./othello/PNG')
+
+    # 获取当前的日期和时间，格式为 YYYYMMDDHHMM
+    current_time = datetime.now().strftime("%Y%m%d%H%M")
+
+    if os.path.exists(store_path):
+        file_paths = []
+    else:
+        file_paths = [os.path.join(file_directory, f) for f in os.listdir(file_directory) if f.endswith('.xlsx')]
+
+    # 用于存储所有数据的列表
+    all_data = {
+        "1min": [],
+        "5min": []
+    }
+
+    # 从快照数据库按棋局类型查询；用户统计表只以新快照增量更新，前 top_n 名 (已过滤黑名单) 直接由统计表查出，
+    # 不输出仪表板时只读取这些用户的历史。逐批读取并转换为精简类型 (用户名称为 category、分数为 int16)
+    ranked_users = {}
+    if os.path.exists(store_path):
+        store = SnapshotStore(store_path)
+        analytics = PlayerAnalytics(store)
+        analytics.update()
+        for game_type in all_data:
+            ranked_users[game_type] = analytics.top_usernames(game_type, top_n, blacklist)
+            if not write_dashboard and not ranked_users[game_type]:
+                continue
+            df = load_store_compact(store, game_type, username=None if write_dashboard else ranked_users[game_type],
+                                    report=parse_report)
+            if not df.empty:
+                all_data[game_type].append(df)
+        store.close()
+
+    # 旧文件不会变动，只解析新增或修改过的文件，其余沿用快取
+    if file_paths:
+        parsed = ParseCache('./othello/cache/parsed_files.pkl', parser_version=2, compact=True).update(file_paths,
+                                                                                                     parse_file)
+        for game_type, df in parsed.items():
+            if game_type in all_data and not df.empty:
+                all_data[game_type].append(df)
+
+    parse_report.report('./othello/parse_errors.csv')
+
+    # 分析每个棋局类型
+    jobs = []
+    for game_type, data_list in all_data.items():
+        if data_list:
+            # 将所有数据合并到一个DataFrame中
+            combined_df = pd.concat(data_list, ignore_index=True)
+            report_memory(f'{game_type} 历史数据', combined_df)
+            # 只排序、分组一次，之后按用户直接取出各自依日期排序的数据
+            user_index = build_user_index(combined_df)
+            # 按最新Rating降序排序，过滤掉黑名单中的用户，仅获取前 top_n 名用户 (有统计表时直接使用)
+            if ranked_users.get(game_type):
+                top_users = [username for username in ranked_users[game_type] if username in user_index]
+            else:
+                top_users = rank_users(user_index, blacklist)[:top_n]
+
+            if write_dashboard:
+                dashboard_path = build_dashboard(user_index, f'./othello/PNG/{game_type}_dashboard_{current_time}.html',
+                                                 f'{game_type} 分数变化', blacklist)
+                print(f"仪表板已保存至 {dashboard_path}")
+
+            output_path = f'./othello/PNG/{game_type}_top_{top_n}_rating_changes_{current_time}.png'
+            jobs.append((output_path, [(username, user_index[username]) for username in top_users], font_path, 6))
+
+    if use_tile_cache:
+        tiles = TileCache('rating', font_path, workers=render_workers)
+        output_paths = [tiles.compose(panels, output_path, cols) for output_path, panels, _, cols in jobs]
+        tiles.prune()
+        tiles.report()
     else:
-        return (153/255, 153/255, 153/255)  # RGB(153,153,153)
-
-# 分析每个棋局类型
-for game_type, data_list in all_data.items():
-    if data_list:
-        # 将所有数据合并到一个DataFrame中
-        combined_df = pd.concat(data_list, ignore_index=True)
-        # 按日期和时间排序
-        combined_df = combined_df.sort_values(by='Date')
-        # 提取最新Rating并按降序排序
-        latest_ratings = combined_df.groupby('Username').last().reset_index()
-        sorted_users = latest_ratings.sort_values(by='CurrentRating', ascending=False)['Username']
-
-        # 仅获取前18名用户，过滤掉黑名单中的用户
-        top_users = [user for user in sorted_users if user not in blacklist][:18]  # 修改为前18名用户
-
-        # 绘制六列3行的折线图
-        fig, axes = plt.subplots(3, 6, figsize=(24, 18))  # 修改为6刖3行
-        axes = axes.flatten()
-
-        for ax, username in zip(axes, top_users):
-            user_data = combined_df[combined_df['Username'] == username].sort_values(by='Date')
-            color = get_line_color(user_data['CurrentRating'].iloc[-1])
-            max_rating = user_data['MaxRating'].max()
-
-            # 计算每段期间的比赛次数
-            user_data['Total Matches'] = user_data['Wins'] + user_data['Losses'] + user_data['Draws']
-            user_data['Match Increase'] = user_data['Total Matches'].diff().fillna(0).astype(int)
-
-            # 数据清洗，排除异常值
-            user_data = user_data[user_data['Match Increase'] >= 1]
-            user_data = user_data[user_data['Match Increase'] < 1000]  # 设置合理的阀值，排除异常值
-
-            ax1 = ax
-            ax1.plot(user_data['Date'], user_data['CurrentRating'], marker='o', label=f"{username}", color=color)
-            ax1.set_title(f"{username} (MAX: {max_rating})", fontproperties=zh_font)
-            ax1.set_xlabel('月-日', fontproperties=zh_font)
-            ax1.set_ylabel('最新分数 (Rating)', fontproperties=zh_font)
-            ax1.grid(True)
-            ax1.legend(loc='upper left')
-            ax1.xaxis.set_major_locator(mdates.AutoDateLocator())
-            ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d', tz=None))
-            plt.setp(ax1.get_xticklabels(), rotation=45, fontproperties=zh_font)
-
-            # 在图表下方添加比赛次数的长条图
-            ax2 = ax1.twinx()
-            ax2.bar(user_data['Date'], user_data['Match Increase'], alpha=0.3, color='gray', width=0.8)
-            ax2.set_ylabel('比赛次数', fontproperties=zh_font)
-
-            match_increase_max = user_data['Match Increase'].max()
-            if pd.isna(match_increase_max) or match_increase_max == 0:
-                match_increase_max = 1  # 避免 y 轴为零或 NaN/Inf
-            ax2.set_ylim(0, match_increase_max * 1.1)
-
-        # 如果有效用户数量不足18，则删除多余的轴
-        for j in range(len(top_users), 18):
-            fig.delaxes(axes[j])
-
-        plt.tight_layout()
-        # 保存图表，档名中包含当前日期和时间
-        plt.savefig(f'./othello/PNG/{game_type}_top_18_rating_changes_{current_time}.png')  # 修改为前18名
-        # plt.show()
-
-        print(f"六刖3行的折线图已保存至 ./othello/PNG/{game_type}_top_18_rating_changes_{current_time}.png")
+        # 各棋局类型的图同时在不同进程中绘制
+        output_paths = render_grids(jobs, workers=render_workers)
+    for output_path in output_paths:
+        print(f"折线图已保存至 {output_path}")
@@ -1,38 +1,61 @@
-import schedule
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+import atexit
 from tqdm import tqdm  # 引入 tqdm 來顯示進度條
 import pandas as pd
 from datetime import datetime  # 引入 datetime 來處理日期
 import os  # 引入 os 來處理文件路徑
+from questgames.daemon import CollectorDaemon
+from questgames.record import GAME_TYPES, read_record
+from questgames.navigation import HashNavigator
+from questgames.polling import ActivityScheduler
+from questgames.readiness import RecordReadiness
+from questgames.session import WarmDriver
+from questgames.store import SnapshotStore
 
-def fetch_othello_data():
-    # 設定 Selenium 的 Chrome 驅動
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 啟用無頭模式
-    chrome_options.add_argument("--disable-gpu")  # 禁用GPU硬件加速
-    chrome_options.add_argument("--log-level=3")  # 只記錄嚴重錯誤信息
-    chrome_options.add_argument("--disable-dev-shm-usage")  # 避免大量內存佔用
-    chrome_options.add_argument("--no-sandbox")  # 解決DevToolsActivePort文件不存在的錯誤
+# 每種棋類型各自的排程間隔 (小時)；兩種棋類型可同時執行
+job_intervals = {
+    "5min": 6,
+    "1min": 6
+}
+# 每次排程隨機延後 0 ~ jitter_seconds 秒，避免總是在整點同時送出大量請求
+jitter_seconds = 300
+# 同時執行的工作數上限
+max_concurrent_jobs = 2
 
-    # 指定 Chromedriver 的路徑
-    service = Service(executable_path='./chromedriver.exe')
+# 常駐的瀏覽器，保留 profile 與磁碟快取，每次排程沿用；載入 2000 頁、行程合計記憶體超過 1500 MB 或當機後才重新啟動
+# 兩種棋類型可能同時執行，各自使用一個瀏覽器與 profile；結束時只關閉自己啟動的瀏覽器行程
+sessions = {game_type: WarmDriver(executable_path='./chromedriver.exe',
+                                  profile_dir=f'./othello/chrome-profile-{game_type}', max_pages=2000,
+                                  max_rss_mb=1500)
+            for game_type in job_intervals}
+for session in sessions.values():
+    atexit.register(session.quit)
 
-    # 初始化 webdriver
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+# 是否同時保存每次執行的 xlsx；需要試算表時也可以用 python -m questgames.store export 匯出
+save_xlsx = True
+
+# 依用戶活躍程度決定是否抓取，久未下棋的用戶沿用上次紀錄 (最久 48 小時)；設為 False 則每次抓取所有用戶
+adaptive_polling = True
+
+def fetch_othello_data(game_type):
+    # 執行前檢查瀏覽器狀態，必要時重新啟動
+    session = sessions[game_type]
+    driver = session.acquire()
+    if session.last_startup_seconds:
+        print(f"{game_type} 啟動瀏覽器耗時 {session.last_startup_seconds:.1f} 秒")
+    else:
+        print(f"{game_type} 沿用既有瀏覽器 (已載入 {session.pages} 頁)")
 
     # 從 user.txt 文件中讀取用戶名單，轉為小寫並移除空白
     with open('./othello/user.txt', 'r') as file:
         usernames = [line.strip().replace(' ', '').lower() for line in file.readlines()]
 
-    # 棋類型和相對應的網址
-    game_types = {
-        "5min": "http://questgames.net/reversi/#user/",
-        "1min": "http://questgames.net/reversi1/#user/"
-    }
+    # 棋類型相對應的網址
+    url_prefix = GAME_TYPES[game_type]
+
+    # 依紀錄表是否填好判斷頁面載入完成
+    readiness = RecordReadiness()
+    # 只完整載入一次頁面，之後以 hash 切換用戶
+    navigator = HashNavigator(driver, readiness=readiness)
 
     # 獲取當前的日期和時間，格式為 YYYYMMDDHHMM
     current_time = datetime.now().strftime("%Y%m%d%H%M")
@@ -41,50 +64,69 @@ def fetch_othello_data():
     if not os.path.exists('./othello/files'):
         os.makedirs('./othello/files')
 
-    # 處理每種棋類型
-    for game_type, url_prefix in game_types.items():
-        data = []  # 初始化資料存儲列表
-        # 在進度條下處理每個用戶
-        for username in tqdm(usernames, desc=f"處理 {game_type} 用戶中"):
-            attempts = 0
-            success = False
-            while attempts < 2 and not success:
-                driver.get(f"{url_prefix}{username}")
-                time.sleep(0.8)  # 等待內容加載
-                try:
-                    user_element = driver.find_element(By.CSS_SELECTOR, 'li.record')
-                    rank = user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rank"]]/td').text.strip()
-                    data.append({
-                        'Username': username,
-                        'Rating': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rating"]]/td').text,
-                        'Rank': int(rank.split()[0]),  # 假設排名是文本的第一部分且為數字
-                        'Win/Loss': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Win loss"]]/td').text,
-                        'Streak': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Streak"]]/td').text
-                    })
-                    success = True
-                except Exception as e:
-                    print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
-                    attempts += 1
+    data = []  # 初始化資料存儲列表
+    failed = 0
+    store = SnapshotStore('./othello/snapshots.db')
+    if adaptive_polling:
+        scheduler = ActivityScheduler(store, game_type, max_staleness_hours=48)
+        polled, carried = scheduler.plan(usernames)
+        scheduler.report()
+    else:
+        polled, carried = usernames, []
+    # 在進度條下處理每個用戶
+    for username in tqdm(polled, desc=f"處理 {game_type} 用戶中"):
+        # 執行中超過頁數或記憶體上限時換一個新的瀏覽器繼續
+        if session.over_limits():
+            driver = session.acquire()
+            navigator = HashNavigator(driver, readiness=readiness)
+        attempts = 0
+        success = False
+        while attempts < 2 and not success:
+            try:
+                navigator.open(url_prefix, username, force_full=attempts > 0)  # 重試時完整載入
+                session.page_loaded()
+                data.append(read_record(driver, username))  # 一次取得整個紀錄表
+                success = True
+            except Exception as e:
+                print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
+                attempts += 1
+                # 瀏覽器當機時重新啟動，繼續處理剩下的用戶
+                if not session.healthy():
+                    driver = session.acquire()
+                    navigator = HashNavigator(driver, readiness=readiness)
+        if not success:
+            failed += 1
 
-        # 將數據轉換成 DataFrame
-        df = pd.DataFrame(data)
-        # 按 'Rank' 升序排列 DataFrame
-        df = df.sort_values(by='Rank')
+    # 將數據轉換成 DataFrame，沿用的舊紀錄帶有 FetchedTime 欄位
+    df = pd.DataFrame(data + carried)
+    if df.empty:
+        store.close()
+        print(f"{game_type} 沒有取得任何資料，略過儲存。")
+        return len(data), failed
+    # 按 'Rank' 升序排列 DataFrame
+    df = df.sort_values(by='Rank')
+    # 寫入快照資料庫
+    store.append(game_type, current_time, data + carried)
+    store.close()
+    print(f"{game_type} 共 {len(data)} 筆數據 (另沿用 {len(carried)} 筆) 已寫入 ./othello/snapshots.db")
+    if save_xlsx:
         # 將 DataFrame 儲存到 Excel 文件，文件名包含當前日期和時間
         excel_filename = f'./othello/files/Reversi_{game_type}_data_{current_time}.xlsx'
         df.to_excel(excel_filename, index=False)
         print(f"數據已儲存至 {excel_filename} 並按排名排序。")
 
-    # 關閉瀏覽器
-    driver.quit()
-
-# 初始執行
-fetch_othello_data()
+    # 顯示並保存每位用戶的等待時間
+    readiness.report()
+    navigator.report()
+    readiness.save(f'./othello/wait_times_{game_type}_{current_time}.csv')
+    return len(data), failed
 
-# 設定每六小時執行一次
-schedule.every(6).hours.do(fetch_othello_data)
+# 每種棋類型一個工作，啟動後立即執行一次，之後依各自的間隔執行
+# 上一次還沒結束時不會重疊執行；每次執行的開始時間、耗時、用戶數與失敗數記錄在 run_history.csv
+daemon = CollectorDaemon(max_concurrent=max_concurrent_jobs, history_path='./othello/run_history.csv')
+for game_type, interval_hours in job_intervals.items():
+    daemon.add_job(game_type, lambda game_type=game_type: fetch_othello_data(game_type),
+                   interval_hours, jitter_seconds)
 
 # 保持腳本運行
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+daemon.run_forever()
@@ -1,98 +1,142 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from tqdm import tqdm
-import pandas as pd
-import time
-from datetime import datetime
-import os
-import atexit
-import signal
-import psutil
-
-# 設定 Selenium 的 Chrome 驅動
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # 啟用無頭模式
-chrome_options.add_argument("--disable-gpu")  # 禁用GPU硬體加速
-chrome_options.add_argument("--log-level=3")  # 只記錄嚴重錯誤信息
-chrome_options.add_argument("--disable-dev-shm-usage")  # 避免大量記憶體佔用
-chrome_options.add_argument("--no-sandbox")  # 解決DevToolsActivePort文件不存在的錯誤
-
-# 指定 Chromedriver 的路徑
-service = Service(executable_path='e:\\temp\\chromedriver.exe')
-
-# 初始化 WebDriver
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# 確保在腳本結束時釋放資源
-def cleanup():
-    try:
-        driver.quit()
-    except Exception as e:
-        print(f"Error quitting driver: {e}")
-    try:
-        service.stop()
-    except Exception as e:
-        print(f"Error stopping service: {e}")
-    # 顯式關閉所有 chrome.exe 進程
-    for proc in psutil.process_iter(['pid', 'name']):
-        if proc.info['name'] == 'chrome.exe':
-            proc.kill()
-
-# 使用 atexit 模組來註冊 cleanup 函數，確保即使腳本異常退出時也能釋放資源
-atexit.register(cleanup)
-
-# 從 user.txt 文件中讀取用戶名單，轉為小寫並移除空白
-with open('e:\\temp\\othello\\user.txt', 'r') as file:
-    usernames = [line.strip().replace(' ', '').lower() for line in file.readlines()]
-
-# 棋類型和對應的網址
-game_types = {
-    "5min": "http://questgames.net/reversi/#user/",
-    "1min": "http://questgames.net/reversi1/#user/"
-}
-
-# 獲取當前的日期和時間，格式為 YYYYMMDDHHMM
-current_time = datetime.now().strftime("%Y%m%d%H%M")
-
-# 確保文件存儲目錄存在
-if not os.path.exists('e:\\temp\\othello\\files'):
-    os.makedirs('e:\\temp\\othello\\files')
-
-# 處理每種棋類型
-for game_type, url_prefix in game_types.items():
-    data = []  # 初始化資料存儲列表
-    # 在進度條下處理每個用戶
-    for username in tqdm(usernames, desc=f"處理 {game_type} 用戶中"):
-        attempts = 0
-        success = False
-        while attempts < 2 and not success:
-            driver.get(f"{url_prefix}{username}")
-            time.sleep(0.8)  # 等待內容加載
-            try:
-                user_element = driver.find_element(By.CSS_SELECTOR, 'li.record')
-                rank = user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rank"]]/td').text.strip()
-                data.append({
-                    'Username': username,
-                    'Rating': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rating"]]/td').text,
-                    'Rank': int(rank.split()[0]),  # 假設排名是文本的第一部分且為數字
-                    'Win/Loss': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Win loss"]]/td').text,
-                    'Streak': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Streak"]]/td').text
-                })
-                success = True
-            except Exception as e:
-                print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
-                attempts += 1
-
-    # 將數據轉換成 DataFrame
-    df = pd.DataFrame(data)
-    # 按 'Rank' 升序排列 DataFrame
-    df = df.sort_values(by='Rank')
-    # 將 DataFrame 儲存到 Excel 文件，文件名包含當前日期和時間
-    excel_filename = f'e:\\temp\\othello\\files\\Reversi_{game_type}_data_{current_time}.xlsx'
-    df.to_excel(excel_filename, index=False)
-    print(f"數據已儲存至 {excel_filename} 並按排名排序。")
-
-# 關閉瀏覽器和服務，確保資源釋放
-cleanup()
+import pandas as pd
+import os
+import atexit
+
+from questgames.analytics import PlayerAnalytics
+from questgames.checkpoint import Checkpoint
+from questgames.governor import RequestGovernor
+from questgames.http_backend import HttpRecordBackend
+from questgames.metrics import Metrics
+from questgames.polling import ActivityScheduler
+from questgames.pool import ScrapePool
+from questgames.readiness import RecordReadiness
+from questgames.store import SnapshotStore
+from questgames.record import GAME_TYPES
+
+# 指定 Chromedriver 的路徑
+chromedriver_path = 'e:\\temp\\chromedriver.exe'
+
+# 快照資料庫；save_xlsx 為 True 時同時保存每次執行的 xlsx
+store_path = 'e:\\temp\\othello\\snapshots.db'
+save_xlsx = True
+
+# 每取得一筆紀錄就寫入檢查點；resume 為 True 時若上次中斷，沿用同一個快照時間並只抓取剩下的用戶
+checkpoint_dir = 'e:\\temp\\othello\\checkpoints'
+resume = True
+# 只沿用 6 小時內開始的檢查點，更舊的移到 archive 子目錄後開始新的快照
+resume_max_age_hours = 6
+
+# 依用戶活躍程度決定是否抓取，久未下棋的用戶沿用上次紀錄 (最久 48 小時)；設為 False 則每次抓取所有用戶
+adaptive_polling = True
+
+# 同時啟動的無頭瀏覽器數量，設為 1 即為原本逐一抓取的方式
+num_workers = 4
+
+# 抓取方式: 'selenium' 以瀏覽器讀取頁面；'http' 直接請求頁面的資料，無法解碼的用戶再交給瀏覽器
+backend = 'selenium'
+
+# 所有瀏覽器共用的節流：從每秒 2 次開始，網站正常時逐步加快 (最多每秒 8 次)，
+# 被限流或回應變慢時減速；連續失敗 5 次時暫停 60 秒，剩下的用戶直接略過而不是逐一重試
+governor = RequestGovernor(rate=2, max_rate=8, failure_threshold=5, cooldown=60)
+
+# HTTP 請求另外使用一個節流器：HTTP 端點故障開啟的斷路器不會連帶擋下改用瀏覽器的重試
+http_governor = RequestGovernor(rate=2, max_rate=8, failure_threshold=5, cooldown=60)
+
+# 記錄各階段耗時 (啟動瀏覽器、載入頁面、讀取紀錄表、寫入資料庫等)，執行結束時輸出成 Prometheus textfile
+metrics = Metrics()
+metrics_path = 'e:\\temp\\othello\\metrics\\questgames.prom'
+
+# 依紀錄表是否填好判斷頁面載入完成，各瀏覽器共用延遲統計
+readiness = RecordReadiness()
+
+# hash_navigation: 每個瀏覽器只完整載入一次頁面，之後以 hash 切換用戶
+# 每個瀏覽器載入超過 2000 頁或其行程合計記憶體超過 1500 MB 時重新啟動
+pool = ScrapePool(chromedriver_path, num_workers=num_workers, readiness=readiness, hash_navigation=True,
+                  governor=governor, metrics=metrics, max_pages=2000, max_rss_mb=1500)
+
+# 確保在腳本結束時釋放資源：只結束本次啟動的 chromedriver 與其下的瀏覽器行程，
+# 不影響同一台機器上的其他瀏覽器或同時執行的其他收集程式
+def cleanup():
+    pool.close()
+
+# 使用 atexit 模組來註冊 cleanup 函數，確保即使腳本異常退出時也能釋放資源
+atexit.register(cleanup)
+
+# 從 user.txt 文件中讀取用戶名單，轉為小寫並移除空白
+with open('e:\\temp\\othello\\user.txt', 'r') as file:
+    usernames = [line.strip().replace(' ', '').lower() for line in file.readlines()]
+
+# 棋類型和對應的網址
+game_types = GAME_TYPES
+
+# 開啟檢查點；續跑時快照時間沿用上次中斷的那一次，格式為 YYYYMMDDHHMM
+checkpoint = Checkpoint.open(checkpoint_dir, resume=resume, max_age_hours=resume_max_age_hours)
+current_time = checkpoint.snapshot_time
+
+# 確保文件存儲目錄存在
+if not os.path.exists('e:\\temp\\othello\\files'):
+    os.makedirs('e:\\temp\\othello\\files')
+
+store = SnapshotStore(store_path)
+
+# 本次要抓取的 (棋類型, 用戶)，以及各棋類型沿用舊紀錄的用戶
+tasks, carried = [], {game_type: [] for game_type in game_types}
+for game_type in game_types:
+    if adaptive_polling:
+        scheduler = ActivityScheduler(store, game_type, max_staleness_hours=48)
+        polled, carried[game_type] = scheduler.plan(usernames)
+        scheduler.report()
+    else:
+        polled = usernames
+    tasks.extend((game_type, username) for username in polled)
+# 略過檢查點中已完成的用戶
+tasks = checkpoint.pending(tasks)
+
+# 每筆紀錄取得後立即寫入檢查點
+if backend == 'http':
+    # 以 HTTP 同時抓取，失敗的 (棋類型, 用戶) 才啟動瀏覽器處理
+    HttpRecordBackend(governor=http_governor, metrics=metrics).fetch_tasks(
+        game_types, tasks, fallback=lambda pairs: pool.run_tasks(game_types, pairs, on_record=checkpoint.add),
+        on_record=checkpoint.add)
+else:
+    # 將所有 (棋類型, 用戶) 分給多個瀏覽器同時處理
+    pool.run_tasks(game_types, tasks, on_record=checkpoint.add)
+
+# 處理每種棋類型，資料一律來自檢查點 (含之前中斷前已取得的紀錄)
+for game_type in game_types:
+    # 沿用的舊紀錄帶有 FetchedTime 欄位
+    data = checkpoint.game_records(game_type) + carried[game_type]
+    # 將數據轉換成 DataFrame
+    df = pd.DataFrame(data)
+    if df.empty:
+        print(f"{game_type} 沒有取得任何資料，略過儲存。")
+        continue
+    # 按 'Rank' 升序排列 DataFrame
+    df = df.sort_values(by='Rank')
+    # 寫入快照資料庫
+    with metrics.stage('store', game_type=game_type):
+        store.append(game_type, current_time, data)
+    print(f"{game_type} 共 {len(data)} 筆數據 (其中沿用 {len(carried[game_type])} 筆) 已寫入 {store_path}")
+    if save_xlsx:
+        # 將 DataFrame 儲存到 Excel 文件，文件名包含當前日期和時間
+        excel_filename = f'e:\\temp\\othello\\files\\Reversi_{game_type}_data_{current_time}.xlsx'
+        with metrics.stage('xlsx', game_type=game_type):
+            df.to_excel(excel_filename, index=False)
+        print(f"數據已儲存至 {excel_filename} 並按排名排序。")
+
+# 用戶統計表只以剛寫入的快照更新，print-rank-9.py 與 python -m questgames stats 直接查詢
+with metrics.stage('analytics'):
+    PlayerAnalytics(store).update()
+store.close()
+# 輸出完成，刪除檢查點
+checkpoint.finish()
+
+# 顯示各瀏覽器的處理量與失敗名單
+pool.report()
+readiness.report()
+readiness.save(f'e:\\temp\\othello\\wait_times_{current_time}.csv')
+metrics.report()
+metrics.write_textfile(metrics_path)
+
+# 關閉瀏覽器和服務，確保資源釋放
+cleanup()
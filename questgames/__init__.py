@@ -0,0 +1 @@
+# questgames 黑白棋紀錄收集與分析的共用模組
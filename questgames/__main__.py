@@ -0,0 +1,6 @@
+# python -m questgames <子命令>
+from questgames.cli import main
+
+# 繪圖時會啟動子行程 (spawn 會重新匯入主模組)，只在直接執行時呼叫
+if __name__ == '__main__':
+    main()
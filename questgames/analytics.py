@@ -0,0 +1,264 @@
+# 每位用戶 (依棋類型) 的統計表，存放在快照資料庫中，每次只讀取新增的快照更新，不必重新掃描全部歷史
+# 包含最新分數與變化、最高分、比賽次數、近 1/7 天的比賽數與勝率、連勝/連敗、名次變化
+# 排名、繪圖前的前 N 名篩選 (含黑名單) 直接查詢此表
+# 更新並列出前 20 名: python -m questgames.analytics --store ./othello/snapshots.db --game-type 5min
+import argparse
+import re
+from datetime import datetime, timedelta
+
+from questgames.store import DEFAULT_STORE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    game_type TEXT NOT NULL,
+    username TEXT NOT NULL,
+    first_seen TEXT,          -- 第一次出現的快照時間
+    last_seen TEXT,           -- 最後一次出現的快照時間
+    rating INTEGER,           -- 最新分數
+    rating_delta INTEGER,     -- 與上一次快照相比的分數變化
+    rating_week_delta INTEGER,
+    max_rating INTEGER,       -- 頁面上的歷史最高分
+    peak_rating INTEGER,      -- 快照中出現過的最高分
+    rank INTEGER,
+    rank_change INTEGER,      -- 與上一次快照相比的名次變化，正值為上升
+    best_rank INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    draws INTEGER,
+    matches INTEGER,
+    match_increase INTEGER,   -- 與上一次快照相比的比賽數
+    games_day INTEGER,        -- 近 24 小時的比賽數
+    games_week INTEGER,       -- 近 7 天的比賽數
+    win_rate REAL,            -- 頁面上的總勝率
+    win_rate_week REAL,       -- 近 7 天的勝率 (沒有比賽為 NULL)
+    streak TEXT,
+    longest_win_streak INTEGER,
+    PRIMARY KEY (game_type, username)
+);
+CREATE INDEX IF NOT EXISTS idx_player_stats_rating ON player_stats (game_type, rating DESC);
+-- 近 7 天每次快照的比賽數、勝場與分數，計算近 1/7 天的統計用，較舊的資料列會刪除
+CREATE TABLE IF NOT EXISTS player_samples (
+    game_type TEXT NOT NULL,
+    username TEXT NOT NULL,
+    snapshot_time TEXT NOT NULL,
+    matches INTEGER,
+    wins INTEGER,
+    rating INTEGER,
+    PRIMARY KEY (game_type, username, snapshot_time)
+);
+-- 各棋類型已處理到的快照時間，以及當時的快照數與資料列數
+-- (任一個改變代表有較舊的快照被匯入，或有紀錄被刪除 (例如去重)，需重建)
+CREATE TABLE IF NOT EXISTS analytics_state (
+    game_type TEXT PRIMARY KEY,
+    last_snapshot TEXT,
+    snapshots INTEGER,
+    rows INTEGER
+);
+"""
+
+# 與 parsing.py 相同的格式；這裡不使用 pandas，查詢可立即回應
+_RATING = re.compile(r'^\s*(\d+)(?:.*?max:\s*(\d+))?')
+_WIN_LOSS = re.compile(r'^\s*(\d+)-(\d+)-(\d+)\s*\(([\d.]+)%?\)')
+_STREAK = re.compile(r'^\s*([WwLlDd])\s*(\d+)')
+
+STAT_COLUMNS = ['game_type', 'username', 'first_seen', 'last_seen', 'rating', 'rating_delta', 'rating_week_delta',
+                'max_rating', 'peak_rating', 'rank', 'rank_change', 'best_rank', 'wins', 'losses', 'draws',
+                'matches', 'match_increase', 'games_day', 'games_week', 'win_rate', 'win_rate_week', 'streak',
+                'longest_win_streak']
+
+# 可用於排序的欄位，值越大越前面 (rank 例外)
+SORT_COLUMNS = ('rating', 'rating_delta', 'rating_week_delta', 'max_rating', 'peak_rating', 'rank', 'rank_change',
+                'matches', 'games_day', 'games_week', 'win_rate', 'win_rate_week', 'longest_win_streak')
+
+
+def _parse_row(rating, win_loss, streak):
+    # 回傳 (分數, 最高分, 勝, 負, 和, 勝率, 連勝場數)；無法解析的欄位為 None
+    match = _RATING.match(str(rating or ''))
+    current, max_rating = (int(match.group(1)), int(match.group(2)) if match.group(2) else None) if match \
+        else (None, None)
+    match = _WIN_LOSS.match(str(win_loss or ''))
+    wins, losses, draws, win_rate = (int(match.group(1)), int(match.group(2)), int(match.group(3)),
+                                     float(match.group(4))) if match else (None, None, None, None)
+    match = _STREAK.match(str(streak or ''))
+    win_streak = int(match.group(2)) if match and match.group(1).upper() == 'W' else 0
+    return current, max_rating, wins, losses, draws, win_rate, win_streak
+
+
+def _diff(new, old):
+    return new - old if new is not None and old is not None else None
+
+
+def _max(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _min(*values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+class PlayerAnalytics:
+    def __init__(self, store, window_days=7):
+        # store: SnapshotStore，統計表與快照存在同一個資料庫
+        self.conn = store.conn
+        self.window = timedelta(days=window_days)
+        self.conn.executescript(_SCHEMA)
+        # 舊版統計表沒有 rows 欄位 (為 NULL，下次更新時重建一次)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(analytics_state)")]
+        if 'rows' not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE analytics_state ADD COLUMN rows INTEGER")
+
+    def _state(self, game_type):
+        row = self.conn.execute("SELECT last_snapshot, snapshots, rows FROM analytics_state WHERE game_type = ?",
+                                (game_type,)).fetchone()
+        return row or (None, 0, 0)
+
+    def _counts(self, game_type, last_snapshot):
+        # 回傳 (快照數, 資料列數)，只計算 last_snapshot 之前 (含) 的快照
+        return self.conn.execute("SELECT COUNT(DISTINCT snapshot_time), COUNT(*) FROM snapshots "
+                                 "WHERE game_type = ? AND snapshot_time <= ?", (game_type, last_snapshot)).fetchone()
+
+    def _clear(self, game_type):
+        for table in ('player_stats', 'player_samples', 'analytics_state'):
+            self.conn.execute(f"DELETE FROM {table} WHERE game_type = ?", (game_type,))
+
+    def update(self, game_type=None):
+        # 只處理上次之後新增的快照，回傳 {game_type: 處理的快照數}
+        game_types = [game_type] if game_type else \
+            [row[0] for row in self.conn.execute("SELECT DISTINCT game_type FROM snapshots")]
+        processed = {}
+        for gt in game_types:
+            last_snapshot, counted, counted_rows = self._state(gt)
+            with self.conn:
+                if last_snapshot is not None:
+                    # 已處理範圍內的快照數或資料列數改變 (匯入較舊的快照、刪除重複紀錄) 時從頭重建
+                    if tuple(self._counts(gt, last_snapshot)) != (counted, counted_rows):
+                        print(f"{gt} 已處理的快照有變動，重建統計表")
+                        self._clear(gt)
+                        last_snapshot = None
+                times = [row[0] for row in self.conn.execute(
+                    "SELECT DISTINCT snapshot_time FROM snapshots WHERE game_type = ? AND snapshot_time > ? "
+                    "ORDER BY snapshot_time", (gt, last_snapshot or ''))]
+                for snapshot_time in times:
+                    self._apply(gt, snapshot_time)
+                if times:
+                    self.conn.execute("INSERT OR REPLACE INTO analytics_state VALUES (?, ?, ?, ?)",
+                                      (gt, times[-1], *self._counts(gt, times[-1])))
+            processed[gt] = len(times)
+        return processed
+
+    def rebuild(self, game_type=None):
+        with self.conn:
+            if game_type:
+                self._clear(game_type)
+            else:
+                for table in ('player_stats', 'player_samples', 'analytics_state'):
+                    self.conn.execute(f"DELETE FROM {table}")
+        return self.update(game_type)
+
+    def _apply(self, game_type, snapshot_time):
+        # 以一次快照更新該快照中所有用戶的統計
+        rows = self.conn.execute("SELECT username, rating, rank, win_loss, streak FROM snapshots "
+                                 "WHERE game_type = ? AND snapshot_time = ?", (game_type, snapshot_time)).fetchall()
+        previous = {row[1]: dict(zip(STAT_COLUMNS, row)) for row in self.conn.execute(
+            f"SELECT {', '.join(STAT_COLUMNS)} FROM player_stats WHERE game_type = ?", (game_type,))}
+
+        # 近 7 天的樣本：刪除視窗之外的資料列，再取每位用戶在近 1/7 天內最早的樣本
+        now = datetime.strptime(snapshot_time, '%Y%m%d%H%M')
+        week_start = (now - self.window).strftime('%Y%m%d%H%M')
+        day_start = (now - timedelta(days=1)).strftime('%Y%m%d%H%M')
+        self.conn.execute("DELETE FROM player_samples WHERE game_type = ? AND snapshot_time < ?",
+                          (game_type, week_start))
+        week, day = {}, {}
+        for username, sample_time, matches, wins, rating in self.conn.execute(
+                "SELECT username, snapshot_time, matches, wins, rating FROM player_samples WHERE game_type = ? "
+                "ORDER BY snapshot_time", (game_type,)):
+            week.setdefault(username, (matches, wins, rating))
+            if sample_time >= day_start:
+                day.setdefault(username, (matches, wins, rating))
+
+        stats, samples = [], []
+        for username, rating_text, rank, win_loss, streak in rows:
+            current, max_rating, wins, losses, draws, win_rate, win_streak = _parse_row(rating_text, win_loss,
+                                                                                         streak)
+            matches = wins + losses + draws if wins is not None else None
+            old = previous.get(username, {})
+            week_matches, week_wins, week_rating = week.get(username, (None, None, None))
+            day_matches = day.get(username, (None,))[0]
+            games_week = _diff(matches, week_matches)
+            week_wins = _diff(wins, week_wins)
+            stats.append((
+                game_type, username, old.get('first_seen') or snapshot_time, snapshot_time,
+                current, _diff(current, old.get('rating')), _diff(current, week_rating),
+                max_rating, _max(current, old.get('peak_rating')),
+                rank, _diff(old.get('rank'), rank), _min(rank, old.get('best_rank')),
+                wins, losses, draws, matches, _diff(matches, old.get('matches')),
+                _diff(matches, day_matches), games_week, win_rate,
+                round(week_wins * 100 / games_week, 1) if games_week and week_wins is not None else None,
+                streak, _max(win_streak, old.get('longest_win_streak')),
+            ))
+            samples.append((game_type, username, snapshot_time, matches, wins, current))
+        self.conn.executemany(f"INSERT OR REPLACE INTO player_stats VALUES ({', '.join('?' * len(STAT_COLUMNS))})",
+                              stats)
+        self.conn.executemany("INSERT OR REPLACE INTO player_samples VALUES (?, ?, ?, ?, ?, ?)", samples)
+
+    def top(self, game_type, n=None, blacklist=(), sort='rating'):
+        # 依 sort 欄位排序 (rank 由小到大，其他由大到小)，過濾黑名單，回傳 [{欄位: 值}, ...]
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"無法依 {sort} 排序，可用欄位: {', '.join(SORT_COLUMNS)}")
+        blacklist = list(blacklist)
+        sql = f"SELECT {', '.join(STAT_COLUMNS)} FROM player_stats WHERE game_type = ? AND {sort} IS NOT NULL"
+        if blacklist:
+            sql += f" AND username NOT IN ({','.join('?' * len(blacklist))})"
+        sql += f" ORDER BY {sort} {'ASC' if sort == 'rank' else 'DESC'}, username"
+        params = [game_type] + blacklist
+        if n is not None:
+            sql += " LIMIT ?"
+            params.append(n)
+        return [dict(zip(STAT_COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+    def top_usernames(self, game_type, n=None, blacklist=()):
+        # 與 rank_users 相同：依最新分數由高到低
+        return [row['username'] for row in self.top(game_type, n, blacklist)]
+
+    def player(self, username, game_type=None):
+        sql = f"SELECT {', '.join(STAT_COLUMNS)} FROM player_stats WHERE username = ?"
+        params = [username]
+        if game_type is not None:
+            sql += " AND game_type = ?"
+            params.append(game_type)
+        return [dict(zip(STAT_COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+
+def format_stats(rows):
+    # 簡單的文字表格
+    header = f"{'':>4} {'用戶':<18} {'分數':>5} {'變化':>5} {'7天':>5} {'最高':>5} {'名次':>5} {'升降':>5} " \
+             f"{'1天場':>5} {'7天場':>5} {'7天勝率':>7} {'連勝':>5}"
+    lines = [header]
+    for i, row in enumerate(rows, 1):
+        def cell(key, width, sign='', kind='d'):
+            value = row[key]
+            return f"{'-':>{width}}" if value is None else format(value, f'>{sign}{width}{kind}')
+        lines.append(f"{i:>4} {row['username']:<18} {cell('rating', 5)} {cell('rating_delta', 5, '+')} "
+                     f"{cell('rating_week_delta', 5, '+')} {cell('max_rating', 5)} {cell('rank', 5)} "
+                     f"{cell('rank_change', 5, '+')} {cell('games_day', 5)} {cell('games_week', 5)} "
+                     f"{cell('win_rate_week', 7, kind='.1f')} {str(row['streak'] or '-'):>5}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    from questgames.store import SnapshotStore
+    parser = argparse.ArgumentParser(description='更新並查詢用戶統計表')
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--game-type', default='5min')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--sort', choices=SORT_COLUMNS, default='rating')
+    parser.add_argument('--rebuild', action='store_true', help='從全部歷史重新計算')
+    args = parser.parse_args()
+    store = SnapshotStore(args.store)
+    analytics = PlayerAnalytics(store)
+    print(f"處理的快照數: {analytics.rebuild() if args.rebuild else analytics.update()}")
+    print(format_stats(analytics.top(args.game_type, args.top, sort=args.sort)))
+    store.close()
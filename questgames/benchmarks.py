@@ -0,0 +1,173 @@
+# 可重複執行的效能測試，全部在本機替身伺服器與產生的資料上進行，不連線到 questgames.net
+# 結果附加到 CSV (含版本)，每次執行時與同參數的上一次結果比較，效能退步會直接以數字顯示
+# 執行: python -m questgames benchmark [--only collect_http parse dedup render]
+import csv
+import inspect
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+# 數值越大越好的單位，其他單位 (秒) 越小越好
+HIGHER_IS_BETTER = ('users/min', 'rows/s')
+
+RESULT_FIELDS = ['time', 'version', 'benchmark', 'params', 'value', 'unit']
+
+
+def code_version():
+    # git 短雜湊，工作目錄有未提交的修改時加上 -dirty
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_collect_http(users=300, latency=0.05, error_rate=0.01, concurrency=8):
+    from questgames.http_backend import HttpRecordBackend
+    from questgames.standin import GAME_PATHS, standin_endpoints, standin_roster, start_standin
+    server, base_url = start_standin(latency=latency, error_rate=error_rate, roster_size=users)
+    try:
+        backend = HttpRecordBackend(endpoints=standin_endpoints(base_url), concurrency=concurrency)
+        start = time.perf_counter()
+        results = backend.fetch(GAME_PATHS, standin_roster(users))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    fetched = sum(len(records) for records in results.values())
+    return fetched * 60 / elapsed, 'users/min'
+
+
+def bench_collect_selenium(users=40, latency=0.05, render_delay=0.2, workers=2, chromedriver='chromedriver'):
+    # 以替身頁面測試瀏覽器抓取 (含 hash 切換與紀錄表等待)，需要可用的 Chrome 與 chromedriver
+    from questgames.pool import ScrapePool
+    from questgames.readiness import RecordReadiness
+    from questgames.standin import standin_game_types, standin_roster, start_standin
+    server, base_url = start_standin(latency=latency, render_delay=render_delay, roster_size=users)
+    try:
+        pool = ScrapePool(chromedriver, num_workers=workers, readiness=RecordReadiness(), hash_navigation=True)
+        start = time.perf_counter()
+        results = pool.run(standin_game_types(base_url), standin_roster(users))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    fetched = sum(len(records) for records in results.values())
+    if not fetched:
+        raise RuntimeError("沒有取得任何資料 (瀏覽器無法啟動？)")
+    return fetched * 60 / elapsed, 'users/min'
+
+
+def bench_parse(rows=500_000):
+    # 解析 Rating 與 Win/Loss 字串
+    from questgames.parsing import make_sample, parse_snapshot_columns
+    df = make_sample(rows)
+    start = time.perf_counter()
+    parse_snapshot_columns(df)
+    return rows / (time.perf_counter() - start), 'rows/s'
+
+
+def bench_dedup(years=3, users=300):
+    # check1-1.py 的重複紀錄偵測
+    from questgames.dedup import find_duplicates, make_history
+    history = make_history(years, users)
+    start = time.perf_counter()
+    find_duplicates(history)
+    return time.perf_counter() - start, 's'
+
+
+def make_rating_history(years, users, seed=0):
+    # 每 6 小時一次快照的分數與勝敗場數，欄位與 parse_snapshot_columns 的輸出相同
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=int(years * 365 * 4), freq='6h')
+    frames = []
+    for i in range(users):
+        games = rng.integers(0, 4, (len(dates), 3)).cumsum(axis=0)
+        rating = 1500 + rng.normal(0, 8, len(dates)).cumsum().round().astype(int)
+        frames.append(pd.DataFrame({
+            'Username': f"user{i}",
+            'Date': dates,
+            'CurrentRating': rating,
+            'MaxRating': np.maximum.accumulate(rating),
+            'Wins': games[:, 0],
+            'Losses': games[:, 1],
+            'Draws': games[:, 2] // 3,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def bench_render(years=3, users=18, cols=6, font_path='./font/SimHei.ttf'):
+    # print-rank-9.py 的分數與比賽次數圖，繪製一張 users 位用戶的多年歷史
+    from questgames.plotting import build_user_index, rank_users, render_grid
+    user_index = build_user_index(make_rating_history(years, users))
+    panels = [(username, user_index[username]) for username in rank_users(user_index)]
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        render_grid((os.path.join(directory, 'bench.png'), panels, font_path, cols))
+        return time.perf_counter() - start, 's'
+
+
+BENCHMARKS = {
+    'collect_http': bench_collect_http,
+    'collect_selenium': bench_collect_selenium,
+    'parse': bench_parse,
+    'dedup': bench_dedup,
+    'render': bench_render,
+}
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def _change(previous, value, unit):
+    # 正值為變好、負值為變差 (百分比)
+    previous = float(previous)
+    if not previous:
+        return 0.0
+    change = (value - previous) / previous * 100
+    return change if unit in HIGHER_IS_BETTER else -change
+
+
+def run_suite(results_path, names=None, params=None):
+    # names: 要執行的項目 (預設除了 collect_selenium 以外全部)；params: {name: {參數: 值}}
+    names = names or [name for name in BENCHMARKS if name != 'collect_selenium']
+    params = params or {}
+    history = load_results(results_path)
+    version = code_version()
+    rows = []
+    for name in names:
+        # 以實際使用的參數 (含預設值) 比較，參數不同的結果不互相比較
+        parameters = inspect.signature(BENCHMARKS[name]).parameters
+        options = {key: parameter.default for key, parameter in parameters.items()}
+        options.update(params.get(name, {}))
+        label = ' '.join(f'{key}={value}' for key, value in sorted(options.items()))
+        try:
+            value, unit = BENCHMARKS[name](**options)
+        except Exception as e:
+            print(f"{name:<16} 無法執行: {type(e).__name__}: {e}")
+            continue
+        previous = [row for row in history if row['benchmark'] == name and row['params'] == label]
+        line = f"{name:<16} {value:12.2f} {unit:<9}"
+        if previous:
+            last = previous[-1]
+            line += f" 上次 {float(last['value']):.2f} ({last['version']})，{_change(last['value'], value, unit):+.1f}%"
+        print(line)
+        rows.append({'time': datetime.now().strftime('%Y%m%d%H%M'), 'version': version, 'benchmark': name,
+                     'params': label, 'value': f'{value:.4f}', 'unit': unit})
+
+    if rows:
+        os.makedirs(os.path.dirname(results_path) or '.', exist_ok=True)
+        is_new = not os.path.exists(results_path)
+        with open(results_path, 'a', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            if is_new:
+                writer.writeheader()
+            writer.writerows(rows)
+        print(f"結果已附加至 {results_path}")
+    return rows
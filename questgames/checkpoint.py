@@ -0,0 +1,92 @@
+# 抓取過程中每取得一筆紀錄就附加寫入檢查點 (JSON Lines)，中斷後重新執行可略過已完成的 (棋類型, 用戶)
+# 檢查點檔名包含快照時間，續跑時沿用同一個快照時間；最後的 xlsx/資料庫都由檢查點內容產生
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+_FILE_PATTERN = re.compile(r'^checkpoint_(\d{12})\.jsonl$')
+
+
+class Checkpoint:
+    def __init__(self, path, snapshot_time):
+        self.path = path
+        self.snapshot_time = snapshot_time  # YYYYMMDDHHMM
+        self.records = {}  # {(game_type, username): record}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+        # 上次中斷時最後一行可能沒寫完，先換行避免與新紀錄接在一起
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write('\n')
+
+    @classmethod
+    def open(cls, directory, resume=True, max_age_hours=6, now=None):
+        # resume 為 True 時沿用目錄中最新一個未完成的檢查點，否則以目前時間開始新的快照
+        # 只沿用 max_age_hours 內開始的檢查點 (同一個執行週期)；更舊的檢查點移到 archive 子目錄後重新開始，
+        # 避免數天前中斷的快照時間被套用到新抓取的資料
+        os.makedirs(directory, exist_ok=True)
+        now = now or datetime.now()
+        pending = sorted(name for name in os.listdir(directory) if _FILE_PATTERN.match(name))
+        oldest = (now - timedelta(hours=max_age_hours)).strftime('%Y%m%d%H%M')
+        stale = [name for name in pending if _FILE_PATTERN.match(name).group(1) < oldest]
+        if stale:
+            archive = os.path.join(directory, 'archive')
+            os.makedirs(archive, exist_ok=True)
+            for name in stale:
+                os.replace(os.path.join(directory, name), os.path.join(archive, name))
+            print(f"檢查點超過 {max_age_hours} 小時，不再沿用，已移至 {archive}: {', '.join(stale)}")
+            pending = [name for name in pending if name not in stale]
+        if resume and pending:
+            snapshot_time = _FILE_PATTERN.match(pending[-1]).group(1)
+        else:
+            snapshot_time = now.strftime("%Y%m%d%H%M")
+        checkpoint = cls(os.path.join(directory, f"checkpoint_{snapshot_time}.jsonl"), snapshot_time)
+        if checkpoint.records:
+            print(f"沿用檢查點 {checkpoint.path}：已完成 {len(checkpoint.records)} 筆，略過這些用戶")
+        return checkpoint
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # 中斷時寫到一半的最後一行
+                self.records[(entry['game_type'], entry['record']['Username'])] = entry['record']
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b'\n'
+
+    def is_done(self, game_type, username):
+        return (game_type, username) in self.records
+
+    def pending(self, pairs):
+        # 過濾掉已完成的 (棋類型, 用戶)
+        return [(game_type, username) for game_type, username in pairs if not self.is_done(game_type, username)]
+
+    def add(self, game_type, record):
+        # 可由多個 worker 同時呼叫；每筆寫入後立即 flush，行程中斷也不會遺失
+        line = json.dumps({'game_type': game_type, 'record': record}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.records[(game_type, record['Username'])] = record
+
+    def game_records(self, game_type):
+        return [record for (gt, _), record in self.records.items() if gt == game_type]
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def finish(self):
+        # 輸出都完成後刪除檢查點，下次執行會開始新的快照
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,369 @@
+# 統一的命令列工具: python -m questgames <collect|dedupe|plot|stats|export|status|query|config|bench|benchmark>
+# pandas、matplotlib、selenium 等較慢的套件只在需要的子命令中才匯入，--help、status、query 可立即回應
+import argparse
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from questgames.analytics import SORT_COLUMNS
+from questgames.config import load_config, read_roster, write_default_config
+
+# 啟動時間測試時檢查是否被載入的套件
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'selenium', 'tqdm', 'aiohttp', 'pyarrow')
+
+
+def cmd_config(config, args):
+    if args.init:
+        print(f"已產生設定檔 {write_default_config(args.config)}")
+        return
+    import json
+    print(f"設定檔: {config['source'] or '(未找到，使用預設值)'}")
+    print(json.dumps({k: v for k, v in config.items() if k != 'source'}, ensure_ascii=False, indent=2))
+
+
+def cmd_status(config, args):
+    from questgames.store import SnapshotStore
+    paths = config['paths']
+    roster = config['roster'] if isinstance(config['roster'], str) else '設定檔'
+    try:
+        print(f"用戶名單: {len(read_roster(config))} 位用戶 ({roster})")
+    except OSError as e:
+        print(f"無法讀取用戶名單: {e}")
+    if os.path.exists(paths['store']):
+        store = SnapshotStore(paths['store'])
+        for game_type, snapshots, rows, users, first, last in store.summary():
+            print(f"{game_type}: {snapshots} 次快照、{rows} 筆紀錄、{users} 位用戶，{first} ~ {last}")
+        store.close()
+    else:
+        print(f"尚無快照資料庫 {paths['store']}")
+    if os.path.isdir(paths['checkpoints']):
+        pending = sorted(name for name in os.listdir(paths['checkpoints']) if name.endswith('.jsonl'))
+        for name in pending:
+            with open(os.path.join(paths['checkpoints'], name), 'rb') as file:
+                print(f"未完成的檢查點: {name} ({sum(1 for _ in file)} 筆)")
+
+
+def _open_store(config):
+    # 讀取用的子命令不應自動建立空的資料庫與目錄；不存在時以非零結束碼結束
+    from questgames.store import SnapshotStore
+    if not os.path.exists(config['paths']['store']):
+        sys.exit(f"找不到快照資料庫 {config['paths']['store']}")
+    return SnapshotStore(config['paths']['store'])
+
+
+def cmd_query(config, args):
+    store = _open_store(config)
+    rows = store.latest(args.username.lower(), args.game_type, args.limit)
+    store.close()
+    if not rows:
+        print(f"沒有 {args.username} 的紀錄")
+        return
+    for game_type, snapshot_time, rating, rank, win_loss, fetched_time in rows:
+        carried = f" (沿用 {fetched_time})" if fetched_time else ""
+        print(f"{game_type} {snapshot_time}  {rating}  Rank {rank}  {win_loss}{carried}")
+
+
+def cmd_collect(config, args):
+    from questgames.collect import collect
+    if args.leaderboard:
+        config['collect']['leaderboard'] = True
+    collect(config, game_types=args.game_type, backend=args.backend, workers=args.workers)
+
+
+def _load_history(config, game_types, usernames=None, keep_text=(), **parse_options):
+    # 有快照資料庫時直接查詢 (usernames 不為 None 時只讀取這些用戶)，否則讀取 xlsx (只解析新增或修改過的文件)
+    # 逐批轉換為精簡型別，解析後只保留 keep_text 中的文字欄位；回傳 {game_type: DataFrame}
+    import re
+    import pandas as pd
+    from questgames.loading import load_store_compact, report_memory
+    from questgames.parsing import ParseReport, parse_snapshot_columns
+    paths = config['paths']
+    report = ParseReport()
+    frames = {}
+    if os.path.exists(paths['store']):
+        from questgames.store import SnapshotStore
+        store = SnapshotStore(paths['store'])
+        for game_type in game_types:
+            df = load_store_compact(store, game_type, username=usernames, report=report, keep_text=keep_text,
+                                    **parse_options)
+            if not df.empty:
+                frames[game_type] = df
+        store.close()
+    else:
+        from questgames.parse_cache import ParseCache
+
+        def parse_file(file_path):
+            df = pd.read_excel(file_path)
+            df['Date'] = datetime.strptime(re.search(r'\d{12}', file_path).group(), '%Y%m%d%H%M')
+            df = parse_snapshot_columns(df, report=report, source=file_path, **parse_options)
+            return next((game_type for game_type in config['game_types'] if game_type in file_path), None), df
+
+        file_paths = [os.path.join(paths['files'], f) for f in os.listdir(paths['files']) if f.endswith('.xlsx')]
+        cache_name = 'parsed_files.pkl' if parse_options.get('win_loss', True) else 'parsed_files_rating.pkl'
+        cache = ParseCache(os.path.join(paths['cache'], cache_name), parser_version=2, compact=True,
+                           keep_text=keep_text)
+        frames = {game_type: df for game_type, df in cache.update(file_paths, parse_file).items()
+                  if game_type in game_types and not df.empty}
+    report.report(os.path.join(os.path.dirname(paths['store']) or '.', 'parse_errors.csv'))
+    for game_type, df in frames.items():
+        report_memory(game_type, df)
+    return frames
+
+
+def _analytics_ranking(config, game_types):
+    # 有快照資料庫時先以新快照更新用戶統計表，回傳 {game_type: 依最新分數排序並過濾黑名單的用戶}；否則回傳 None
+    if not os.path.exists(config['paths']['store']):
+        return None
+    from questgames.analytics import PlayerAnalytics
+    from questgames.store import SnapshotStore
+    store = SnapshotStore(config['paths']['store'])
+    analytics = PlayerAnalytics(store)
+    analytics.update()
+    ranked = {game_type: analytics.top_usernames(game_type, blacklist=config['blacklist']) for game_type in game_types}
+    store.close()
+    return ranked
+
+
+def cmd_plot(config, args):
+    from questgames.plotting import build_user_index, rank_users
+    from questgames.tiles import TileCache
+    paths, options = config['paths'], config['plot']
+    game_types = args.game_type or list(config['game_types'])
+    # 各樣式需要的欄位：plain 只需當前分數，color 需要最高分，rating 另需比賽次數
+    parse_options = {'plain': {'max_rating': False, 'win_loss': False}, 'color': {'win_loss': False},
+                     'rating': {}}[args.style]
+    top_n = args.top or options['top_n']
+    # 排名由用戶統計表查詢；不輸出儀表板、也不是畫全部用戶時，只讀取前 top_n 名用戶的歷史
+    ranked = _analytics_ranking(config, game_types)
+    needed = None
+    if ranked is not None and not args.dashboard and not args.all:
+        needed = sorted({username for users in ranked.values() for username in users[:top_n]})
+    frames = _load_history(config, game_types, usernames=needed, **parse_options)
+    os.makedirs(paths['png'], exist_ok=True)
+    current_time = datetime.now().strftime("%Y%m%d%H%M")
+    cols = options['cols']
+    tiles = TileCache(args.style, paths['font'], directory=os.path.join(paths['cache'], 'tiles'),
+                      workers=options['render_workers'])
+    for game_type, df in frames.items():
+        user_index = build_user_index(df)
+        if ranked is not None:
+            users = [username for username in ranked[game_type] if username in user_index]
+        else:
+            users = rank_users(user_index, config['blacklist'])
+        if args.dashboard:
+            from questgames.dashboard import build_dashboard
+            path = build_dashboard(user_index, os.path.join(paths['png'], f'{game_type}_dashboard_{current_time}.html'),
+                                   f'{game_type} 分數變化', config['blacklist'])
+            print(f"儀表板已保存至 {path}")
+        if args.all:
+            # 所有用戶依分數排序，每 top_n 位一張圖
+            pages = [(f'{game_type}_rating_changes_{i+1}_{i+top_n}_{current_time}.png', users[i:i+top_n])
+                     for i in range(0, len(users), top_n)]
+        else:
+            pages = [(f'{game_type}_top_{top_n}_rating_changes_{current_time}.png', users[:top_n])]
+        for name, page in pages:
+            path = tiles.compose([(username, user_index[username]) for username in page],
+                                 os.path.join(paths['png'], name), cols=cols)
+            print(f"折線圖已保存至 {path}")
+    if not args.game_type:
+        # 只畫部分棋類型時保留其他棋類型的圖塊
+        tiles.prune()
+    tiles.report()
+
+
+def cmd_stats(config, args):
+    from questgames.analytics import PlayerAnalytics, format_stats
+    from questgames.store import SnapshotStore
+    if not os.path.exists(config['paths']['store']):
+        print(f"尚無快照資料庫 {config['paths']['store']}")
+        return
+    store = SnapshotStore(config['paths']['store'])
+    analytics = PlayerAnalytics(store)
+    processed = analytics.rebuild() if args.rebuild else analytics.update()
+    if any(processed.values()):
+        print(f"已更新統計表: {', '.join(f'{gt} {count} 次快照' for gt, count in processed.items() if count)}")
+    if args.username:
+        for row in analytics.player(args.username, args.game_type):
+            print(f"[{row['game_type']}]")
+            for key, value in row.items():
+                if key not in ('game_type', 'username'):
+                    print(f"  {key:<20} {value if value is not None else '-'}")
+    else:
+        for game_type in [args.game_type] if args.game_type else list(config['game_types']):
+            print(f"[{game_type}] 依 {args.sort} 排序")
+            print(format_stats(analytics.top(game_type, args.top, config['blacklist'], args.sort)))
+    store.close()
+
+
+def cmd_dedupe(config, args):
+    from questgames.dedup import SNAPSHOT_SCOPE, find_duplicates
+    frames = _load_history(config, args.game_type or list(config['game_types']), keep_text=('Win/Loss',),
+                           win_loss=False)
+    to_delete = []
+    for game_type, df in frames.items():
+        df['GameType'] = game_type
+        duplicated, to_drop = find_duplicates(df, scope=SNAPSHOT_SCOPE, min_occurrences=args.min_occurrences)
+        print(f"{game_type}: 重複紀錄 {len(duplicated)} 筆，需刪除 {len(to_drop)} 筆")
+        for date, rows in to_drop.groupby('Date'):
+            print(f"  {date:%Y%m%d%H%M}: {', '.join(rows['Username'])}")
+        to_delete.extend(zip(to_drop['GameType'], to_drop['Date'], to_drop['Username']))
+    if not args.apply or not to_delete:
+        if to_delete:
+            print("加上 --apply 才會從快照資料庫刪除")
+        return
+    from questgames.store import SnapshotStore
+    if not os.path.exists(config['paths']['store']):
+        print("只支援從快照資料庫刪除，xlsx 請使用 check1-1.py")
+        return
+    store = SnapshotStore(config['paths']['store'])
+    print(f"已從 {config['paths']['store']} 刪除 {store.delete(to_delete)} 筆")
+    store.close()
+
+
+def cmd_export(config, args):
+    store = _open_store(config)
+    paths = store.export_xlsx(args.directory, args.game_type, args.start, args.end)
+    store.close()
+    print(f"已匯出 {len(paths)} 個 xlsx 至 {args.directory}")
+
+
+def _median_runtime(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def _loaded_modules(argv):
+    # 在同一行程中執行一次子命令，列出被載入的較慢套件
+    probe = ("import sys, io, contextlib; from questgames.cli import main\n"
+             "with contextlib.redirect_stdout(io.StringIO()):\n"
+             f"    try: main({argv!r})\n"
+             "    except SystemExit: pass\n"
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True).stdout.strip()
+
+
+def cmd_bench(config, args):
+    # 量測子命令從啟動到結束的時間 (含 Python 本身的啟動)，以及是否載入了較慢的套件
+    try:
+        roster = read_roster(config)
+    except OSError:
+        roster = []
+    print(f"Python 本身啟動: {_median_runtime([sys.executable, '-c', 'pass'], args.runs) * 1000:.0f} ms")
+    for argv in (['--help'], ['status'], ['query', roster[0] if roster else 'nobody', '--limit', '5']):
+        if args.config:
+            argv = ['--config', args.config] + argv
+        median = _median_runtime([sys.executable, '-m', 'questgames'] + argv, args.runs)
+        print(f"questgames {' '.join(argv)}: {median * 1000:.0f} ms (中位數，{args.runs} 次)，"
+              f"載入的較慢套件: {_loaded_modules(argv) or '無'}")
+
+
+def cmd_benchmark(config, args):
+    from questgames.benchmarks import run_suite
+    paths = config['paths']
+    params = {
+        'collect_http': {'users': args.users},
+        'collect_selenium': {'chromedriver': paths['chromedriver']},
+        'render': {'years': args.years, 'font_path': paths['font']},
+        'dedup': {'years': args.years, 'users': args.users},
+    }
+    run_suite(args.results or paths['benchmarks'], args.only, params)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='questgames', description='questgames 黑白棋紀錄收集與分析')
+    parser.add_argument('--config', help='設定檔路徑 (預設為環境變數 QUESTGAMES_CONFIG 或 ./questgames.json)')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='以 cProfile 執行子命令，統計結果存到 PATH (可用 snakeviz 開啟) 並列出最耗時的函式')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    config_parser = sub.add_parser('config', help='顯示目前設定')
+    config_parser.add_argument('--init', action='store_true', help='產生預設設定檔')
+    config_parser.set_defaults(func=cmd_config)
+
+    sub.add_parser('status', help='用戶名單、快照資料庫與未完成檢查點的概況').set_defaults(func=cmd_status)
+
+    query_parser = sub.add_parser('query', help='查詢用戶最近的紀錄')
+    query_parser.add_argument('username')
+    query_parser.add_argument('--game-type')
+    query_parser.add_argument('--limit', type=int, default=10)
+    query_parser.set_defaults(func=cmd_query)
+
+    collect_parser = sub.add_parser('collect', help='抓取用戶紀錄並寫入快照資料庫')
+    collect_parser.add_argument('--game-type', action='append', help='只收集指定棋類型，可重複指定')
+    collect_parser.add_argument('--backend', choices=['selenium', 'http'])
+    collect_parser.add_argument('--workers', type=int)
+    collect_parser.add_argument('--leaderboard', action='store_true',
+                                help='先讀取排行榜，只對分數有變化或不在排行榜上的用戶開啟個人頁面')
+    collect_parser.set_defaults(func=cmd_collect)
+
+    dedupe_parser = sub.add_parser('dedupe', help='找出同一快照中不同用戶卻有相同紀錄的資料列')
+    dedupe_parser.add_argument('--game-type', action='append')
+    dedupe_parser.add_argument('--min-occurrences', type=int, default=3)
+    dedupe_parser.add_argument('--apply', action='store_true', help='從快照資料庫刪除')
+    dedupe_parser.set_defaults(func=cmd_dedupe)
+
+    plot_parser = sub.add_parser('plot', help='繪製分數折線圖')
+    plot_parser.add_argument('--style', choices=['rating', 'color', 'plain'], default='rating',
+                             help='rating: 分數與比賽次數 (print-rank-9)；color: 依分數上色 (print-rank-5)；'
+                                  'plain: 基本折線 (print-rank-3)')
+    plot_parser.add_argument('--game-type', action='append')
+    plot_parser.add_argument('--top', type=int, help='每張圖的用戶數')
+    plot_parser.add_argument('--all', action='store_true', help='依排名繪製所有用戶，每 --top 位一張圖')
+    plot_parser.add_argument('--dashboard', action='store_true', help='另外輸出互動式 HTML 儀表板')
+    plot_parser.set_defaults(func=cmd_plot)
+
+    stats_parser = sub.add_parser('stats', help='用戶統計：分數變化、近 1/7 天比賽數與勝率、名次變化 (只以新快照更新)')
+    stats_parser.add_argument('username', nargs='?', help='只顯示此用戶的所有統計欄位')
+    stats_parser.add_argument('--game-type')
+    stats_parser.add_argument('--top', type=int, default=20)
+    stats_parser.add_argument('--sort', default='rating', choices=SORT_COLUMNS)
+    stats_parser.add_argument('--rebuild', action='store_true', help='從全部歷史重新計算')
+    stats_parser.set_defaults(func=cmd_stats)
+
+    export_parser = sub.add_parser('export', help='將快照匯出成 xlsx')
+    export_parser.add_argument('directory')
+    export_parser.add_argument('--game-type')
+    export_parser.add_argument('--start', help='YYYYMMDDHHMM')
+    export_parser.add_argument('--end', help='YYYYMMDDHHMM')
+    export_parser.set_defaults(func=cmd_export)
+
+    bench_parser = sub.add_parser('bench', help='量測 --help、status、query 的啟動時間')
+    bench_parser.add_argument('--runs', type=int, default=5)
+    bench_parser.set_defaults(func=cmd_bench)
+
+    benchmark_parser = sub.add_parser('benchmark', help='以本機替身伺服器與產生的資料測試收集、解析、去重與繪圖的效能')
+    benchmark_parser.add_argument('--only', nargs='+',
+                                  choices=['collect_http', 'collect_selenium', 'parse', 'dedup', 'render'],
+                                  help='只執行指定項目 (預設為 collect_selenium 以外的全部)')
+    benchmark_parser.add_argument('--users', type=int, default=300, help='抓取與去重測試的用戶數')
+    benchmark_parser.add_argument('--years', type=float, default=3, help='去重與繪圖測試的歷史年數')
+    benchmark_parser.add_argument('--results', help='結果 CSV (預設為設定檔的 paths.benchmarks)')
+    benchmark_parser.set_defaults(func=cmd_benchmark)
+    return parser
+
+
+def _profiled(func, path, *args):
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(path)
+        print(f"效能分析結果已儲存至 {path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = load_config(args.config)
+    if args.profile:
+        _profiled(args.func, args.profile, config, args)
+    else:
+        args.func(config, args)
@@ -0,0 +1,133 @@
+# questgames-plus-5.py 的收集流程，改為依設定檔執行，供 python -m questgames collect 使用
+import os
+import pandas as pd
+
+from questgames.analytics import PlayerAnalytics
+from questgames.checkpoint import Checkpoint
+from questgames.config import read_roster
+from questgames.governor import RequestGovernor
+from questgames.leaderboard import Leaderboard, LeaderboardPlanner
+from questgames.metrics import Metrics
+from questgames.polling import ActivityScheduler
+from questgames.pool import ScrapePool
+from questgames.readiness import RecordReadiness
+from questgames.store import SnapshotStore
+
+
+def collect(config, game_types=None, backend=None, workers=None):
+    # game_types: 只收集指定的棋類型 (預設為設定檔中的全部)；回傳 {game_type: 寫入的筆數}
+    paths, options = config['paths'], config['collect']
+    backend = backend or options['backend']
+    game_types = {game_type: url for game_type, url in config['game_types'].items()
+                  if not game_types or game_type in game_types}
+    usernames = read_roster(config)
+
+    metrics = Metrics()
+    with metrics.stage('run'):
+        written = _collect(paths, options, game_types, usernames, backend, workers, metrics)
+    metrics.write_textfile(paths['metrics'])
+    metrics.report()
+    return written
+
+
+def _collect(paths, options, game_types, usernames, backend, workers, metrics):
+    # HTTP 與瀏覽器各自使用一個節流器：HTTP 端點故障 (例如網址改變) 開啟的斷路器不會連帶擋下改用瀏覽器的重試
+    governor = RequestGovernor(rate=options['rate'], max_rate=options['max_rate'])
+    http_governor = RequestGovernor(rate=options['rate'], max_rate=options['max_rate']) if backend == 'http' else None
+    readiness = RecordReadiness()
+    pool = ScrapePool(paths['chromedriver'], num_workers=workers or options['workers'], readiness=readiness,
+                      hash_navigation=True, governor=governor, metrics=metrics,
+                      max_pages=options['driver_max_pages'], max_rss_mb=options['driver_max_rss_mb'])
+    checkpoint = Checkpoint.open(paths['checkpoints'], resume=options['resume'],
+                                 max_age_hours=options['resume_max_age_hours'])
+    current_time = checkpoint.snapshot_time
+    store = SnapshotStore(paths['store'])
+
+    listings = (_read_leaderboards(paths, options, game_types, backend, http_governor or governor)
+                if options['leaderboard'] else {})
+
+    # 本次要抓取的 (棋類型, 用戶)，以及各棋類型沿用舊紀錄的用戶
+    tasks, carried = [], {game_type: [] for game_type in game_types}
+    for game_type in game_types:
+        with metrics.stage('plan', game_type=game_type):
+            polled, remaining = [], usernames
+            if game_type in listings:
+                # 排行榜上的用戶依分數是否變化決定；不在排行榜上的用戶再依活躍程度決定
+                planner = LeaderboardPlanner(store, game_type, max_staleness_hours=options['max_staleness_hours'],
+                                             discover=options['discover'])
+                polled, remaining, complete, carried[game_type] = planner.plan(usernames, listings[game_type])
+                planner.report()
+                for record in complete:
+                    if not checkpoint.is_done(game_type, record['Username']):
+                        checkpoint.add(game_type, record)
+            if options['adaptive_polling']:
+                scheduler = ActivityScheduler(store, game_type, max_staleness_hours=options['max_staleness_hours'])
+                active, idle = scheduler.plan(remaining)
+                scheduler.report()
+                polled, carried[game_type] = polled + active, carried[game_type] + idle
+            else:
+                polled = polled + remaining
+        tasks.extend((game_type, username) for username in polled)
+    tasks = checkpoint.pending(tasks)
+
+    try:
+        if backend == 'http':
+            from questgames.http_backend import HttpRecordBackend
+            HttpRecordBackend(governor=http_governor, metrics=metrics).fetch_tasks(
+                game_types, tasks, fallback=lambda pairs: pool.run_tasks(game_types, pairs, on_record=checkpoint.add),
+                on_record=checkpoint.add)
+        else:
+            pool.run_tasks(game_types, tasks, on_record=checkpoint.add)
+    finally:
+        # 中斷時只關閉本次啟動的瀏覽器
+        pool.close()
+        checkpoint.close()
+
+    written = {}
+    os.makedirs(paths['files'], exist_ok=True)
+    for game_type in game_types:
+        fetched = checkpoint.game_records(game_type)
+        data = fetched + carried[game_type]
+        metrics.count('users_fetched', len(fetched), game_type=game_type)
+        metrics.count('users_carried', len(carried[game_type]), game_type=game_type)
+        if not data:
+            print(f"{game_type} 沒有取得任何資料，略過儲存。")
+            continue
+        with metrics.stage('store', game_type=game_type):
+            written[game_type] = store.append(game_type, current_time, data)
+        print(f"{game_type} 共 {len(data)} 筆數據 (其中沿用 {len(carried[game_type])} 筆) 已寫入 {paths['store']}")
+        if options['save_xlsx']:
+            excel_filename = os.path.join(paths['files'], f"Reversi_{game_type}_data_{current_time}.xlsx")
+            with metrics.stage('xlsx', game_type=game_type):
+                pd.DataFrame(data).sort_values(by='Rank').to_excel(excel_filename, index=False)
+            print(f"數據已儲存至 {excel_filename} 並按排名排序。")
+    # 用戶統計表只以剛寫入的快照更新
+    with metrics.stage('analytics'):
+        PlayerAnalytics(store).update()
+    store.close()
+    checkpoint.finish()
+
+    pool.report()
+    readiness.report()
+    return written
+
+
+def _read_leaderboards(paths, options, game_types, backend, governor):
+    # 回傳 {game_type: 排行榜}；讀不到排行榜的棋類型照常逐一抓取所有用戶
+    leaderboard = Leaderboard(max_pages=options['leaderboard_pages'], governor=governor)
+    listings = {}
+    if backend == 'http':
+        for game_type in game_types:
+            listings[game_type] = leaderboard.fetch_http(game_type)
+    else:
+        from questgames.session import WarmDriver
+        session = WarmDriver(paths['chromedriver'], profile_dir=None)
+        try:
+            driver = session.acquire()
+            for game_type in game_types:
+                listings[game_type] = leaderboard.fetch_selenium(driver, game_type)
+        finally:
+            session.quit()
+    for game_type, listing in listings.items():
+        print(f"{game_type} 排行榜讀取 {leaderboard.page_loads[game_type]} 頁，共 {len(listing)} 位用戶")
+    return {game_type: listing for game_type, listing in listings.items() if listing}
@@ -0,0 +1,99 @@
+# 命令列工具的設定：用戶名單、路徑、棋類型與黑名單集中在一個 JSON 檔，取代各腳本中寫死的清單與路徑
+# 產生預設設定檔: python -m questgames config --init
+import copy
+import json
+import os
+
+CONFIG_ENV = 'QUESTGAMES_CONFIG'
+DEFAULT_CONFIG_PATH = './questgames.json'
+
+DEFAULT_CONFIG = {
+    # 用戶名單檔，每行一位用戶
+    'roster': './othello/user.txt',
+    'paths': {
+        'store': './othello/snapshots.db',
+        'files': './othello/files',
+        'png': './othello/PNG',
+        'cache': './othello/cache',
+        'checkpoints': './othello/checkpoints',
+        'chromedriver': './chromedriver.exe',
+        'font': './font/SimHei.ttf',
+        'metrics': './othello/metrics/questgames.prom',  # 各階段耗時，供 node_exporter textfile collector 讀取
+        'benchmarks': './othello/bench/results.csv',  # python -m questgames benchmark 的歷次結果
+    },
+    # 棋類型和對應的網址
+    'game_types': {
+        '5min': 'http://questgames.net/reversi/#user/',
+        '1min': 'http://questgames.net/reversi1/#user/',
+    },
+    'blacklist': ['skyneko1224', 'taiwanchan', 'formosa_'],
+    'collect': {
+        'backend': 'selenium',  # 'selenium' 或 'http'
+        'workers': 4,
+        # 每個瀏覽器載入超過這個頁數、或其行程合計記憶體 (MB) 超過上限時重新啟動
+        'driver_max_pages': 2000,
+        'driver_max_rss_mb': 1500,
+        'save_xlsx': True,
+        'adaptive_polling': True,
+        'max_staleness_hours': 48,
+        'resume': True,
+        'resume_max_age_hours': 6,  # 超過這個時間的未完成檢查點不再沿用
+        'rate': 2,  # 初始每秒請求數
+        'max_rate': 8,
+        # 先讀取排行榜 (每頁多位用戶)，只對分數有變化、新出現或不在排行榜上的用戶開啟個人頁面
+        'leaderboard': False,
+        'leaderboard_pages': 20,
+        'discover': True,  # 一併收集排行榜上不在名單中的用戶
+    },
+    'plot': {
+        'top_n': 18,
+        'cols': 6,
+        'render_workers': 2,  # 同時重畫圖塊的行程數
+    },
+}
+
+
+def _merge(base, override):
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def config_path(path=None):
+    # 優先順序：參數、環境變數 QUESTGAMES_CONFIG、目前目錄的 questgames.json
+    return path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH
+
+
+def load_config(path=None):
+    # 設定檔只需寫出與預設值不同的項目
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = config_path(path)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            _merge(config, json.load(file))
+    config['source'] = path if os.path.exists(path) else None
+    return config
+
+
+def write_default_config(path=None):
+    path = config_path(path)
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} 已存在")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(DEFAULT_CONFIG, file, ensure_ascii=False, indent=2)
+    return path
+
+
+def read_roster(config):
+    # 用戶名單轉為小寫並移除空白；roster 也可以直接寫成清單
+    roster = config['roster']
+    if isinstance(roster, list):
+        names = roster
+    else:
+        with open(roster, 'r', encoding='utf-8') as file:
+            names = file.readlines()
+    names = [name.strip().replace(' ', '').lower() for name in names]
+    return [name for name in names if name]
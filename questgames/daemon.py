@@ -0,0 +1,106 @@
+# 常駐的收集排程：每種棋類型各自一個工作，有自己的間隔與隨機延遲
+# 同一工作上一次還沒結束時不會再啟動，所有工作同時執行的數量有上限，每次執行都記錄下來
+import csv
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+RUN_HISTORY_FIELDS = ['job', 'scheduled', 'start', 'seconds', 'status', 'fetched', 'failed', 'error']
+
+
+class CollectorJob:
+    def __init__(self, name, func, interval_hours, jitter_seconds=0):
+        self.name = name
+        self.func = func  # 回傳 (抓取成功數, 失敗數) 的函式
+        self.interval = interval_hours * 3600
+        self.jitter = jitter_seconds
+        self.next_slot = None  # 下一次預定時間 (未加隨機延遲)
+        self.next_run = None
+        self.running = threading.Lock()
+
+    def schedule_after(self, slot):
+        # 預定時間依固定間隔推進，不受執行時間影響；落後超過一個間隔時跳過錯過的時段
+        now = time.time()
+        self.next_slot = slot
+        while self.next_slot + self.interval <= now:
+            self.next_slot += self.interval
+        self.next_run = self.next_slot + random.uniform(0, self.jitter)
+
+
+class CollectorDaemon:
+    def __init__(self, max_concurrent=2, history_path='./othello/run_history.csv', poll_seconds=1.0):
+        self.jobs = []
+        self.max_concurrent = max_concurrent  # 所有工作同時執行的上限
+        self.history_path = history_path
+        self.poll_seconds = poll_seconds
+        self.history = []
+        self._history_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_job(self, name, func, interval_hours, jitter_seconds=0, run_now=True):
+        job = CollectorJob(name, func, interval_hours, jitter_seconds)
+        job.schedule_after(time.time() if run_now else time.time() + job.interval)
+        self.jobs.append(job)
+        return job
+
+    def _run(self, job, scheduled):
+        start = time.time()
+        entry = {'job': job.name, 'scheduled': datetime.fromtimestamp(scheduled).strftime('%Y-%m-%d %H:%M:%S'),
+                 'start': datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'),
+                 'status': 'ok', 'fetched': 0, 'failed': 0, 'error': ''}
+        try:
+            entry['fetched'], entry['failed'] = job.func()
+        except Exception as e:
+            entry['status'] = 'error'
+            entry['error'] = f"{type(e).__name__}: {e}"
+            print(f"{job.name} 執行失敗: {entry['error']}")
+        finally:
+            entry['seconds'] = round(time.time() - start, 1)
+            job.running.release()
+            self._record(entry)
+        print(f"{job.name} 完成：{entry['fetched']} 位用戶，失敗 {entry['failed']} 位，耗時 {entry['seconds']} 秒")
+
+    def _record(self, entry):
+        with self._history_lock:
+            self.history.append(entry)
+            if not self.history_path:
+                return
+            os.makedirs(os.path.dirname(self.history_path) or '.', exist_ok=True)
+            new_file = not os.path.exists(self.history_path)
+            with open(self.history_path, 'a', newline='', encoding='utf-8-sig') as file:
+                writer = csv.DictWriter(file, fieldnames=RUN_HISTORY_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(entry)
+
+    def _skipped(self, job, scheduled):
+        # 上一次還在執行，這個時段不再啟動
+        print(f"{job.name} 上一次執行尚未結束，略過這次排程")
+        self._record({'job': job.name, 'scheduled': datetime.fromtimestamp(scheduled).strftime('%Y-%m-%d %H:%M:%S'),
+                      'start': '', 'seconds': 0, 'status': 'skipped', 'fetched': 0, 'failed': 0, 'error': ''})
+
+    def run_forever(self):
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            while not self._stop.is_set():
+                now = time.time()
+                for job in self.jobs:
+                    if job.next_run > now:
+                        continue
+                    scheduled = job.next_run
+                    job.schedule_after(job.next_slot + job.interval)
+                    if job.running.acquire(blocking=False):
+                        # 超過同時執行上限時在執行緒池中排隊
+                        executor.submit(self._run, job, scheduled)
+                    else:
+                        self._skipped(job, scheduled)
+                self._stop.wait(self.poll_seconds)
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self):
+        for job in self.jobs:
+            print(f"{job.name} 下次執行：{datetime.fromtimestamp(job.next_run).strftime('%Y-%m-%d %H:%M:%S')}")
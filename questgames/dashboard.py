@@ -0,0 +1,295 @@
+# 全部用戶的互動式分數儀表板 (單一 HTML 檔，不需網路)
+# 總覽只畫以 LTTB 降採樣後的點，放大時才解碼完整資料並依可見範圍重新降採樣
+# 效能測試: python -m questgames.dashboard --users 300 --years 1
+import argparse
+import base64
+import json
+import os
+import time
+import numpy as np
+
+from questgames.plotting import get_line_color
+
+# 每位用戶總覽圖保留的點數
+OVERVIEW_POINTS = 200
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets：保留折線形狀的降採樣，回傳保留點的索引
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        # 下一個桶的平均點；最後一個桶以終點代替
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _pack(values, dtype):
+    # 整欄轉成小端序的定長整數後以 base64 存放，瀏覽器端用 TypedArray 直接讀取
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def encode_series(user_data, overview_points=OVERVIEW_POINTS):
+    # 時間以分鐘為單位存差值 (Uint32)，分數直接存 Int16
+    minutes = user_data['Date'].to_numpy(dtype='datetime64[m]').astype(np.int64)
+    ratings = user_data['CurrentRating'].to_numpy(dtype=np.int64)
+    keep = lttb(minutes, ratings, overview_points)
+    latest = int(ratings[-1])
+    return {
+        'n': len(minutes),
+        't0': int(minutes[0]),
+        'max': int(user_data['MaxRating'].max()) if 'MaxRating' in user_data else int(ratings.max()),
+        'latest': latest,
+        'color': '#%02x%02x%02x' % tuple(round(c * 255) for c in get_line_color(latest)),
+        'ot': (minutes[keep] - minutes[0]).tolist(),
+        'or': ratings[keep].tolist(),
+        'dt': _pack(np.diff(minutes, prepend=minutes[0]), '<u4'),
+        'r': _pack(ratings, '<i2'),
+    }
+
+
+def build_dashboard(user_index, path, title, blacklist=(), overview_points=OVERVIEW_POINTS):
+    # user_index: {username: 依日期排序的資料} (plotting.build_user_index 的結果)，依最新分數由高到低排列
+    players = []
+    for username, user_data in user_index.items():
+        if username in blacklist or user_data.empty:
+            continue
+        series = encode_series(user_data, overview_points)
+        series['name'] = username
+        players.append(series)
+    players.sort(key=lambda series: series['latest'], reverse=True)
+    # 嵌入 <script> 時避免資料中的 "</" 提早結束標籤
+    data = json.dumps({'title': title, 'players': players}, ensure_ascii=False, separators=(',', ':'))
+    html = _TEMPLATE.replace('__TITLE__', title).replace('__DATA__', data.replace('</', '<\\/'))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(html)
+    os.replace(temp_path, path)
+    return path
+
+
+_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { font-family: sans-serif; margin: 12px; background: #fafafa; }
+#filter { font-size: 14px; padding: 4px; width: 240px; }
+#grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 8px; margin-top: 8px; }
+.card { background: #fff; border: 1px solid #ddd; padding: 4px; cursor: zoom-in; }
+.card h3 { font-size: 13px; margin: 0 0 2px 0; font-weight: normal; }
+.card canvas { width: 100%; height: 120px; display: block; }
+#detail { position: fixed; inset: 4% 4%; background: #fff; border: 1px solid #888; display: none; padding: 8px; }
+#detail canvas { width: 100%; height: calc(100% - 40px); display: block; cursor: grab; }
+#detail .bar { display: flex; justify-content: space-between; font-size: 14px; }
+</style>
+</head>
+<body>
+<h2>__TITLE__</h2>
+<input id="filter" placeholder="搜尋用戶">
+<span id="info"></span>
+<div id="grid"></div>
+<div id="detail"><div class="bar"><span id="detail-title"></span>
+<span>滾輪縮放、拖曳平移、雙擊還原、Esc 關閉</span></div><canvas id="detail-canvas"></canvas></div>
+<script id="data" type="application/json">__DATA__</script>
+<script>
+"use strict";
+const DATA = JSON.parse(document.getElementById('data').textContent);
+
+function unpack(b64, Type) {
+  const bin = atob(b64), bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return new Type(bytes.buffer);
+}
+
+// 完整資料只在放大時才解碼，解碼後保留
+function full(p) {
+  if (!p.full) {
+    const dt = unpack(p.dt, Uint32Array), r = unpack(p.r, Int16Array);
+    const t = new Float64Array(p.n);
+    let acc = 0;
+    for (let i = 0; i < p.n; i++) { acc += dt[i]; t[i] = acc; }
+    p.full = {t: t, r: r};
+  }
+  return p.full;
+}
+
+// 與 dashboard.lttb 相同的降採樣，只處理 [lo, hi) 範圍
+function lttb(t, r, lo, hi, threshold) {
+  const n = hi - lo, out = [];
+  if (threshold >= n || threshold < 3) { for (let i = lo; i < hi; i++) out.push(i); return out; }
+  const every = (n - 2) / (threshold - 2);
+  let a = lo;
+  out.push(a);
+  for (let i = 0; i < threshold - 2; i++) {
+    const start = lo + Math.floor(i * every) + 1, end = lo + Math.floor((i + 1) * every) + 1;
+    const nextEnd = Math.min(lo + Math.floor((i + 2) * every) + 1, hi);
+    let ax = 0, ay = 0, cnt = 0;
+    for (let j = end; j < nextEnd; j++) { ax += t[j]; ay += r[j]; cnt++; }
+    if (cnt) { ax /= cnt; ay /= cnt; } else { ax = t[hi - 1]; ay = r[hi - 1]; }
+    let best = start, bestArea = -1;
+    for (let j = start; j < end; j++) {
+      const area = Math.abs((t[a] - ax) * (r[j] - r[a]) - (t[a] - t[j]) * (ay - r[a]));
+      if (area > bestArea) { bestArea = area; best = j; }
+    }
+    out.push(best);
+    a = best;
+  }
+  out.push(hi - 1);
+  return out;
+}
+
+function lowerBound(t, v) {
+  let lo = 0, hi = t.length;
+  while (lo < hi) { const mid = (lo + hi) >> 1; if (t[mid] < v) lo = mid + 1; else hi = mid; }
+  return lo;
+}
+
+function fmtTime(minutes) {
+  const d = new Date(minutes * 60000);
+  const pad = v => String(v).padStart(2, '0');
+  return `${d.getUTCFullYear()}-${pad(d.getUTCMonth() + 1)}-${pad(d.getUTCDate())} ${pad(d.getUTCHours())}:${pad(d.getUTCMinutes())}`;
+}
+
+function setupCanvas(canvas) {
+  const ratio = window.devicePixelRatio || 1, w = canvas.clientWidth, h = canvas.clientHeight;
+  canvas.width = w * ratio; canvas.height = h * ratio;
+  const ctx = canvas.getContext('2d');
+  ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+  ctx.clearRect(0, 0, w, h);
+  return [ctx, w, h];
+}
+
+// xs/ys 為相對 t0 的分鐘數與分數；有 xLabel 時畫座標刻度
+function drawLine(canvas, xs, ys, color, x0, x1, xLabel) {
+  const axes = Boolean(xLabel);
+  const [ctx, w, h] = setupCanvas(canvas);
+  const left = axes ? 48 : 4, bottom = axes ? 20 : 4, top = 4, right = 4;
+  let y0 = Infinity, y1 = -Infinity;
+  for (const y of ys) { if (y < y0) y0 = y; if (y > y1) y1 = y; }
+  if (y0 === y1) { y0 -= 10; y1 += 10; }
+  if (x0 === x1) x1 = x0 + 1;
+  const sx = x => left + (x - x0) / (x1 - x0) * (w - left - right);
+  const sy = y => top + (y1 - y) / (y1 - y0) * (h - top - bottom);
+  ctx.font = '11px sans-serif'; ctx.fillStyle = '#555'; ctx.strokeStyle = '#eee';
+  for (let k = 0; k <= 4; k++) {
+    const y = y0 + (y1 - y0) * k / 4;
+    ctx.beginPath(); ctx.moveTo(left, sy(y)); ctx.lineTo(w - right, sy(y)); ctx.stroke();
+    if (axes) ctx.fillText(String(Math.round(y)), 2, sy(y) + 4);
+  }
+  if (axes) {
+    for (let k = 0; k < 4; k++) ctx.fillText(xLabel(x0 + (x1 - x0) * k / 4), sx(x0 + (x1 - x0) * k / 4), h - 6);
+  }
+  ctx.strokeStyle = color; ctx.lineWidth = 1.5; ctx.beginPath();
+  for (let i = 0; i < xs.length; i++) { const px = sx(xs[i]), py = sy(ys[i]); i ? ctx.lineTo(px, py) : ctx.moveTo(px, py); }
+  ctx.stroke();
+  return {sx: sx, left: left, right: right, w: w};
+}
+
+const grid = document.getElementById('grid'), cards = [];
+for (const p of DATA.players) {
+  const card = document.createElement('div');
+  card.className = 'card';
+  card.innerHTML = `<h3></h3><canvas></canvas>`;
+  card.querySelector('h3').textContent = `${p.name}  ${p.latest} (MAX: ${p.max})`;
+  card.addEventListener('click', () => openDetail(p));
+  grid.appendChild(card);
+  cards.push([p, card]);
+}
+
+// 只畫畫面上看得到的卡片
+const observer = new IntersectionObserver(entries => {
+  for (const entry of entries) {
+    if (!entry.isIntersecting || entry.target.drawn) continue;
+    const p = entry.target.player;
+    drawLine(entry.target.querySelector('canvas'), p.ot, p.or, p.color, p.ot[0], p.ot[p.ot.length - 1], null);
+    entry.target.drawn = true;
+  }
+});
+for (const [p, card] of cards) { card.player = p; observer.observe(card); }
+
+document.getElementById('info').textContent = `共 ${DATA.players.length} 位用戶`;
+document.getElementById('filter').addEventListener('input', e => {
+  const q = e.target.value.toLowerCase();
+  for (const [p, card] of cards) card.style.display = p.name.toLowerCase().includes(q) ? '' : 'none';
+});
+
+const detail = document.getElementById('detail'), detailCanvas = document.getElementById('detail-canvas');
+let current = null, view = null, layout = null;
+
+function renderDetail() {
+  const p = current, f = full(p);
+  const lo = Math.max(0, lowerBound(f.t, view[0]) - 1), hi = Math.min(p.n, lowerBound(f.t, view[1]) + 1);
+  // 依可見範圍與畫布寬度重新降採樣，放大後自然顯示完整解析度
+  const keep = lttb(f.t, f.r, lo, hi, Math.max(3, detailCanvas.clientWidth));
+  const xs = keep.map(i => f.t[i]), ys = keep.map(i => f.r[i]);
+  layout = drawLine(detailCanvas, xs, ys, p.color, view[0], view[1], x => fmtTime(p.t0 + x).slice(5));
+  document.getElementById('detail-title').textContent =
+    `${p.name} (MAX: ${p.max})  ${fmtTime(p.t0 + view[0])} ~ ${fmtTime(p.t0 + view[1])}  顯示 ${keep.length} / ${p.n} 點`;
+}
+
+function openDetail(p) {
+  current = p;
+  const f = full(p);
+  view = [f.t[0], f.t[p.n - 1]];
+  detail.style.display = 'block';
+  renderDetail();
+}
+
+detailCanvas.addEventListener('wheel', e => {
+  e.preventDefault();
+  const rect = detailCanvas.getBoundingClientRect();
+  const frac = Math.min(1, Math.max(0, (e.clientX - rect.left - layout.left) / (layout.w - layout.left - layout.right)));
+  const at = view[0] + frac * (view[1] - view[0]), scale = e.deltaY < 0 ? 0.8 : 1.25;
+  view = [at - (at - view[0]) * scale, at + (view[1] - at) * scale];
+  renderDetail();
+}, {passive: false});
+
+let drag = null;
+detailCanvas.addEventListener('mousedown', e => { drag = [e.clientX, view.slice()]; });
+window.addEventListener('mouseup', () => { drag = null; });
+window.addEventListener('mousemove', e => {
+  if (!drag) return;
+  const span = drag[1][1] - drag[1][0], shift = (drag[0] - e.clientX) / (layout.w - layout.left - layout.right) * span;
+  view = [drag[1][0] + shift, drag[1][1] + shift];
+  renderDetail();
+});
+detailCanvas.addEventListener('dblclick', () => openDetail(current));
+window.addEventListener('keydown', e => { if (e.key === 'Escape') detail.style.display = 'none'; });
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == '__main__':
+    from questgames.dedup import make_history
+    from questgames.plotting import build_user_index
+
+    parser = argparse.ArgumentParser(description='儀表板輸出的效能測試')
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--output', default='./othello/PNG/dashboard_benchmark.html')
+    args = parser.parse_args()
+    history = make_history(args.years, args.users)
+    history = history[history['GameType'] == '5min']
+    start = time.perf_counter()
+    user_index = build_user_index(history)
+    path = build_dashboard(user_index, args.output, '5min 分數變化 (測試資料)')
+    print(f"{len(user_index)} 位用戶、{len(history)} 個資料點：輸出 {path} "
+          f"({os.path.getsize(path) / 1e6:.1f} MB)，耗時 {time.perf_counter() - start:.2f} 秒")
@@ -0,0 +1,74 @@
+# 找出同一次快照中不同用戶卻有相同紀錄的資料列 (頁面尚未更新就被讀取)，一次分組處理全部歷史
+# 重複的判斷範圍是「快照」而不是「用戶」：頁面沒更新時讀到的是上一位用戶的紀錄，會出現在同一次快照的其他用戶上；
+# 同一位用戶在不同快照中紀錄相同只代表這段時間沒有比賽，是正常資料，不列為重複
+# 效能測試: python -m questgames.dedup --years 3 --users 300
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+# 判斷重複的欄位
+DEDUP_KEYS = ['CurrentRating', 'MaxRating', 'Win/Loss']
+# 同一次快照：棋類型 + 快照時間
+SNAPSHOT_SCOPE = ['GameType', 'Date']
+
+
+def find_duplicates(df, scope=SNAPSHOT_SCOPE, keys=DEDUP_KEYS, min_rating=1000, min_occurrences=3):
+    # 回傳 (duplicated, to_drop)：
+    #   duplicated 為同一快照中紀錄重複的所有資料列
+    #   to_drop 為出現次數少於 min_occurrences 的重複資料列 (與原本 check1-1.py 的規則相同)
+    # 兩者都保留 df 原本的索引，可直接用來 drop
+    eligible = df[df['CurrentRating'] >= min_rating]
+    sizes = eligible.groupby(list(scope) + list(keys), sort=False, observed=True, dropna=False)[keys[0]] \
+        .transform('size')
+    duplicated = eligible[sizes.to_numpy() >= 2]
+    to_drop = eligible[(sizes.to_numpy() >= 2) & (sizes.to_numpy() < min_occurrences)]
+    return duplicated, to_drop
+
+
+def legacy_drop(df, keys=DEDUP_KEYS, min_occurrences=3):
+    # 原本 check1-1.py 對單一文件逐筆處理的寫法，僅供比較
+    duplicated = df[df.duplicated(subset=keys, keep=False)]
+    for idx in duplicated.index:
+        mask = np.ones(len(df), dtype=bool)
+        for key in keys:
+            mask &= (df[key] == df.loc[idx, key]).to_numpy()
+        if mask.sum() < min_occurrences:
+            df = df.drop(idx)
+    return df
+
+
+def make_history(years, users, seed=0):
+    # 產生每 6 小時一次、兩種棋類型的模擬歷史，並放入少量重複紀錄
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=int(years * 365 * 4), freq='6h')
+    rows = len(dates) * users
+    frames = []
+    for game_type in ('5min', '1min'):
+        current = rng.integers(800, 2300, rows)
+        wins = rng.integers(0, 5000, rows)
+        frames.append(pd.DataFrame({
+            'GameType': game_type,
+            'Date': np.repeat(dates, users),
+            'Username': np.tile([f"user{i}" for i in range(users)], len(dates)),
+            'CurrentRating': current,
+            'MaxRating': current + 100,
+            'Win/Loss': pd.Series(wins).astype(str) + '-10-0 (50.0)',
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    # 約 0.1% 的資料列複製前一位用戶的紀錄
+    stale = rng.choice(np.arange(1, len(df)), size=len(df) // 1000, replace=False)
+    df.loc[stale, DEDUP_KEYS] = df.loc[stale - 1, DEDUP_KEYS].to_numpy()
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='重複紀錄偵測的效能測試')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--users', type=int, default=300)
+    args = parser.parse_args()
+    history = make_history(args.years, args.users)
+    start = time.perf_counter()
+    duplicated, to_drop = find_duplicates(history)
+    print(f"{len(history)} 列 ({history['Date'].nunique()} 次快照)：找到重複 {len(duplicated)} 列，"
+          f"需刪除 {len(to_drop)} 列，耗時 {time.perf_counter() - start:.2f} 秒")
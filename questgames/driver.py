@@ -0,0 +1,21 @@
+# 建立 Selenium 的 Chrome 驅動
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+
+def build_chrome_options():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # 啟用無頭模式
+    chrome_options.add_argument("--disable-gpu")  # 禁用GPU硬體加速
+    chrome_options.add_argument("--log-level=3")  # 只記錄嚴重錯誤信息
+    chrome_options.add_argument("--disable-dev-shm-usage")  # 避免大量記憶體佔用
+    chrome_options.add_argument("--no-sandbox")  # 解決DevToolsActivePort文件不存在的錯誤
+    return chrome_options
+
+
+def create_driver(executable_path='./chromedriver.exe', chrome_options=None):
+    # 回傳 (driver, service)，呼叫端負責 quit / stop
+    service = Service(executable_path=executable_path)
+    driver = webdriver.Chrome(service=service, options=chrome_options or build_chrome_options())
+    return driver, service
@@ -0,0 +1,95 @@
+# 一次取得 li.record 紀錄表的所有欄位，取代逐欄 find_element 的多次往返
+from html.parser import HTMLParser
+
+# 一次 execute_script 回傳 {欄位名稱: 內容}，找不到紀錄表時回傳 null
+_RECORD_SCRIPT = """
+var record = document.querySelector('li.record');
+if (!record) { return null; }
+var fields = {};
+record.querySelectorAll('table tr').forEach(function (tr) {
+    var th = tr.querySelector('th'), td = tr.querySelector('td');
+    if (th && td) { fields[th.textContent.trim()] = td.innerText.trim(); }
+});
+return fields;
+"""
+
+# 紀錄表欄位名稱對應到輸出欄位
+RECORD_COLUMNS = {
+    'Rating': 'Rating',
+    'Rank': 'Rank',
+    'Win loss': 'Win/Loss',
+    'Streak': 'Streak',
+}
+
+
+def extract_record_fields(driver):
+    fields = driver.execute_script(_RECORD_SCRIPT)
+    if fields is None:
+        raise LookupError("找不到 li.record 紀錄表")
+    return fields
+
+
+class _RecordTableParser(HTMLParser):
+    # 從整頁 HTML 中找出 li.record 底下表格每一列的 th/td 文字
+    def __init__(self):
+        super().__init__()
+        self.fields = None
+        self._record_depth = 0  # 位於 li.record 內時為其巢狀 li 深度
+        self._cell = None  # 'th' 或 'td'
+        self._th = []
+        self._td = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'li':
+            if self._record_depth:
+                self._record_depth += 1
+            elif self.fields is None and 'record' in (dict(attrs).get('class') or '').split():
+                self._record_depth = 1
+                self.fields = {}
+        elif not self._record_depth:
+            return
+        elif tag == 'tr':
+            self._th, self._td = [], []
+        elif tag in ('th', 'td'):
+            self._cell = tag
+        elif tag == 'br' and self._cell == 'td':
+            self._td.append('\n')
+
+    def handle_endtag(self, tag):
+        if not self._record_depth:
+            return
+        if tag == 'li':
+            self._record_depth -= 1
+        elif tag in ('th', 'td'):
+            self._cell = None
+        elif tag == 'tr' and self._th:
+            self.fields[' '.join(''.join(self._th).split())] = ''.join(self._td).strip()
+
+    def handle_data(self, data):
+        if self._cell == 'th':
+            self._th.append(data)
+        elif self._cell == 'td':
+            self._td.append(data)
+
+
+def parse_record_html(html):
+    # 解析一次 page_source 快照，回傳 {欄位名稱: 內容}
+    parser = _RecordTableParser()
+    parser.feed(html)
+    parser.close()
+    if parser.fields is None:
+        raise LookupError("找不到 li.record 紀錄表")
+    return parser.fields
+
+
+def fields_to_row(username, fields, extra_fields=()):
+    # 轉成與原本相同的 Username/Rating/Rank/Win/Loss/Streak 資料列，extra_fields 會以原欄位名稱一併輸出
+    row = {'Username': username}
+    for field, column in RECORD_COLUMNS.items():
+        if not fields.get(field):
+            raise KeyError(f"紀錄表缺少 {field} 欄位")
+        row[column] = fields[field]
+    row['Rank'] = int(row['Rank'].split()[0])  # 假設排名是文本的第一部分且為數字
+    for field in extra_fields:
+        row[field] = fields.get(field)
+    return row
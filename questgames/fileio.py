@@ -0,0 +1,70 @@
+# 檔案寫入與已驗證文件清單
+import hashlib
+import json
+import os
+import tempfile
+
+
+def atomic_to_excel(df, path, **kwargs):
+    # 先寫入同目錄的暫存檔再改名，中斷時原文件不會損壞
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.xlsx', dir=directory)
+    os.close(fd)
+    try:
+        df.to_excel(temp_path, index=False, **kwargs)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    # 記錄已驗證文件的內容雜湊；大小與修改時間沒變時不必重新計算雜湊
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # {文件路徑: {'sha256', 'size', 'mtime_ns'}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"清單無法讀取，將重新檢查所有文件：{e}")
+
+    def is_current(self, file_path):
+        entry = self.entries.get(os.path.normpath(file_path))
+        if entry is None:
+            return False
+        stat = os.stat(file_path)
+        if (stat.st_size, stat.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+            return True
+        if stat.st_size != entry['size'] or file_digest(file_path) != entry['sha256']:
+            return False
+        # 內容相同但修改時間變了 (例如複製過)，更新清單
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def mark(self, file_path):
+        stat = os.stat(file_path)
+        self.entries[os.path.normpath(file_path)] = {
+            'sha256': file_digest(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
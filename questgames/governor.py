@@ -0,0 +1,169 @@
+# 所有 worker 共用的請求節流：令牌桶限制每秒請求數，出錯或回應變慢時降速，連續失敗時開啟斷路器
+# 以替身伺服器測試: python -m questgames.governor --server-limit 20 --error-rate 0.05
+import argparse
+import asyncio
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    # 斷路器開啟中，暫停送出請求
+    pass
+
+
+class RequestGovernor:
+    def __init__(self, rate=4.0, burst=4, min_rate=0.5, max_rate=20.0, increase=0.1, decrease=0.5,
+                 slow_seconds=3.0, failure_threshold=5, cooldown=30.0, max_cooldown=600.0):
+        self.rate = rate  # 目前每秒允許的請求數
+        self.burst = burst  # 令牌桶容量，允許短時間內的突發請求
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase  # 每次正常回應後增加的速率 (每秒請求數)
+        self.decrease = decrease  # 被限流 (429) 或回應太慢時速率乘上的比例，每秒最多降速一次
+        self.slow_seconds = slow_seconds  # 回應超過此秒數視為網站負載過高
+        self.failure_threshold = failure_threshold  # 連續失敗幾次後開啟斷路器
+        self.cooldown = cooldown  # 斷路器開啟後多久再試一次
+        self.max_cooldown = max_cooldown
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.consecutive_failures = 0
+        self.last_decrease = 0.0
+        self.state = 'closed'  # closed: 正常；open: 暫停請求；half_open: 冷卻結束後只放行一個試探請求
+        self.open_until = 0.0
+        self.current_cooldown = cooldown
+        self.probing = False
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'slow': 0, 'client_errors': 0, 'throttled_seconds': 0.0,
+                      'trips': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _reserve(self):
+        # 預留一個令牌，回傳需要等待的秒數；斷路器開啟時丟出 CircuitOpenError
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open':
+                if now < self.open_until:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(f"斷路器開啟中，{self.open_until - now:.0f} 秒後再試")
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self.probing:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError("斷路器試探中")
+                self.probing = True
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.stats['requests'] += 1
+            self.stats['throttled_seconds'] += wait
+            return wait
+
+    def acquire(self):
+        # 供 Selenium worker 在每次載入頁面前呼叫
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        # 供 aiohttp 協程在每次請求前呼叫
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, ok, latency=None, status=None):
+        # 回報請求結果：被限流 (429) 或回應太慢時降速；5xx、429 與逾時 (沒有 status 的失敗) 連續累積時開啟斷路器
+        # 其他 4xx (例如網址設定錯誤造成的 404) 代表網站仍正常回應，不列入斷路器；內容無法解碼也不應在此回報失敗
+        with self._lock:
+            if self.state == 'open':
+                return  # 斷路器開啟前送出的請求，結果不再列入計算
+            now = time.monotonic()
+            failed = status >= 500 if status is not None else not ok
+            if status is not None and 400 <= status < 500 and status != 429:
+                self.stats['client_errors'] += 1
+            if status == 429 or (latency is not None and latency > self.slow_seconds):
+                self.stats['slow' if status != 429 else 'errors'] += 1
+                self._slow_down(now)
+            elif not failed:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            if not failed and status != 429:
+                if ok:
+                    self.stats['ok'] += 1
+                self.consecutive_failures = 0
+                if self.state == 'half_open':
+                    # 試探成功，恢復正常並重設冷卻時間
+                    self.state = 'closed'
+                    self.probing = False
+                    self.current_cooldown = self.cooldown
+                return
+            if failed:
+                self.stats['errors'] += 1
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                self._trip(now)
+
+    def _slow_down(self, now):
+        # 同一波同時送出的請求常會一起被限流，每秒最多降速一次
+        if now - self.last_decrease < 1.0:
+            return
+        self.last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = min(self.tokens, 0.0)
+
+    def _trip(self, now):
+        if self.state == 'half_open':
+            # 試探失敗，冷卻時間加倍
+            self.current_cooldown = min(self.max_cooldown, self.current_cooldown * 2)
+        self.state = 'open'
+        self.open_until = now + self.current_cooldown
+        self.probing = False
+        self.consecutive_failures = 0
+        self.stats['trips'] += 1
+        print(f"連續失敗，暫停請求 {self.current_cooldown:.0f} 秒")
+
+    def is_open(self):
+        with self._lock:
+            return self.state == 'open' and time.monotonic() < self.open_until
+
+    def report(self):
+        stats = self.stats
+        print(f"請求 {stats['requests']} 次 (成功 {stats['ok']}，失敗 {stats['errors']}，過慢 {stats['slow']}，"
+              f"4xx {stats['client_errors']})，"
+              f"節流等待 {stats['throttled_seconds']:.1f} 秒，斷路器開啟 {stats['trips']} 次，"
+              f"因斷路器略過 {stats['rejected']} 次，目前速率 {self.rate:.1f} 次/秒")
+
+
+def _demo():
+    # 以 python -m 執行時本模組為 __main__，需使用 questgames.governor 中的類別，
+    # http_backend 才能攔截到同一個 CircuitOpenError
+    from questgames import governor as module
+    from questgames.http_backend import HttpRecordBackend
+    from questgames.standin import standin_endpoints, start_standin
+
+    parser = argparse.ArgumentParser(description='以替身伺服器測試請求節流與斷路器')
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=4.0, help='初始每秒請求數')
+    parser.add_argument('--max-rate', type=float, default=50.0)
+    parser.add_argument('--server-limit', type=float, default=20.0, help='替身伺服器每秒最多處理的請求數，超過回傳 429')
+    parser.add_argument('--latency', type=float, default=0.05, help='替身伺服器每次回應的延遲秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='替身伺服器回傳 500 的比例')
+    parser.add_argument('--outage', type=float, default=0.0, help='替身伺服器啟動後完全故障的秒數')
+    args = parser.parse_args()
+
+    server, base_url = start_standin(latency=args.latency, error_rate=args.error_rate,
+                                     rate_limit=args.server_limit, outage=args.outage)
+    governor = module.RequestGovernor(rate=args.rate, max_rate=args.max_rate, cooldown=2.0)
+    backend = HttpRecordBackend(standin_endpoints(base_url), concurrency=16, governor=governor)
+    start = time.perf_counter()
+    results = backend.fetch({"5min": None}, [f"user{i}" for i in range(args.users)])
+    elapsed = time.perf_counter() - start
+    state = server.state
+    print(f"{len(results['5min'])}/{args.users} 位用戶，耗時 {elapsed:.1f} 秒 ({args.users / elapsed:.1f} 用戶/秒)，"
+          f"替身伺服器收到 {state['requests']} 次請求，其中 {state['throttled']} 次回傳 429")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    _demo()
@@ -0,0 +1,198 @@
+# 不開瀏覽器，直接以 HTTP 取得頁面自己載入的用戶資料
+import asyncio
+import json
+import re
+import time
+import aiohttp
+
+from questgames.extract import fields_to_row, parse_record_html
+from questgames.governor import CircuitOpenError
+
+# 各棋類型的用戶資料網址，#user/{username} 頁面由前端依這份資料繪製
+# 若網站改版，請依瀏覽器開發者工具 Network 分頁中看到的請求修改
+RECORD_ENDPOINTS = {
+    "5min": "http://questgames.net/reversi/user/{username}",
+    "1min": "http://questgames.net/reversi1/user/{username}"
+}
+
+# JSON 欄位名稱 (小寫、去除空白與底線) 對應到輸出欄位
+_JSON_KEYS = {
+    'Rating': ('rating', 'currentrating'),
+    'MaxRating': ('max', 'maxrating', 'ratingmax'),
+    'Rank': ('rank', 'ranking'),
+    'Win/Loss': ('winloss', 'record'),
+    'Wins': ('win', 'wins'),
+    'Losses': ('loss', 'losses'),
+    'Draws': ('draw', 'draws'),
+    'Streak': ('streak',),
+}
+
+
+def _normalize_keys(payload):
+    # 有些回應會再包一層 user/data
+    for key in ('user', 'data', 'record'):
+        if isinstance(payload.get(key), dict):
+            payload = payload[key]
+            break
+    return {re.sub(r'[\s_/-]', '', str(k)).lower(): v for k, v in payload.items()}
+
+
+def _pick(fields, name):
+    # 字串去除前後空白，空字串 (含只有空白) 視為沒有這個欄位
+    for key in _JSON_KEYS[name]:
+        value = fields.get(key)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def decode_json_record(payload, username):
+    fields = _normalize_keys(payload)
+    rating = _pick(fields, 'Rating')
+    rank = _pick(fields, 'Rank')
+    streak = _pick(fields, 'Streak')
+    if rating is None or rank is None or streak is None:
+        raise ValueError(f"資料缺少 Rating/Rank/Streak 欄位: {sorted(fields)}")
+
+    # Rating 欄位保持與頁面相同的 "1234 max: 1500" 格式
+    rating = str(rating).strip()
+    max_rating = _pick(fields, 'MaxRating')
+    if 'max' not in rating and max_rating is not None:
+        rating = f"{rating} max: {max_rating}"
+
+    # Win/Loss 欄位保持與頁面相同的 "w-l-d (rate)" 格式
+    win_loss = _pick(fields, 'Win/Loss')
+    if win_loss is None:
+        wins, losses, draws = (_pick(fields, name) for name in ('Wins', 'Losses', 'Draws'))
+        if wins is None or losses is None:
+            raise ValueError("資料缺少 Win/Loss 欄位")
+        wins, losses, draws = int(wins), int(losses), int(draws or 0)
+        total = wins + losses + draws
+        win_rate = wins * 100 / total if total else 0.0
+        win_loss = f"{wins}-{losses}-{draws} ({win_rate:.1f})"
+
+    return {
+        'Username': username,
+        'Rating': rating,
+        'Rank': int(str(rank).split()[0]),
+        'Win/Loss': str(win_loss).strip(),
+        'Streak': str(streak).strip()
+    }
+
+
+def decode_record(body, username):
+    # 無法解碼時丟出 ValueError，由呼叫端改用 Selenium
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        # 回應若是已繪製好的 HTML，直接解析 li.record 紀錄表
+        try:
+            return fields_to_row(username, parse_record_html(body))
+        except (LookupError, ValueError):
+            raise ValueError(f"{username} 的回應不是 JSON 也沒有紀錄表")
+    if not isinstance(payload, dict):
+        raise ValueError(f"{username} 的回應格式不正確")
+    try:
+        return decode_json_record(payload, username)
+    except (TypeError, LookupError) as e:
+        # 欄位型別不符 (例如 wins 為陣列) 時同樣視為無法解碼，只影響這位用戶，不中斷整批請求
+        raise ValueError(f"{username} 的紀錄格式不正確: {type(e).__name__}: {e}") from e
+
+
+class HttpRecordBackend:
+    def __init__(self, endpoints=RECORD_ENDPOINTS, concurrency=8, timeout=10, max_attempts=2, governor=None,
+                 metrics=None):
+        self.endpoints = endpoints
+        self.metrics = metrics  # 記錄每次請求的耗時與失敗類型
+        self.governor = governor  # 共用的 RequestGovernor，控制每秒請求數並在網站故障時停止送出
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.failed = []  # [(game_type, username, 原因), ...]
+
+    async def _fetch_one(self, session, semaphore, game_type, username, on_record=None):
+        url = self.endpoints[game_type].format(username=username)
+        reason = None
+        governor, metrics = self.governor, self.metrics
+        for _ in range(self.max_attempts):
+            async with semaphore:
+                try:
+                    if governor is not None:
+                        await governor.acquire_async()
+                    start = time.perf_counter()
+                    async with session.get(url) as response:
+                        body = await response.text()
+                        if governor is not None:
+                            governor.record(response.status == 200, time.perf_counter() - start, response.status)
+                        if metrics is not None:
+                            metrics.observe('http', time.perf_counter() - start, game_type=game_type)
+                        if response.status != 200:
+                            reason = f"HTTP {response.status}"
+                            if metrics is not None:
+                                metrics.failure('http', f"HTTP{response.status}", game_type=game_type)
+                            continue
+                    record = decode_record(body, username)
+                    if on_record is not None:
+                        on_record(game_type, record)
+                    return record
+                except CircuitOpenError as e:
+                    # 網站持續故障，不再重試
+                    reason = str(e)
+                    if metrics is not None:
+                        metrics.failure('http', e, game_type=game_type)
+                    break
+                except ValueError as e:
+                    # 內容無法解碼，重試也不會改變
+                    reason = str(e)
+                    if metrics is not None:
+                        metrics.failure('http', e, game_type=game_type)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if governor is not None:
+                        governor.record(False)
+                    if metrics is not None:
+                        metrics.failure('http', e, game_type=game_type)
+                    reason = f"{type(e).__name__}: {e}"
+        self.failed.append((game_type, username, reason))
+        return None
+
+    async def fetch_all(self, tasks, on_record=None):
+        # tasks: [(game_type, username), ...]，回傳與 tasks 相同順序的紀錄 (失敗為 None)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 連線保持開啟並重複使用，避免每位用戶都重新建立 TCP 連線
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(self._fetch_one(session, semaphore, game_type, username, on_record)
+                                          for game_type, username in tasks))
+
+    def fetch(self, game_types, usernames, fallback=None, on_record=None):
+        # 回傳 {game_type: [record, ...]}；解碼失敗的用戶交給 fallback(tasks) 以 Selenium 抓取
+        return self.fetch_tasks(game_types, [(game_type, username) for game_type in game_types
+                                             for username in usernames], fallback, on_record)
+
+    def fetch_tasks(self, game_types, tasks, fallback=None, on_record=None):
+        # tasks: [(game_type, username), ...]；on_record(game_type, record) 在每筆成功時立即呼叫
+        self.failed = []
+        start = time.perf_counter()
+        records = asyncio.run(self.fetch_all(tasks, on_record))
+        print(f"HTTP 取得 {sum(r is not None for r in records)}/{len(tasks)} 筆資料，"
+              f"耗時 {time.perf_counter() - start:.1f} 秒")
+        if self.governor is not None:
+            self.governor.report()
+
+        results = {game_type: [] for game_type in game_types}
+        for (game_type, _), record in zip(tasks, records):
+            if record is not None:
+                results[game_type].append(record)
+
+        if self.failed:
+            for game_type, username, reason in self.failed:
+                print(f"HTTP 無法取得 {game_type} {username} 的資料: {reason}")
+            if fallback is not None:
+                retry = [(game_type, username) for game_type, username, _ in self.failed]
+                for game_type, records in fallback(retry).items():
+                    results[game_type].extend(records)
+        return results
@@ -0,0 +1,261 @@
+# 從各棋類型的排行榜一次取得整頁用戶的分數與名次，取代每位用戶各載入一次個人頁面
+# 排行榜沒有的欄位 (最高分、Win/Loss、Streak) 只對分數有變化、新出現或不在排行榜上的用戶開啟個人頁面；
+# 分數沒變的用戶沿用上次抓到的紀錄並更新名次。排行榜上不在名單中的用戶也會一併收集 (自動發現新用戶)
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+import aiohttp
+
+from questgames.governor import CircuitOpenError
+from questgames.store import FETCHED_TIME
+
+# 各棋類型排行榜第 {page} 頁 (從 1 開始) 的資料與頁面網址
+# 若網站改版，請依瀏覽器開發者工具 Network 分頁中看到的請求修改
+LEADERBOARD_ENDPOINTS = {
+    "5min": "http://questgames.net/reversi/ranking/{page}",
+    "1min": "http://questgames.net/reversi1/ranking/{page}"
+}
+LEADERBOARD_PAGES = {
+    "5min": "http://questgames.net/reversi/#ranking/{page}",
+    "1min": "http://questgames.net/reversi1/#ranking/{page}"
+}
+
+# 排行榜欄位名稱 (小寫、去除空白與符號) 對應到紀錄欄位
+_LISTING_KEYS = {
+    'Username': ('username', 'user', 'name', 'player'),
+    'Rating': ('rating', 'currentrating'),
+    'Rank': ('rank', 'ranking', ''),  # '' 為表頭只有 '#' 的欄位
+    'Win/Loss': ('winloss', 'record'),
+    'Streak': ('streak',),
+}
+
+# 個人頁面才有的欄位；排行榜都有時不需要開啟個人頁面
+_RECORD_FIELDS = ('Rating', 'Rank', 'Win/Loss', 'Streak')
+
+_CURRENT_RATING = re.compile(r'^\s*(\d+)')
+
+
+def _normalize(row):
+    return {re.sub(r'[\s_/#.-]', '', str(key)).lower(): value for key, value in row.items()}
+
+
+def listing_from_rows(rows):
+    # rows: [{欄位名稱: 內容}, ...]，回傳 {username: {'Username', 'Rating', 'Rank', ...}}；無法辨識的資料列略過
+    listing = {}
+    for row in rows:
+        fields = _normalize(row)
+        entry = {}
+        for column, keys in _LISTING_KEYS.items():
+            value = next((fields[key] for key in keys if fields.get(key) not in (None, '')), None)
+            if value is not None:
+                entry[column] = str(value).strip()
+        try:
+            entry['Username'] = entry['Username'].replace(' ', '').lower()
+            entry['Rank'] = int(entry['Rank'].split()[0])
+            if not _CURRENT_RATING.match(entry['Rating']):
+                continue
+        except (KeyError, ValueError, IndexError):
+            continue
+        listing[entry['Username']] = entry
+    return listing
+
+
+class _TableParser(HTMLParser):
+    # 將頁面中每個表格轉成 [{表頭: 內容}, ...]
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        self._headers = None
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._headers = []
+            self.tables.append([])
+        elif self._headers is None:
+            return
+        elif tag == 'tr':
+            self._row = []
+        elif tag in ('th', 'td') and self._row is not None:
+            self._cell = [tag, []]
+
+    def handle_endtag(self, tag):
+        if self._headers is None:
+            return
+        if tag in ('th', 'td') and self._cell is not None:
+            self._row.append((self._cell[0], ' '.join(''.join(self._cell[1]).split())))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self._row and all(kind == 'th' for kind, _ in self._row):
+                self._headers = [text for _, text in self._row]
+            elif self._headers:
+                self.tables[-1].append(dict(zip(self._headers, (text for _, text in self._row))))
+            self._row = None
+        elif tag == 'table':
+            self._headers = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell[1].append(data)
+
+
+def decode_leaderboard(body):
+    # 排行榜回應可以是 JSON (清單，或包在 users/ranking/data 之下) 或已繪製好的 HTML 表格
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        parser = _TableParser()
+        parser.feed(body)
+        parser.close()
+        # 取第一個能辨識出用戶與分數的表格
+        return next((listing for listing in map(listing_from_rows, parser.tables) if listing), {})
+    if isinstance(payload, dict):
+        payload = next((payload[key] for key in ('users', 'ranking', 'data', 'players', 'items')
+                        if isinstance(payload.get(key), list)), [])
+    return listing_from_rows(row for row in payload if isinstance(row, dict))
+
+
+class Leaderboard:
+    def __init__(self, endpoints=LEADERBOARD_ENDPOINTS, pages=LEADERBOARD_PAGES, max_pages=20, timeout=10,
+                 page_timeout=10.0, governor=None):
+        self.endpoints = endpoints
+        self.pages = pages
+        self.max_pages = max_pages  # 每種棋類型最多讀取幾頁
+        self.timeout = timeout
+        self.page_timeout = page_timeout  # Selenium 等待排行榜繪製的秒數
+        self.governor = governor
+        self.page_loads = Counter()  # {game_type: 讀取的頁數}
+
+    def _add_page(self, game_type, listing, page_listing):
+        # 回傳是否還要繼續讀下一頁：空白頁或全部都已讀過 (超過最後一頁時網站重複回傳同一頁) 時停止
+        self.page_loads[game_type] += 1
+        new = {username: entry for username, entry in page_listing.items() if username not in listing}
+        listing.update(new)
+        return bool(new)
+
+    async def _fetch_http(self, game_type, listing):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            for page in range(1, self.max_pages + 1):
+                if self.governor is not None:
+                    await self.governor.acquire_async()
+                start = time.perf_counter()
+                async with session.get(self.endpoints[game_type].format(page=page)) as response:
+                    body = await response.text()
+                if self.governor is not None:
+                    self.governor.record(response.status == 200, time.perf_counter() - start, response.status)
+                if response.status != 200 or not self._add_page(game_type, listing, decode_leaderboard(body)):
+                    break
+
+    def fetch_http(self, game_type):
+        # 回傳 {username: 排行榜欄位}；讀取失敗時回傳已取得的部分 (可能為空)
+        listing = {}
+        try:
+            asyncio.run(self._fetch_http(game_type, listing))
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+            print(f"無法讀取 {game_type} 排行榜: {type(e).__name__}: {e}")
+        return listing
+
+    def _wait_for_page(self, driver, previous):
+        # 排行榜以前端繪製，等到表格出現且與上一頁不同
+        deadline = time.perf_counter() + self.page_timeout
+        while time.perf_counter() < deadline:
+            page_listing = decode_leaderboard(driver.page_source)
+            if page_listing and set(page_listing) != previous:
+                return page_listing
+            time.sleep(0.1)
+        return {}
+
+    def fetch_selenium(self, driver, game_type):
+        # 以瀏覽器讀取排行榜頁面；換頁時只改變網址 hash，不重新載入整個頁面
+        listing, previous = {}, set()
+        for page in range(1, self.max_pages + 1):
+            if self.governor is not None:
+                try:
+                    self.governor.acquire()
+                except CircuitOpenError as e:
+                    print(f"停止讀取 {game_type} 排行榜: {e}")
+                    break
+            start = time.perf_counter()
+            driver.get(self.pages[game_type].format(page=page))
+            page_listing = self._wait_for_page(driver, previous)
+            if self.governor is not None:
+                self.governor.record(bool(page_listing), time.perf_counter() - start)
+            if not self._add_page(game_type, listing, page_listing):
+                break
+            previous = set(page_listing)
+        return listing
+
+
+def _current_rating(rating):
+    match = _CURRENT_RATING.match(str(rating))
+    return int(match.group(1)) if match else None
+
+
+class LeaderboardPlanner:
+    def __init__(self, store, game_type, max_staleness_hours=48, discover=True):
+        self.store = store
+        self.game_type = game_type
+        self.max_staleness = timedelta(hours=max_staleness_hours)  # 分數沒變的用戶最久沿用多久
+        self.discover = discover  # 是否收集排行榜上不在名單中的用戶
+        self.reasons = Counter()
+        self.discovered = []
+        self.listed = 0
+
+    def last_fetched(self, usernames, now):
+        # 回傳 {username: (抓取時間, 紀錄)}，只使用最長沿用時間內實際抓取的資料列
+        history = self.store.query(username=usernames, game_type=self.game_type,
+                                   start=now - self.max_staleness, end=now, fetched_only=True)
+        columns = ['Username', 'Rating', 'Rank', 'Win/Loss', 'Streak']
+        history = history.sort_values(by='Date', kind='stable')
+        return {record['Username']: (date, record)
+                for date, record in zip(history['Date'], history[columns].to_dict('records'))}
+
+    def plan(self, usernames, listing, now=None):
+        # 回傳 (要開啟個人頁面的用戶, 不在排行榜上的用戶, 排行榜已有完整紀錄的用戶紀錄, 沿用舊紀錄的用戶紀錄)
+        # 不在排行榜上的用戶可再交給 ActivityScheduler 決定是否抓取
+        now = now or datetime.now()
+        roster = set(usernames)
+        self.discovered = [username for username in listing if username not in roster] if self.discover else []
+        candidates = list(usernames) + self.discovered
+        last = self.last_fetched(candidates, now)
+        self.reasons.clear()
+        self.listed = len(listing)
+        poll, unlisted, complete, carried = [], [], [], []
+        for username in candidates:
+            entry = listing.get(username)
+            if entry is None:
+                reason = 'unlisted'
+                unlisted.append(username)
+            elif all(entry.get(field) for field in _RECORD_FIELDS) and 'max' in entry['Rating']:
+                reason = 'listing'
+                complete.append({field: entry[field] for field in ('Username',) + _RECORD_FIELDS})
+            elif username not in last:
+                reason = 'new'
+                poll.append(username)
+            elif _current_rating(entry['Rating']) != _current_rating(last[username][1]['Rating']):
+                reason = 'changed'
+                poll.append(username)
+            else:
+                # 分數沒變：沿用上次的 Win/Loss、Streak 與最高分，名次以排行榜為準
+                reason = 'unchanged'
+                fetched_time, record = last[username]
+                carried.append(dict(record, Rank=entry['Rank'], **{FETCHED_TIME: fetched_time}))
+            self.reasons[reason] += 1
+        return poll, unlisted, complete, carried
+
+    def report(self):
+        labels = {'listing': '排行榜已完整', 'unchanged': '分數未變沿用', 'changed': '分數有變化', 'new': '無近期紀錄',
+                  'unlisted': '不在排行榜'}
+        total = sum(self.reasons.values())
+        polled = self.reasons['changed'] + self.reasons['new'] + self.reasons['unlisted']
+        details = '，'.join(f"{labels[reason]} {count}" for reason, count in self.reasons.items())
+        print(f"{self.game_type} 排行榜 {self.listed} 位用戶；需開啟個人頁面最多 {polled} / {total} 位 ({details})")
+        if self.discovered:
+            names = ', '.join(self.discovered[:10]) + (' ...' if len(self.discovered) > 10 else '')
+            print(f"  排行榜上有 {len(self.discovered)} 位不在名單中的用戶: {names}")
@@ -0,0 +1,204 @@
+# 以精簡型別讀取多年的快照歷史：用戶名稱為 category、分數與勝敗場數為小整數，原始字串欄位在解析後即捨棄
+# 資料逐批 (每個文件或資料庫每 chunk_rows 列) 解析並轉換型別後才累積，不保留各文件的字串 DataFrame，
+# 最後逐欄合併，記憶體峰值約為精簡後的結果再加上一批資料
+# 記憶體比較: python -m questgames.loading --years 5 --users 300
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from questgames.parsing import parse_snapshot_columns
+
+# 解析後數值欄位的型別：分數在 int16 範圍內；勝敗場數可能超過 32767，使用可為空值的 Int32
+COMPACT_DTYPES = {
+    'CurrentRating': 'int16',
+    'MaxRating': 'int16',
+    'Rank': 'Int32',
+    'Wins': 'Int32',
+    'Losses': 'Int32',
+    'Draws': 'Int32',
+    'Win Rate': 'float32',
+}
+
+# 解析後不再需要的原始字串欄位 (需要時以 keep_text 保留，存成 category)
+TEXT_COLUMNS = ('Rating', 'Win/Loss', 'Streak', 'GameType')
+
+
+def peak_rss_mb():
+    # 目前行程的記憶體峰值 (MB)；無法取得時回傳 None
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def _nullable(dtype):
+    # 補缺值時整數與布林欄位改用可為空值的型別，其他型別本身即可存放缺值
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+        return 'boolean' if dtype.kind == 'b' else f"{'U' if dtype.kind == 'u' else ''}Int{dtype.itemsize * 8}"
+    return dtype
+
+
+class CompactHistory:
+    def __init__(self, keep_text=()):
+        self.keep_text = tuple(keep_text)  # 仍要保留的文字欄位，例如去重需要的 Win/Loss
+        self.categories = {}  # {欄位: {值: 代碼}}，所有批次共用同一組代碼
+        # {欄位: [已轉換型別的片段, ...]}；某批資料沒有的欄位以該批的列數 (int) 代替，合併時補上缺值
+        self.pieces = {}
+        self.columns = []  # 所有批次欄位的聯集，依出現順序
+        self.rows = 0
+
+    def _category_codes(self, column, values):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        mapping = self.categories.setdefault(column, {})
+        lookup = np.array([mapping.setdefault(value, len(mapping)) for value in uniques] + [-1], dtype=np.int32)
+        return lookup[codes]  # 缺值 (-1) 對應到最後的 -1
+
+    def add(self, df):
+        # df: parse_snapshot_columns 解析後的資料；轉換後原本的 df 即可釋放
+        # 各文件的欄位不一定相同 (例如只有含沿用紀錄的文件才有 FetchedTime)，取所有批次欄位的聯集
+        for column in df.columns:
+            if column not in self.pieces and (column not in TEXT_COLUMNS or column in self.keep_text):
+                self.columns.append(column)
+                self.pieces[column] = [self.rows] if self.rows else []
+        categorical = ('Username',) + self.keep_text
+        for column in self.columns:
+            if column not in df.columns:
+                self.pieces[column].append(len(df))
+                continue
+            values = df[column]
+            if column in categorical:
+                piece = self._category_codes(column, values)
+            elif column in COMPACT_DTYPES:
+                values = values.astype(COMPACT_DTYPES[column])
+                piece = values.to_numpy() if isinstance(values.dtype, np.dtype) else values.array
+            else:
+                piece = values.to_numpy()
+            self.pieces[column].append(piece)
+        self.rows += len(df)
+
+    def frame(self):
+        # 逐欄合併並釋放片段；category 依名稱排序
+        result = pd.DataFrame(index=pd.RangeIndex(self.rows))
+        for column in self.columns:
+            pieces = self.pieces.pop(column)
+            present = [piece for piece in pieces if not isinstance(piece, int)]
+            if column in self.categories:
+                names = np.array(list(self.categories[column]), dtype=object)
+                order = np.argsort(names, kind='stable')
+                remap = np.empty(len(order) + 1, dtype=np.int32)
+                remap[order] = np.arange(len(order), dtype=np.int32)
+                remap[-1] = -1
+                codes = remap[np.concatenate([np.full(piece, -1, dtype=np.int32) if isinstance(piece, int) else piece
+                                              for piece in pieces])]
+                result[column] = pd.Categorical.from_codes(codes, names[order])
+            elif len(present) < len(pieces):
+                dtype = _nullable(present[0].dtype)
+                result[column] = pd.concat([pd.Series(index=pd.RangeIndex(piece), dtype=dtype)
+                                            if isinstance(piece, int) else pd.Series(piece).astype(dtype)
+                                            for piece in pieces], ignore_index=True)
+            elif isinstance(pieces[0], np.ndarray):
+                result[column] = np.concatenate(pieces)
+            else:
+                result[column] = pd.concat([pd.Series(piece) for piece in pieces], ignore_index=True)
+            del pieces, present
+        return result
+
+
+def load_store_compact(store, game_type, username=None, chunk_rows=50_000, report=None, keep_text=(),
+                       **parse_options):
+    # 從快照資料庫逐批讀取一種棋類型的歷史，回傳精簡型別的 DataFrame
+    history = CompactHistory(keep_text)
+    for chunk in store.iter_query(username=username, game_type=game_type, chunk_rows=chunk_rows):
+        history.add(parse_snapshot_columns(chunk, report=report, source=store.path, **parse_options))
+    return history.frame()
+
+
+def compact_frames(frames, keep_text=()):
+    # frames: 依序產生已解析 DataFrame 的可迭代物件 (例如逐一讀取的文件)
+    history = CompactHistory(keep_text)
+    for df in frames:
+        history.add(df)
+    return history.frame()
+
+
+def report_memory(label, df):
+    peak = peak_rss_mb()
+    peak_text = f"，行程記憶體峰值 {peak:.0f} MB" if peak is not None else ""
+    print(f"{label}: {len(df)} 列，資料 {frame_mb(df):.1f} MB{peak_text}")
+
+
+def _make_store(path, years, users, seed=0):
+    # 每 6 小時一次快照的模擬歷史，欄位格式與網站相同
+    from questgames.store import SnapshotStore
+    rng = np.random.default_rng(seed)
+    store = SnapshotStore(path)
+    dates = pd.date_range('2020-01-01', periods=int(years * 365 * 4), freq='6h')
+    names = [f"user{i}" for i in range(users)]
+    rating = rng.integers(1000, 2000, users)
+    wins, losses, draws = rng.integers(0, 3000, users), rng.integers(0, 3000, users), rng.integers(0, 50, users)
+    for date in dates:
+        played = rng.integers(0, 3, users)
+        won = rng.integers(0, 2, users) * played
+        wins, losses = wins + won, losses + played - won
+        rating = np.clip(rating + 8 * (2 * won - played), 800, 2400)
+        rate = np.round(wins * 100 / (wins + losses + draws), 1)
+        store.append('5min', date, [
+            {'Username': name, 'Rating': f"{r} max: {r + 50}", 'Rank': i + 1, 'Win/Loss': f"{w}-{l}-{d} ({p})",
+             'Streak': 'W1'} for i, (name, r, w, l, d, p) in enumerate(zip(names, rating, wins, losses, draws, rate))])
+    store.close()
+
+
+def _measure(variant, path):
+    # 在獨立行程中執行，輸出 (資料列數, 結果 MB, 載入前 RSS, 峰值 RSS, 秒數)
+    from questgames.store import SnapshotStore
+    store = SnapshotStore(path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if variant == 'legacy':
+        # 原本的方式：一次查詢全部字串欄位後再解析
+        df = parse_snapshot_columns(store.query(game_type='5min'))
+    else:
+        df = load_store_compact(store, '5min')
+    elapsed = time.perf_counter() - start
+    print(len(df), frame_mb(df), baseline, peak_rss_mb(), elapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='比較原本與精簡型別讀取方式的記憶體峰值')
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--measure', choices=['legacy', 'compact'], help=argparse.SUPPRESS)
+    parser.add_argument('--store', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        _measure(args.measure, args.store)
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.db')
+        print(f"產生 {args.years} 年、{args.users} 位用戶的模擬歷史…")
+        _make_store(path, args.years, args.users)
+        results = {}
+        for variant in ('legacy', 'compact'):
+            output = subprocess.run([sys.executable, '-m', 'questgames.loading', '--measure', variant, '--store', path],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            rows, size, baseline, peak, elapsed = int(output[0]), *map(float, output[1:])
+            results[variant] = peak - baseline
+            print(f"{variant:<8} {rows} 列，結果 {size:.0f} MB，記憶體峰值增加 {peak - baseline:.0f} MB，{elapsed:.1f} 秒")
+        print(f"精簡型別的記憶體峰值為原本的 {results['compact'] / results['legacy']:.0%}")
@@ -0,0 +1,121 @@
+# 收集流程各階段的計時與失敗計數，輸出成 Prometheus textfile (node_exporter 的 textfile collector 可直接讀取)
+# 階段: startup (啟動瀏覽器)、load (載入/切換頁面並等待紀錄表)、sleep (固定等待)、extract (讀取紀錄表)、
+#       http (HTTP 請求與解碼)、user (單一用戶合計)、plan、store、xlsx、analytics、run
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# 直方圖的上界 (秒)
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 60.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+class Metrics:
+    def __init__(self, prefix='questgames'):
+        self.prefix = prefix
+        self.histograms = {}  # {(stage, labels): [各 bucket 次數, 總和, 次數]}
+        self.samples = {}  # {(stage, labels): [秒數, ...]}，摘要用
+        self.failures = {}  # {(stage, error, labels): 次數}
+        self.counters = {}  # {(name, labels): 值}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.setdefault(key, [[0] * len(BUCKETS), 0.0, 0])
+            index = bisect_left(BUCKETS, seconds)
+            if index < len(BUCKETS):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            self.samples.setdefault(key, []).append(seconds)
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        # with metrics.stage('load', game_type='5min'): ... 例外時同時記錄失敗類型
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.failure(stage, e, **labels)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def failure(self, stage, error, **labels):
+        # error 可以是例外或描述字串
+        name = type(error).__name__ if isinstance(error, BaseException) else str(error)
+        key = (stage, name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_prometheus(self):
+        p = self.prefix
+        lines = [f'# HELP {p}_stage_seconds 各階段耗時', f'# TYPE {p}_stage_seconds histogram']
+        with self._lock:
+            for (stage, labels), (buckets, total, count) in sorted(self.histograms.items()):
+                labels = dict(labels, stage=stage)
+                cumulative = 0
+                for bound, hits in zip(BUCKETS, buckets):
+                    cumulative += hits
+                    lines.append(f'{p}_stage_seconds_bucket{_label_text(dict(labels, le=bound))} {cumulative}')
+                lines.append(f'{p}_stage_seconds_bucket{_label_text(dict(labels, le="+Inf"))} {count}')
+                lines.append(f'{p}_stage_seconds_sum{_label_text(labels)} {total:.6f}')
+                lines.append(f'{p}_stage_seconds_count{_label_text(labels)} {count}')
+            lines += [f'# HELP {p}_failures_total 各階段依錯誤類型的失敗次數', f'# TYPE {p}_failures_total counter']
+            for (stage, error, labels), count in sorted(self.failures.items()):
+                lines.append(f'{p}_failures_total{_label_text(dict(labels, stage=stage, error=error))} {count}')
+            # 同一名稱只能有一行 TYPE (textfile collector 遇到重複會拒絕整個檔案)，各標籤的數值接在其下
+            previous = None
+            for (name, labels), value in sorted(self.counters.items()):
+                if name != previous:
+                    lines.append(f'# TYPE {p}_{name} gauge')
+                    previous = name
+                lines.append(f'{p}_{name}{_label_text(dict(labels))} {value}')
+            lines.append(f'# TYPE {p}_last_run_timestamp_seconds gauge')
+            lines.append(f'{p}_last_run_timestamp_seconds {time.time():.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        # 先寫暫存檔再改名，讀取端不會看到寫到一半的檔案
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(temp_path, path)
+        return path
+
+    def report(self):
+        print("各階段耗時：")
+        with self._lock:
+            for (stage, labels), samples in sorted(self.samples.items()):
+                ordered = sorted(samples)
+                p50 = ordered[len(ordered) // 2]
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                label = ' '.join(f'{key}={value}' for key, value in labels)
+                print(f"  {stage:<8} {label:<16} {len(samples):>6} 次，合計 {sum(samples):8.1f} 秒，"
+                      f"p50 {p50:.3f} 秒，p95 {p95:.3f} 秒")
+            for (stage, error, labels), count in sorted(self.failures.items()):
+                label = ' '.join(f'{key}={value}' for key, value in labels)
+                print(f"  失敗 {stage:<8} {label:<16} {error}: {count} 次")
+
+
+def timed(metrics, stage, **labels):
+    # metrics 為 None 時不計時，呼叫端不必另外判斷
+    return metrics.stage(stage, **labels) if metrics is not None else nullcontext()
@@ -0,0 +1,94 @@
+# 每種棋類型只完整載入一次頁面，之後以修改 location.hash 切換用戶
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from questgames.readiness import RECORD_FIELDS
+
+# 標記目前的紀錄表並切換網址 hash，回傳切換前紀錄表的文字
+_SWITCH_SCRIPT = """
+var record = document.querySelector('li.record');
+var previous = record ? record.innerText : '';
+if (record) { record.setAttribute('data-qg-previous', '1'); }
+window.location.hash = '#user/' + arguments[0];
+return previous;
+"""
+
+# 紀錄表已為新用戶重新繪製：元素被換掉或內容已改變，且所有欄位都有內容
+_SWITCHED_SCRIPT = """
+var username = arguments[0], previous = arguments[1], fields = arguments[2];
+if (decodeURIComponent(window.location.hash) !== '#user/' + username) { return false; }
+var record = document.querySelector('li.record');
+if (!record) { return false; }
+if (record.hasAttribute('data-qg-previous') && record.innerText === previous) { return false; }
+var seen = {};
+record.querySelectorAll('table tr').forEach(function (tr) {
+    var th = tr.querySelector('th'), td = tr.querySelector('td');
+    if (th && td && td.textContent.trim()) { seen[th.textContent.trim()] = true; }
+});
+return fields.every(function (field) { return seen[field]; });
+"""
+
+
+class HashNavigator:
+    def __init__(self, driver, readiness=None, timeout=5.0, poll_frequency=0.05):
+        self.driver = driver
+        self.readiness = readiness
+        self.timeout = timeout  # 沒有 readiness 時 hash 切換的逾時秒數
+        self.poll_frequency = poll_frequency
+        self.loaded_app = None  # 目前已載入的棋類型網址前綴
+        self.timings = {'full': [], 'hash': []}
+        self.stale = 0  # hash 切換後沒有重新繪製，改為完整載入的次數
+
+    def _switch_timeout(self):
+        return self.readiness.timeout() if self.readiness is not None else self.timeout
+
+    def _full_load(self, url_prefix, username):
+        start = time.perf_counter()
+        self.driver.get(f"{url_prefix}{username}")
+        if self.readiness is not None:
+            self.readiness.wait(self.driver, username)
+        else:
+            time.sleep(0.8)  # 等待內容加載
+        self.loaded_app = url_prefix
+        self.timings['full'].append(time.perf_counter() - start)
+
+    def _hash_switch(self, username):
+        start = time.perf_counter()
+        previous = self.driver.execute_script(_SWITCH_SCRIPT, username)
+        try:
+            WebDriverWait(self.driver, self._switch_timeout(), poll_frequency=self.poll_frequency).until(
+                lambda d: d.execute_script(_SWITCHED_SCRIPT, username, previous, list(RECORD_FIELDS)))
+        except TimeoutException:
+            return False
+        waited = time.perf_counter() - start
+        self.timings['hash'].append(waited)
+        if self.readiness is not None:
+            self.readiness.record(username, waited, True)
+        return True
+
+    def open(self, url_prefix, username, force_full=False):
+        # 開啟用戶頁面，回傳 'hash' 或 'full'；前端狀態異常時自動改為完整載入
+        if not force_full and self.loaded_app == url_prefix:
+            try:
+                if self._hash_switch(username):
+                    return 'hash'
+            except Exception as e:
+                print(f"切換至 {username} 時頁面狀態異常，改為完整載入: {e}")
+            self.stale += 1
+        self._full_load(url_prefix, username)
+        return 'full'
+
+    def report(self):
+        report_navigation([self])
+
+
+def report_navigation(navigators):
+    # 比較完整載入與 hash 切換的平均耗時
+    for mode, label in (('full', '完整載入'), ('hash', 'hash 切換')):
+        timings = [t for navigator in navigators for t in navigator.timings[mode]]
+        if timings:
+            print(f"{label} {len(timings)} 次，平均 {sum(timings) / len(timings):.2f} 秒")
+    stale = sum(navigator.stale for navigator in navigators)
+    if stale:
+        print(f"hash 切換失敗改為完整載入 {stale} 次")
@@ -0,0 +1,98 @@
+# 已解析檔案的快取：依路徑、大小與修改時間判斷，只重新解析新增或修改過的 xlsx
+import os
+import pickle
+import pandas as pd
+from tqdm import tqdm
+
+from questgames.loading import CompactHistory
+
+# 記錄每列資料來自哪個檔案，檔案修改或刪除時據此移除
+_SOURCE = '_SourceFile'
+_VERSION = 1
+
+
+def _signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ParseCache:
+    def __init__(self, cache_path='./othello/cache/parsed_files.pkl', parser_version=1, compact=False, keep_text=()):
+        self.cache_path = cache_path
+        self.parser_version = parser_version  # 解析方式改變時調高，舊快取會自動作廢
+        # compact 為 True 時以精簡型別保存 (見 questgames.loading)，每個文件解析後立即轉換，不保留字串欄位
+        self.compact = compact
+        self.keep_text = tuple(keep_text)
+        self.version = (_VERSION, parser_version, 'compact') + self.keep_text if compact else (_VERSION, parser_version)
+        self.files = {}  # {路徑: (大小, 修改時間, 棋類型)}
+        self.frames = {}  # {棋類型: 合併後的 DataFrame}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'rb') as file:
+                cached = pickle.load(file)
+            if cached.get('version') == self.version:
+                self.files, self.frames = cached['files'], cached['frames']
+        except Exception as e:
+            print(f"快取無法讀取，將重新解析所有文件：{e}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, 'wb') as file:
+            pickle.dump({'version': self.version, 'files': self.files, 'frames': self.frames}, file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.cache_path)
+
+    def update(self, file_paths, parse_file):
+        # parse_file(file_path) 回傳 (棋類型, DataFrame)；回傳 {棋類型: 合併後的 DataFrame}
+        current = {os.path.normpath(path): _signature(path) for path in file_paths}
+        stale = {path for path, (size, mtime, _) in self.files.items() if current.get(path) != (size, mtime)}
+        pending = [path for path in current if path not in self.files or path in stale]
+
+        # 移除已刪除或修改過的檔案資料
+        if stale:
+            for game_type, frame in self.frames.items():
+                frame = frame[~frame[_SOURCE].isin(stale)]
+                if self.compact:
+                    frame = frame.assign(**{column: frame[column].cat.remove_unused_categories()
+                                            for column in frame.select_dtypes('category')})
+                self.frames[game_type] = frame
+            for path in stale:
+                del self.files[path]
+
+        parsed = {}
+        histories = {}
+        for path in tqdm(pending, desc='解析新文件'):
+            try:
+                game_type, df = parse_file(path)
+            except Exception as e:
+                print(f"無法讀取文件 {path}：{str(e)}")
+                continue
+            self.files[path] = (*current[path], game_type)
+            if game_type is None:
+                continue  # 非 1min/5min 的文件也記下，下次不必再讀
+            df[_SOURCE] = path
+            if self.compact:
+                if game_type not in histories:
+                    histories[game_type] = CompactHistory(self.keep_text + (_SOURCE,))
+                    if game_type in self.frames:
+                        histories[game_type].add(self.frames.pop(game_type))
+                histories[game_type].add(df)
+            else:
+                parsed.setdefault(game_type, []).append(df)
+
+        for game_type, frames in parsed.items():
+            if game_type in self.frames:
+                frames = [self.frames[game_type]] + frames
+            self.frames[game_type] = pd.concat(frames, ignore_index=True)
+        for game_type, history in histories.items():
+            self.frames[game_type] = history.frame()
+
+        if pending or stale:
+            self.save()
+        print(f"沿用快取 {len(current) - len(pending)} 個文件，重新解析 {len(pending)} 個文件")
+        return {game_type: frame.drop(columns=[_SOURCE]) for game_type, frame in self.frames.items()}
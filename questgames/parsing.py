@@ -0,0 +1,154 @@
+# Rating 與 Win/Loss 欄位的向量化解析，供所有分析腳本共用
+# 效能比較: python -m questgames.parsing --rows 1000000
+import argparse
+import re
+import time
+import numpy as np
+import pandas as pd
+
+# 有 pyarrow 時以其 C++ 正規表示式一次處理整欄，否則使用 pandas 的 str.extract
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+# "1234 max: 1500" -> 當前分數、歷史最高分
+_RATING_PATTERN = r'^\s*(?P<CurrentRating>\d+)(?:.*?max:\s*(?P<MaxRating>\d+))?'
+# "w-l-d (rate)" -> 勝、負、和、勝率
+_WIN_LOSS_PATTERN = r'^\s*(?P<Wins>\d+)-(?P<Losses>\d+)-(?P<Draws>\d+)\s*\((?P<WinRate>[\d.]+)%?\)'
+
+
+class ParseReport:
+    # 收集無法解析的資料列，最後一次輸出，不逐筆列印
+    def __init__(self):
+        self.frames = []
+
+    def add(self, df, mask, column, source=None):
+        if not mask.any():
+            return
+        bad = df.loc[mask, ['Username', column]].rename(columns={column: 'Value'})
+        bad.insert(1, 'Column', column)
+        if source is not None:
+            bad['Source'] = source
+        self.frames.append(bad)
+
+    def count(self):
+        return sum(len(frame) for frame in self.frames)
+
+    def to_frame(self):
+        if not self.frames:
+            return pd.DataFrame(columns=['Username', 'Column', 'Value', 'Source'])
+        return pd.concat(self.frames, ignore_index=True)
+
+    def report(self, path=None):
+        count = self.count()
+        if not count:
+            return
+        if path is not None:
+            self.to_frame().to_csv(path, index=False, encoding='utf-8-sig')
+            print(f"有 {count} 筆資料無法解析，明細已儲存至 {path}")
+        else:
+            print(f"有 {count} 筆資料無法解析：")
+            print(self.to_frame().to_string(index=False))
+
+
+def _extract(series, pattern, dtypes):
+    # 以具名群組擷取並轉成數值欄位，無法比對的資料列為 <NA>/NaN
+    result = pd.DataFrame(index=series.index)
+    if pc is not None:
+        matches = pc.extract_regex(pa.array(series.astype('string[pyarrow]')), pattern)
+        for name, dtype in dtypes.items():
+            values = pc.struct_field(matches, name)
+            # 沒有比對到的選用群組會是空字串
+            values = pc.if_else(pc.equal(values, ''), pa.scalar(None, values.type), values)
+            values = pc.cast(values, pa.int64() if dtype == 'Int64' else pa.float64())
+            result[name] = pd.Series(values.to_numpy(zero_copy_only=False), index=series.index).astype(dtype)
+        return result
+    parsed = series.astype('string').str.extract(pattern)
+    for name, dtype in dtypes.items():
+        result[name] = pd.to_numeric(parsed[name]).astype(dtype)
+    return result
+
+
+def parse_rating(rating):
+    # 回傳 CurrentRating、MaxRating 兩欄 (Int64，無法解析為 <NA>)
+    return _extract(rating, _RATING_PATTERN, {'CurrentRating': 'Int64', 'MaxRating': 'Int64'})
+
+
+def parse_win_loss(win_loss):
+    # 回傳 Wins、Losses、Draws (Int64) 與 Win Rate (float)，無法解析為 <NA>/NaN
+    result = _extract(win_loss, _WIN_LOSS_PATTERN,
+                      {'Wins': 'Int64', 'Losses': 'Int64', 'Draws': 'Int64', 'WinRate': float})
+    return result.rename(columns={'WinRate': 'Win Rate'})
+
+
+def parse_snapshot_columns(df, max_rating=True, win_loss=True, report=None, source=None):
+    # 一次加入 CurrentRating/MaxRating/Wins/Losses/Draws/Win Rate；Rating 無法解析的資料列會被移除
+    ratings = parse_rating(df['Rating'])
+    bad_rating = ratings['CurrentRating'].isna()
+    df['CurrentRating'] = ratings['CurrentRating']
+    if max_rating:
+        df['MaxRating'] = ratings['MaxRating']
+        bad_rating |= ratings['MaxRating'].isna()
+    if report is not None:
+        report.add(df, bad_rating.to_numpy(), 'Rating', source)
+    if win_loss:
+        df[['Wins', 'Losses', 'Draws', 'Win Rate']] = parse_win_loss(df['Win/Loss'])
+        if report is not None:
+            report.add(df, df['Wins'].isna().to_numpy() & ~bad_rating.to_numpy(), 'Win/Loss', source)
+    int_columns = ['CurrentRating', 'MaxRating'] if max_rating else ['CurrentRating']
+    return df[~bad_rating.to_numpy()].astype({column: int for column in int_columns})
+
+
+def _legacy_parse(df):
+    # 原本各腳本逐列 apply 的寫法，僅供效能比較
+    def parse_one(win_loss):
+        try:
+            wins, losses, rest = win_loss.split('-')
+            draws, win_rate = rest.split(' ')
+            return int(wins), int(losses), int(draws.strip()), float(win_rate.strip('()'))
+        except Exception:
+            return None, None, None, None
+
+    df['CurrentRating'] = df['Rating'].apply(lambda x: int(re.search(r'^\d+', x).group()))
+    df['MaxRating'] = df['Rating'].apply(lambda x: int(re.search(r'max:\s*(\d+)', x).group(1)))
+    df[['Wins', 'Losses', 'Draws', 'Win Rate']] = df['Win/Loss'].apply(lambda x: pd.Series(parse_one(x)))
+    return df
+
+
+def make_sample(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    current = rng.integers(800, 2300, rows)
+    wins, losses, draws = rng.integers(0, 5000, rows), rng.integers(0, 5000, rows), rng.integers(0, 50, rows)
+    rate = np.round(wins * 100 / np.maximum(wins + losses + draws, 1), 1)
+    return pd.DataFrame({
+        'Username': [f"user{i % 500}" for i in range(rows)],
+        'Rating': [f"{c} max: {c + m}" for c, m in zip(current, rng.integers(0, 200, rows))],
+        'Win/Loss': [f"{w}-{l}-{d} ({r})" for w, l, d, r in zip(wins, losses, draws, rate)],
+    })
+
+
+def benchmark(rows, legacy_rows=None):
+    # legacy_rows: 舊寫法只測部分資料列再依比例推算，避免等太久
+    df = make_sample(rows)
+    start = time.perf_counter()
+    parse_snapshot_columns(df.copy())
+    vectorized = time.perf_counter() - start
+
+    legacy_rows = min(rows, legacy_rows or rows)
+    start = time.perf_counter()
+    _legacy_parse(df.head(legacy_rows).copy())
+    legacy = (time.perf_counter() - start) * rows / legacy_rows
+    estimated = "(推算)" if legacy_rows < rows else ""
+    print(f"{rows} 列：向量化 {vectorized:.2f} 秒，逐列 apply {legacy:.2f} 秒{estimated}，"
+          f"快 {legacy / vectorized:.1f} 倍")
+    return vectorized, legacy
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='比較向量化解析與逐列 apply 的速度')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=100_000, help='舊寫法實際測試的列數')
+    args = parser.parse_args()
+    benchmark(args.rows, args.legacy_rows)
@@ -0,0 +1,130 @@
+# 分數折線圖的共用繪圖函式；以 Figure 物件繪製，不依賴 pyplot 的全域狀態，可在多個行程中同時執行
+import math
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import matplotlib.dates as mdates
+import matplotlib.font_manager as fm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+# 設置線條顏色的函數
+def get_line_color(rating):
+    if rating >= 2000:
+        return (238/255, 0, 0)  # RGB(238,0,0)
+    elif 1700 <= rating <= 1999:
+        return (204/255, 170/255, 0)  # RGB(204,170,0)
+    elif 1500 <= rating <= 1699:
+        return (52/255, 52/255, 241/255)  # RGB(52,52,241)
+    elif 1200 <= rating <= 1499:
+        return (0, 169/255, 0)  # RGB(0,169,0)
+    else:
+        return (153/255, 153/255, 153/255)  # RGB(153,153,153)
+
+
+def build_user_index(df):
+    # 整份資料只排序、分組一次，回傳 {username: 依日期排序的資料}
+    df = df.sort_values(by=['Username', 'Date'], kind='stable')
+    return {username: user_data for username, user_data in df.groupby('Username', sort=False, observed=True)}
+
+
+def rank_users(user_index, blacklist=()):
+    # 依最新分數由高到低排序用戶，並過濾黑名單
+    latest = {username: user_data['CurrentRating'].iloc[-1] for username, user_data in user_index.items()}
+    return [username for username in sorted(latest, key=latest.get, reverse=True) if username not in blacklist]
+
+
+def with_match_increase(user_data):
+    # 計算每段期間的比賽次數，並排除沒有比賽或異常的資料點
+    user_data = user_data.copy()
+    user_data['Total Matches'] = user_data['Wins'] + user_data['Losses'] + user_data['Draws']
+    user_data['Match Increase'] = user_data['Total Matches'].diff().fillna(0).astype(int)
+    user_data = user_data[user_data['Match Increase'] >= 1]
+    return user_data[user_data['Match Increase'] < 1000]  # 設置合理的閥值，排除異常值
+
+
+def _rotate_ticks(ax, font):
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_fontproperties(font)
+
+
+def draw_plain_panel(ax, username, user_data, font):
+    # print-rank-3 的樣式：分數折線加上浮水印用戶名稱
+    ax.plot(user_data['Date'], user_data['CurrentRating'], marker='o', label=username)
+    ax.set_title(username, fontproperties=font)
+    ax.set_xlabel('月-日 時:分', fontproperties=font)
+    ax.set_ylabel('最新分數 (Rating)', fontproperties=font)
+    ax.grid(True)
+    ax.legend()
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M', tz=None))
+    _rotate_ticks(ax, font)
+    ax.text(0.5, 0.5, username, fontsize=40, color='lightgray',
+            ha='center', va='center', transform=ax.transAxes, alpha=0.5, fontproperties=font)
+
+
+def draw_color_panel(ax, username, user_data, font):
+    # print-rank-5 的樣式：依最新分數上色並標示歷史最高分
+    color = get_line_color(user_data['CurrentRating'].iloc[-1])
+    max_rating = user_data['MaxRating'].max()
+    ax.plot(user_data['Date'], user_data['CurrentRating'], marker='o', label=f"{username}", color=color)
+    ax.set_title(f"{username} (MAX: {max_rating})", fontproperties=font)
+    ax.set_xlabel('月-日', fontproperties=font)
+    ax.set_ylabel('最新分數 (Rating)', fontproperties=font)
+    ax.grid(True)
+    ax.legend()
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d', tz=None))
+    _rotate_ticks(ax, font)
+
+
+def draw_rating_panel(ax, username, user_data, font):
+    # 單一用戶的分數折線 (依最新分數上色) 與比賽次數長條圖
+    color = get_line_color(user_data['CurrentRating'].iloc[-1])
+    max_rating = user_data['MaxRating'].max()
+    user_data = with_match_increase(user_data)
+
+    ax.plot(user_data['Date'], user_data['CurrentRating'], marker='o', label=f"{username}", color=color)
+    ax.set_title(f"{username} (MAX: {max_rating})", fontproperties=font)
+    ax.set_xlabel('月-日', fontproperties=font)
+    ax.set_ylabel('最新分数 (Rating)', fontproperties=font)
+    ax.grid(True)
+    ax.legend(loc='upper left')
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d', tz=None))
+    _rotate_ticks(ax, font)
+
+    ax2 = ax.twinx()
+    ax2.bar(user_data['Date'], user_data['Match Increase'], alpha=0.3, color='gray', width=0.8)
+    ax2.set_ylabel('比赛次数', fontproperties=font)
+    match_increase_max = user_data['Match Increase'].max()
+    if pd.isna(match_increase_max) or match_increase_max == 0:
+        match_increase_max = 1  # 避免 y 軸為零或 NaN/Inf
+    ax2.set_ylim(0, match_increase_max * 1.1)
+
+
+def render_grid(job):
+    # job: (輸出路徑, [(username, user_data), ...], 字體路徑, 每列圖數)
+    path, panels, font_path, cols = job
+    font = fm.FontProperties(fname=font_path)
+    rows = max(1, math.ceil(len(panels) / cols))
+    fig = Figure(figsize=(4 * cols, 6 * rows))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(rows, cols, squeeze=False).flatten()
+    for ax, (username, user_data) in zip(axes, panels):
+        draw_rating_panel(ax, username, user_data, font)
+    # 如果有效用戶數量不足，則刪除多餘的軸
+    for ax in axes[len(panels):]:
+        fig.delaxes(ax)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def render_grids(jobs, workers=2):
+    # 每張圖交給獨立的行程繪製；workers <= 1 時在目前行程依序繪製
+    if workers <= 1 or len(jobs) <= 1:
+        return [render_grid(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(render_grid, jobs))
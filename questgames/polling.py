@@ -0,0 +1,81 @@
+# 依用戶的活躍程度決定本次是否抓取：常下棋的用戶每次都抓，久未下棋的用戶拉長間隔，但不超過最長沿用時間
+# 未抓取的用戶沿用最後一次抓到的紀錄，並以 FetchedTime 標示實際抓取時間
+from collections import Counter
+from datetime import datetime, timedelta
+import pandas as pd
+
+from questgames.parsing import parse_win_loss
+from questgames.store import FETCHED_TIME
+
+
+def _rate(first, last):
+    # 兩筆紀錄之間每小時的比賽數；無法計算時回傳 -1
+    hours = (last['Date'] - first['Date']).total_seconds() / 3600
+    played = last['Matches'] - first['Matches']
+    return played / hours if hours > 0 and pd.notna(played) else -1
+
+
+class ActivityScheduler:
+    def __init__(self, store, game_type, max_staleness_hours=48, min_expected_matches=0.5,
+                 lookback_hours=24 * 14):
+        self.store = store
+        self.game_type = game_type
+        self.max_staleness = timedelta(hours=max_staleness_hours)  # 最久多久一定要重新抓取
+        self.min_expected_matches = min_expected_matches  # 預估比賽數達到此值就抓取
+        self.lookback = timedelta(hours=lookback_hours)  # 估計比賽頻率時參考的歷史長度
+        self.reasons = Counter()
+
+    def activity(self, usernames, now):
+        # 回傳 {username: (最後抓取時間, 每小時比賽數, 最後一筆紀錄)}，只使用實際抓取的資料列
+        history = self.store.query(username=usernames, game_type=self.game_type,
+                                   start=now - self.lookback, end=now, fetched_only=True)
+        if history.empty:
+            return {}
+        totals = parse_win_loss(history['Win/Loss'])
+        history['Matches'] = (totals['Wins'] + totals['Losses'] + totals['Draws']).astype(float)
+        history = history.sort_values(by=['Username', 'Date'], kind='stable')
+        result = {}
+        for username, user_data in history.groupby('Username', sort=False):
+            last = user_data.iloc[-1]
+            # 整段歷史與最近兩次抓取之間的頻率取較高者，剛開始下棋的用戶下次就會被抓取
+            rate = max(_rate(user_data.iloc[0], last), _rate(user_data.iloc[-2], last) if len(user_data) > 1 else -1)
+            # 只有一筆紀錄或比賽數無法解析時視為未知，下次照常抓取
+            rate = rate if rate >= 0 else None
+            record = last[['Username', 'Rating', 'Rank', 'Win/Loss', 'Streak']].to_dict()
+            result[username] = (last['Date'], rate, record)
+        return result
+
+    def plan(self, usernames, now=None):
+        # 回傳 (本次要抓取的用戶, 沿用舊紀錄的用戶紀錄)
+        now = now or datetime.now()
+        known = self.activity(usernames, now)
+        self.reasons.clear()
+        poll, carried = [], []
+        for username in usernames:
+            reason = self._reason(known.get(username), now)
+            self.reasons[reason] += 1
+            if reason == 'idle':
+                last_time, _, record = known[username]
+                carried.append(dict(record, **{FETCHED_TIME: last_time}))
+            else:
+                poll.append(username)
+        return poll, carried
+
+    def _reason(self, info, now):
+        if info is None:
+            return 'new'
+        last_time, rate, _ = info
+        if now - last_time >= self.max_staleness:
+            return 'stale'
+        if rate is None:
+            return 'unknown'
+        if rate * (now - last_time).total_seconds() / 3600 >= self.min_expected_matches:
+            return 'active'
+        return 'idle'
+
+    def report(self):
+        labels = {'active': '活躍', 'new': '無紀錄', 'unknown': '頻率未知', 'stale': '超過沿用時間', 'idle': '沿用舊紀錄'}
+        total = sum(self.reasons.values())
+        polled = total - self.reasons['idle']
+        details = '，'.join(f"{labels[reason]} {count}" for reason, count in self.reasons.items())
+        print(f"{self.game_type} 本次抓取 {polled} / {total} 位用戶 ({details})")
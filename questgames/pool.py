@@ -0,0 +1,187 @@
+# 多個無頭瀏覽器同時抓取 (game_type, username) 的工作池
+import queue
+import threading
+import time
+from tqdm import tqdm
+
+from questgames.metrics import timed
+from questgames.navigation import HashNavigator, report_navigation
+from questgames.record import fetch_user_record
+from questgames.session import WarmDriver
+
+
+class WorkerStats:
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.fetched = 0
+        self.failed = []  # [(game_type, username), ...]
+        self.startup_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.error = None  # 瀏覽器無法啟動等致命錯誤
+        self.session = None
+
+    def users_per_minute(self):
+        if self.busy_seconds <= 0:
+            return 0.0
+        return (self.fetched + len(self.failed)) * 60 / self.busy_seconds
+
+
+class ScrapePool:
+    def __init__(self, executable_path, num_workers=4, fetch=fetch_user_record, readiness=None,
+                 hash_navigation=False, governor=None, metrics=None, max_pages=2000, max_rss_mb=1500):
+        self.executable_path = executable_path
+        self.num_workers = max(1, num_workers)
+        self.fetch = fetch
+        self.readiness = readiness  # 各 worker 共用，等待時間會一起學習
+        self.hash_navigation = hash_navigation  # 每個瀏覽器以 hash 切換用戶，不重新載入頁面
+        self.governor = governor  # 各 worker 共用的 RequestGovernor，限制對網站的總請求速率
+        self.metrics = metrics  # 各 worker 共用的 Metrics，記錄各階段耗時與失敗次數
+        # 每個瀏覽器載入超過 max_pages 頁或行程合計記憶體超過 max_rss_mb 時重新啟動
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.navigators = []
+        self.sessions = []  # 執行中 worker 的 WarmDriver，close 時只結束這些瀏覽器的行程
+        self.stats = []
+        self._lock = threading.Lock()
+
+    def _worker(self, worker_id, tasks, results, pbar, on_record=None):
+        stats = WorkerStats(worker_id)
+        with self._lock:
+            self.stats.append(stats)
+        session = stats.session = WarmDriver(self.executable_path, profile_dir=None, max_pages=self.max_pages,
+                                             max_rss_mb=self.max_rss_mb)
+        with self._lock:
+            self.sessions.append(session)
+        start = time.perf_counter()
+        try:
+            with timed(self.metrics, 'startup'):
+                driver = session.acquire()
+        except Exception as e:
+            # 這個 worker 無法啟動，剩下的工作留給其他 worker
+            stats.error = str(e)
+            print(f"Worker {worker_id} 無法啟動瀏覽器: {e}")
+            self._release(session)
+            return
+        stats.startup_seconds = time.perf_counter() - start
+        navigator, starts, failed = None, 0, False
+
+        try:
+            while True:
+                try:
+                    game_type, url_prefix, username = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                # 超過頁數或記憶體上限、上一位用戶載入時發生例外、或失敗後瀏覽器沒有回應時重新啟動
+                try:
+                    driver = session.acquire(check_health=failed)
+                except Exception as e:
+                    # 無法重新啟動瀏覽器：這筆工作放回佇列留給其他 worker
+                    tasks.put((game_type, url_prefix, username))
+                    stats.error = str(e)
+                    print(f"Worker {worker_id} 無法重新啟動瀏覽器: {e}")
+                    break
+                if session.starts != starts:
+                    if starts and self.metrics is not None:
+                        self.metrics.observe('startup', session.last_startup_seconds)
+                    starts = session.starts
+                    if self.hash_navigation:
+                        # 新的瀏覽器需要重新完整載入頁面
+                        navigator = HashNavigator(driver, readiness=self.readiness)
+                        with self._lock:
+                            self.navigators.append(navigator)
+                begin = time.perf_counter()
+                error = None
+                try:
+                    record = self.fetch(driver, url_prefix, username, readiness=self.readiness, navigator=navigator,
+                                        governor=self.governor, metrics=self.metrics)
+                except Exception as e:
+                    # 載入頁面時的例外 (通常是瀏覽器當機)：記為失敗，下一位用戶前重新啟動瀏覽器
+                    record, error = None, e
+                    print(f"Worker {worker_id} 無法取得 {username} 的資料: {type(e).__name__}: {e}")
+                    session.mark_unhealthy(f"{type(e).__name__}: {e}")
+                elapsed = time.perf_counter() - begin
+                stats.busy_seconds += elapsed
+                if self.metrics is not None:
+                    self.metrics.observe('user', elapsed, game_type=game_type)
+                    if record is None:
+                        self.metrics.failure('user', error or 'NoRecord', game_type=game_type)
+                with self._lock:
+                    if record is None:
+                        stats.failed.append((game_type, username))
+                    else:
+                        stats.fetched += 1
+                        results[game_type].append(record)
+                session.page_loaded()
+                failed = record is None
+                if record is not None and on_record is not None:
+                    on_record(game_type, record)
+                pbar.update(1)
+        finally:
+            self._release(session)
+
+    def _release(self, session):
+        with self._lock:
+            if session in self.sessions:
+                self.sessions.remove(session)
+        session.quit()
+
+    def close(self):
+        # 中斷或異常結束時關閉仍在執行的瀏覽器；只結束本工作池啟動的行程
+        with self._lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            self._release(session)
+
+    def run(self, game_types, usernames, on_record=None):
+        # 將所有 (game_type, username) 平均分給各 worker，回傳 {game_type: [record, ...]}
+        return self.run_tasks(game_types, [(game_type, username) for game_type in game_types
+                                           for username in usernames], on_record)
+
+    def run_tasks(self, game_types, pairs, on_record=None):
+        # pairs: [(game_type, username), ...]；on_record(game_type, record) 在每筆成功時立即呼叫
+        tasks = queue.Queue()
+        for game_type, username in pairs:
+            tasks.put((game_type, game_types[game_type], username))
+        results = {game_type: [] for game_type in game_types}
+
+        with tqdm(total=tasks.qsize(), desc=f"{self.num_workers} 個瀏覽器處理用戶中") as pbar:
+            threads = [threading.Thread(target=self._worker, args=(i, tasks, results, pbar, on_record),
+                                        daemon=True)
+                       for i in range(self.num_workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # 所有 worker 都無法啟動時，佇列中剩下的工作視為失敗
+        leftover = []
+        while not tasks.empty():
+            game_type, _, username = tasks.get_nowait()
+            leftover.append((game_type, username))
+        if leftover:
+            print(f"有 {len(leftover)} 筆工作沒有可用的瀏覽器處理")
+            # 記在最後一個發生錯誤的 worker 的失敗清單，與其他失敗的用戶一起列出
+            stats = next((stats for stats in reversed(self.stats) if stats.error), self.stats[-1])
+            stats.failed.extend(leftover)
+            if self.metrics is not None:
+                for game_type, _ in leftover:
+                    self.metrics.failure('user', 'NoBrowser', game_type=game_type)
+        return results
+
+    def report(self):
+        print("各瀏覽器處理統計：")
+        for stats in sorted(self.stats, key=lambda s: s.worker_id):
+            if stats.error:
+                print(f"  Worker {stats.worker_id}: 瀏覽器無法啟動 ({stats.error})，成功 {stats.fetched} 筆，"
+                      f"失敗 {len(stats.failed)} 筆")
+            else:
+                print(f"  Worker {stats.worker_id}: 成功 {stats.fetched} 筆，失敗 {len(stats.failed)} 筆，"
+                      f"啟動 {stats.startup_seconds:.1f} 秒，{stats.users_per_minute():.1f} 用戶/分鐘")
+            if stats.session.starts > 1 or stats.session.peak_rss_mb:
+                stats.session.report('  瀏覽器')
+            for game_type, username in stats.failed:
+                print(f"    失敗: {game_type} {username}")
+        if self.navigators:
+            report_navigation(self.navigators)
+        if self.governor is not None:
+            self.governor.report()
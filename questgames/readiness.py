@@ -0,0 +1,94 @@
+# 以紀錄表內容是否已填好來判斷頁面載入完成，取代固定的 time.sleep
+import csv
+import threading
+import time
+from collections import deque
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 需要等到有內容的欄位
+RECORD_FIELDS = ("Rating", "Rank", "Win loss", "Streak")
+
+# 一次 execute_script 檢查所有欄位，避免每次輪詢都多次往返
+_READY_SCRIPT = """
+var record = document.querySelector('li.record');
+if (!record) { return false; }
+var seen = {};
+record.querySelectorAll('table tr').forEach(function (tr) {
+    var th = tr.querySelector('th'), td = tr.querySelector('td');
+    if (th && td && td.textContent.trim()) { seen[th.textContent.trim()] = true; }
+});
+return arguments[0].every(function (field) { return seen[field]; });
+"""
+
+
+class RecordReadiness:
+    def __init__(self, min_timeout=1.0, max_timeout=10.0, factor=2.0, window=50,
+                 poll_frequency=0.05, baseline_sleep=0.8, fields=RECORD_FIELDS):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor  # 逾時 = 近期 95 百分位延遲 × factor
+        self.poll_frequency = poll_frequency
+        self.baseline_sleep = baseline_sleep  # 原本固定等待的秒數，用來計算節省的時間
+        self.fields = list(fields)
+        self.latencies = deque(maxlen=window)  # 近期成功載入的等待秒數
+        self.waits = []  # [(username, 等待秒數, 是否就緒), ...]
+        self._lock = threading.Lock()
+
+    def timeout(self):
+        # 依近期延遲調整逾時，尚無樣本時使用最大值
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return self.max_timeout
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.factor))
+
+    def is_ready(self, driver):
+        return bool(driver.execute_script(_READY_SCRIPT, self.fields))
+
+    def wait(self, driver, username):
+        # 等到紀錄表欄位都有內容，回傳是否就緒
+        start = time.perf_counter()
+        try:
+            WebDriverWait(driver, self.timeout(), poll_frequency=self.poll_frequency).until(self.is_ready)
+            ready = True
+        except TimeoutException:
+            ready = False
+        waited = time.perf_counter() - start
+        self.record(username, waited, ready)
+        return ready
+
+    def record(self, username, waited, ready):
+        with self._lock:
+            if ready:
+                self.latencies.append(waited)
+            self.waits.append((username, waited, ready))
+
+    def summary(self):
+        with self._lock:
+            waits = list(self.waits)
+        total = sum(w for _, w, _ in waits)
+        baseline = self.baseline_sleep * len(waits)
+        return {
+            'pages': len(waits),
+            'timeouts': sum(1 for _, _, ready in waits if not ready),
+            'total_wait': total,
+            'mean_wait': total / len(waits) if waits else 0.0,
+            'saved_seconds': baseline - total,
+        }
+
+    def report(self):
+        s = self.summary()
+        print(f"等待頁面 {s['pages']} 次，平均 {s['mean_wait']:.2f} 秒，逾時 {s['timeouts']} 次，"
+              f"比固定等待 {self.baseline_sleep} 秒共節省 {s['saved_seconds']:.1f} 秒")
+
+    def save(self, path):
+        # 將每位用戶的等待時間寫成 CSV 以便比較
+        with self._lock:
+            waits = list(self.waits)
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Username', 'WaitSeconds', 'Ready'])
+            for username, waited, ready in waits:
+                writer.writerow([username, f"{waited:.3f}", ready])
@@ -0,0 +1,67 @@
+# 讀取單一用戶 li.record 紀錄表的共用流程
+import time
+
+from questgames.extract import extract_record_fields, fields_to_row, parse_record_html
+from questgames.governor import CircuitOpenError
+from questgames.metrics import timed
+
+# 棋類型和對應的網址
+GAME_TYPES = {
+    "5min": "http://questgames.net/reversi/#user/",
+    "1min": "http://questgames.net/reversi1/#user/"
+}
+
+
+def read_record(driver, username, extra_fields=(), source='script'):
+    # 一次往返取得整個紀錄表：source='script' 在頁面內執行腳本，'page_source' 解析整頁 HTML 快照
+    if source == 'page_source':
+        fields = parse_record_html(driver.page_source)
+    else:
+        fields = extract_record_fields(driver)
+    return fields_to_row(username, fields, extra_fields)
+
+
+def fetch_user_record(driver, url_prefix, username, max_attempts=2, wait=0.8, readiness=None, navigator=None,
+                      governor=None, metrics=None):
+    # 最多嘗試 max_attempts 次，失敗回傳 None；有 readiness 時以紀錄表是否填好取代固定等待
+    # 有 navigator 時以 hash 切換用戶，重試時一律完整載入
+    # 有 governor 時每次載入前先取得請求額度，斷路器開啟時不再重試；有 metrics 時記錄各階段耗時
+    attempts = 0
+    while attempts < max_attempts:
+        if governor is not None:
+            try:
+                governor.acquire()
+            except CircuitOpenError as e:
+                if metrics is not None:
+                    metrics.failure('load', e)
+                print(f"略過 {username}: {e}")
+                return None
+        start = time.perf_counter()
+        try:
+            with timed(metrics, 'load'):
+                if navigator is not None:
+                    navigator.open(url_prefix, username, force_full=attempts > 0)
+                else:
+                    driver.get(f"{url_prefix}{username}")
+                    if readiness is not None:
+                        readiness.wait(driver, username)
+            if navigator is None and readiness is None:
+                with timed(metrics, 'sleep'):
+                    time.sleep(wait)  # 等待內容加載
+        except Exception:
+            if governor is not None:
+                governor.record(False, time.perf_counter() - start)
+            raise
+        try:
+            with timed(metrics, 'extract'):
+                record = read_record(driver, username)
+        except Exception as e:
+            if governor is not None:
+                governor.record(False, time.perf_counter() - start)
+            print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
+            attempts += 1
+            continue
+        if governor is not None:
+            governor.record(True, time.perf_counter() - start)
+        return record
+    return None
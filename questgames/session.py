@@ -0,0 +1,186 @@
+# 長時間保持的瀏覽器，供排程每次執行沿用，避免每次都冷啟動 Chrome
+# 只追蹤自己啟動的 chromedriver 及其下的瀏覽器行程：監看記憶體用量，超過頁數或記憶體上限時重新啟動，
+# 關閉時也只結束這些行程，同一台機器上的其他瀏覽器與其他收集程式不受影響
+import os
+import time
+from collections import Counter
+import psutil
+
+from questgames.driver import build_chrome_options, create_driver
+
+
+class BrowserProcesses:
+    def __init__(self, root_pid):
+        # root_pid: chromedriver 的行程；瀏覽器與各分頁的行程都是它的子孫
+        self.root = psutil.Process(root_pid)
+        self.processes = {self.root.pid: self.root}
+        self.refresh()
+
+    def refresh(self):
+        # 加入新產生的子行程並移除已結束的行程；已記錄的行程即使 chromedriver 先結束 (子行程被移交) 也不會遺漏
+        # psutil.Process 會比對建立時間，行程編號被其他程式重複使用時不會誤判
+        for process in list(self.processes.values()):
+            try:
+                for child in process.children(recursive=True):
+                    self.processes.setdefault(child.pid, child)
+            except psutil.NoSuchProcess:
+                pass
+        self.processes = {pid: process for pid, process in self.processes.items() if process.is_running()}
+        return list(self.processes.values())
+
+    def rss_mb(self):
+        # 各行程 RSS 的總和 (共用記憶體會重複計算，作為上限判斷已足夠)
+        total = 0
+        for process in self.refresh():
+            try:
+                total += process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total / (1024 * 1024)
+
+    def terminate(self, timeout=5):
+        # 結束仍存活的行程，逾時未結束的強制終止；回傳結束的行程數
+        processes = self.refresh()
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        _, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        self.processes = {}
+        return len(processes)
+
+
+class WarmDriver:
+    def __init__(self, executable_path='./chromedriver.exe', profile_dir='./othello/chrome-profile',
+                 max_pages=2000, cache_size=200 * 1024 * 1024, max_rss_mb=1500, memory_check_pages=20):
+        self.executable_path = executable_path
+        # 保存 profile 與磁碟快取，重啟後仍可沿用；None 時使用暫時的 profile (同時啟動多個瀏覽器時)
+        self.profile_dir = os.path.abspath(profile_dir) if profile_dir else None
+        self.max_pages = max_pages  # 載入超過這個頁數就重新啟動瀏覽器
+        self.cache_size = cache_size
+        self.max_rss_mb = max_rss_mb  # 瀏覽器行程合計記憶體上限 (MB)，None 為不限制
+        self.memory_check_pages = memory_check_pages  # 每載入幾頁檢查一次記憶體
+        self.driver = None
+        self.service = None
+        self.processes = None
+        self.pages = 0
+        self.starts = 0
+        self.last_startup_seconds = 0.0
+        self.last_rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.recycles = Counter()  # {原因: 次數}
+        self.limit_reason = None  # 需要重新啟動的原因 ('pages'、'memory' 或 'unhealthy')，重新啟動後清除
+        self.unhealthy_reason = None
+        self._checked_pages = 0
+
+    def _start(self):
+        chrome_options = build_chrome_options()
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            chrome_options.add_argument(f"--user-data-dir={self.profile_dir}")
+            chrome_options.add_argument(f"--disk-cache-dir={os.path.join(self.profile_dir, 'cache')}")
+            chrome_options.add_argument(f"--disk-cache-size={self.cache_size}")
+        start = time.perf_counter()
+        self.driver, self.service = create_driver(self.executable_path, chrome_options)
+        self.last_startup_seconds = time.perf_counter() - start
+        try:
+            self.processes = BrowserProcesses(self.service.process.pid)
+        except (AttributeError, psutil.Error) as e:
+            print(f"無法追蹤瀏覽器行程，不檢查記憶體用量: {e}")
+            self.processes = None
+        self.pages = 0
+        self._checked_pages = 0
+        self.limit_reason = None
+        self.starts += 1
+
+    def healthy(self):
+        # 瀏覽器還活著且能執行腳本
+        if self.driver is None:
+            return False
+        try:
+            return self.driver.execute_script("return 1") == 1 and bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def rss_mb(self):
+        if self.processes is None:
+            return 0.0
+        self.last_rss_mb = self.processes.rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, self.last_rss_mb)
+        return self.last_rss_mb
+
+    def over_limits(self):
+        # 回傳需要重新啟動的原因，未超過上限時回傳 None；記憶體每 memory_check_pages 頁才檢查一次
+        if self.driver is None or self.limit_reason is not None:
+            return self.limit_reason
+        if self.pages >= self.max_pages:
+            self.limit_reason = 'pages'
+        elif self.max_rss_mb and self.pages - self._checked_pages >= self.memory_check_pages:
+            self._checked_pages = self.pages
+            if self.rss_mb() >= self.max_rss_mb:
+                self.limit_reason = 'memory'
+        return self.limit_reason
+
+    def mark_unhealthy(self, reason):
+        # 呼叫端遇到例外時標記，下次 acquire 一定重新啟動，不必再執行腳本確認
+        if self.driver is not None:
+            self.limit_reason, self.unhealthy_reason = 'unhealthy', reason
+
+    def acquire(self, check_health=True):
+        # 回傳可用的 driver：不存在、無回應或超過頁數/記憶體上限時重新啟動
+        # 每頁都呼叫時可設 check_health=False，省去每次執行腳本確認的往返
+        reason = self.over_limits()
+        if reason == 'pages':
+            self.recycle(f"已載入 {self.pages} 頁", reason)
+        elif reason == 'memory':
+            self.recycle(f"瀏覽器記憶體 {self.last_rss_mb:.0f} MB 超過上限 {self.max_rss_mb} MB", reason)
+        elif reason == 'unhealthy':
+            self.recycle(f"瀏覽器發生錯誤 ({self.unhealthy_reason})", reason)
+        elif self.driver is not None and check_health and not self.healthy():
+            self.recycle("瀏覽器沒有回應", 'unhealthy')
+        if self.driver is None:
+            self._start()
+        else:
+            self.last_startup_seconds = 0.0
+        return self.driver
+
+    def page_loaded(self, count=1):
+        self.pages += count
+
+    def recycle(self, reason, kind='manual'):
+        print(f"重新啟動瀏覽器：{reason}")
+        self.recycles[kind] += 1
+        self.quit()
+
+    def quit(self):
+        if self.processes is not None:
+            self.processes.refresh()  # 先記下目前所有行程，chromedriver 結束後仍能找到它啟動的瀏覽器
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Error quitting driver: {e}")
+        if self.service is not None:
+            try:
+                self.service.stop()
+            except Exception as e:
+                print(f"Error stopping service: {e}")
+        if self.processes is not None:
+            # quit 沒能結束的行程 (例如瀏覽器當機) 只在自己啟動的行程範圍內強制結束
+            leftover = self.processes.terminate()
+            if leftover:
+                print(f"結束 {leftover} 個殘留的瀏覽器行程")
+        self.driver = None
+        self.service = None
+        self.processes = None
+        self.limit_reason = None
+
+    def report(self, label='瀏覽器'):
+        recycles = '，'.join(f"{kind} {count}" for kind, count in self.recycles.items()) or '無'
+        print(f"  {label}: 啟動 {self.starts} 次，重新啟動 ({recycles})，記憶體峰值 {self.peak_rss_mb:.0f} MB")
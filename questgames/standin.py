@@ -0,0 +1,256 @@
+# 本機替身伺服器，模擬 questgames.net 的用戶資料與 #user/ 頁面，方便在不連線的情況下測試抓取流程
+#   /reversi/、/reversi1/          前端頁面，依 #user/{username} 取得資料後繪製 li.record 紀錄表
+#   /reversi/user/{username}      用戶資料 (JSON)
+#   /reversi/#ranking/{page}      排行榜頁面 (li.ranking 表格)，資料來自 /reversi/ranking/{page} (JSON)
+#   /roster.txt                   roster_size 名用戶的名單，格式與 user.txt 相同
+# 執行: python -m questgames.standin --port 8765 --render-delay 0.3 --roster-size 300
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# 替身伺服器上的路徑，對應 RECORD_ENDPOINTS 的格式
+GAME_PATHS = {"5min": "reversi", "1min": "reversi1"}
+
+
+def fake_record(game_type, username, games=0):
+    # 同一個用戶每次產生相同的資料；games 為之後又贏了幾場 (每場分數 +4)
+    rng = random.Random(f"{game_type}:{username}")
+    rating = rng.randint(900, 2200)
+    wins, losses, draws = rng.randint(0, 3000), rng.randint(0, 3000), rng.randint(0, 50)
+    max_rating = rating + rng.randint(0, 200)
+    rating, wins = rating + 4 * games, wins + games
+    total = wins + losses + draws
+    return {
+        'rating': rating,
+        'max': max(max_rating, rating),
+        'rank': rng.randint(1, 5000),
+        'win': wins,
+        'loss': losses,
+        'draw': draws,
+        'winRate': round(wins * 100 / total, 1) if total else 0.0,
+        'streak': f"{rng.choice('WL')}{rng.randint(1, 9)}",
+    }
+
+
+def standin_roster(size):
+    return [f"player{i:04d}" for i in range(1, size + 1)]
+
+
+def play(server, game_type, username, games=1):
+    # 模擬用戶又下了幾場棋，之後的資料與排行榜都會反映新的分數
+    with server.state['lock']:
+        key = (game_type, username)
+        server.state['games'][key] = server.state['games'].get(key, 0) + games
+        server.state['rankings'].pop(game_type, None)
+
+
+def _ranking(server_state, game_type):
+    # 名單中所有用戶依分數由高到低排序，回傳 {username: (名次, 資料)} (依名次排列)；play() 之後重新計算
+    with server_state['lock']:
+        ranking = server_state['rankings'].get(game_type)
+        if ranking is None:
+            games = server_state['games']
+            records = [(username, fake_record(game_type, username, games.get((game_type, username), 0)))
+                       for username in server_state['roster']]
+            records.sort(key=lambda item: (-item[1]['rating'], item[0]))
+            ranking = {username: (rank, record) for rank, (username, record) in enumerate(records, 1)}
+            server_state['rankings'][game_type] = ranking
+    return ranking
+
+
+# 與網站相同結構的前端頁面：hash 改變時移除舊紀錄表，取得資料並等待 render_delay 後重新繪製
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>questgames stand-in</title></head>
+<body><ul id="profile"></ul>
+<script>
+var renderDelay = __RENDER_DELAY__, pending = 0;
+function cell(name, value) { return '<tr><th>' + name + '</th><td>' + value + '</td></tr>'; }
+function showRanking(page, request) {
+  var profile = document.getElementById('profile');
+  fetch('ranking/' + page).then(function (response) { return response.json(); }).then(function (data) {
+    setTimeout(function () {
+      if (request !== pending) { return; }
+      var rows = data.users.map(function (user) {
+        return '<tr><td>' + user.rank + '</td><td><a href="#user/' + user.username + '">' + user.username +
+          '</a></td><td>' + user.rating + '</td></tr>';
+      });
+      profile.innerHTML = '<li class="ranking"><table><tr><th>Rank</th><th>User</th><th>Rating</th></tr>' +
+        rows.join('') + '</table></li>';
+    }, renderDelay * 1000);
+  });
+}
+function show() {
+  var hash = decodeURIComponent(window.location.hash);
+  var match = /^#user\\/(.+)$/.exec(hash), ranking = /^#ranking\\/(\\d+)$/.exec(hash);
+  var profile = document.getElementById('profile'), request = ++pending;
+  profile.innerHTML = '';
+  if (ranking) { showRanking(ranking[1], request); return; }
+  if (!match) { return; }
+  fetch('user/' + encodeURIComponent(match[1])).then(function (response) {
+    return response.ok ? response.json() : null;
+  }).then(function (data) {
+    setTimeout(function () {
+      if (request !== pending) { return; }
+      if (!data) { profile.innerHTML = '<li class="error">user not found</li>'; return; }
+      var total = data.win + data.loss + data.draw;
+      profile.innerHTML = '<li class="record"><table>' +
+        cell('Rating', data.rating + ' max: ' + data.max) +
+        cell('Rank', data.rank + ' / 5000') +
+        cell('Win loss', data.win + '-' + data.loss + '-' + data.draw + ' (' + data.winRate.toFixed(1) + ')') +
+        cell('Streak', data.streak) + cell('Games', total) + '</table></li>';
+    }, renderDelay * 1000);
+  });
+}
+window.addEventListener('hashchange', show);
+show();
+</script></body></html>
+"""
+
+
+def make_handler(server_state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # 支援 keep-alive
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json'):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _inject(self):
+            # 依設定模擬限流、故障與延遲；回傳 True 表示已回應錯誤
+            with server_state['lock']:
+                server_state['requests'] += 1
+                now = time.monotonic()
+                recent = server_state['recent']
+                while recent and now - recent[0] > 1.0:
+                    recent.popleft()
+                limited = server_state['rate_limit'] and len(recent) >= server_state['rate_limit']
+                if not limited:
+                    recent.append(now)
+                else:
+                    server_state['throttled'] += 1
+                failing = now < server_state['outage_until'] or server_state['rng'].random() < server_state['error_rate']
+            if limited:
+                self._send(429, json.dumps({'error': 'too many requests'}))
+                return True
+            if server_state['latency']:
+                time.sleep(server_state['latency'])
+            if failing:
+                self._send(500, json.dumps({'error': 'internal error'}))
+                return True
+            return False
+
+        def do_GET(self):
+            if self._inject():
+                return
+            path = self.path.split('?')[0].split('#')[0]
+            if path == '/roster.txt':
+                self._send(200, '\n'.join(server_state['roster'] or []) + '\n', 'text/plain')
+                return
+            parts = path.strip('/').split('/')
+            game_type = {path: gt for gt, path in GAME_PATHS.items()}.get(parts[0])
+            if game_type is not None and len(parts) == 1:
+                self._send(200, _PAGE.replace('__RENDER_DELAY__', repr(float(server_state['render_delay']))),
+                           'text/html')
+                return
+            if game_type is None or len(parts) != 3 or parts[1] not in ('user', 'ranking'):
+                self._send(404, json.dumps({'error': 'not found'}))
+                return
+            if parts[1] == 'ranking':
+                # 排行榜第 N 頁 (從 1 開始)，超過最後一頁回傳空清單
+                page, size = int(parts[2]) if parts[2].isdigit() else 0, server_state['page_size']
+                ranking = list(_ranking(server_state, game_type).items())[(page - 1) * size:page * size] \
+                    if page > 0 and server_state['roster'] else []
+                users = [{'rank': rank, 'username': username, 'rating': record['rating']}
+                         for username, (rank, record) in ranking]
+                self._send(200, json.dumps({'page': page, 'users': users}))
+                return
+            username = unquote(parts[2]).lower()
+            if server_state['roster'] is not None and username not in _ranking(server_state, game_type):
+                self._send(404, json.dumps({'error': 'user not found'}))
+                return
+            if username in server_state['broken']:
+                self._send(200, '<html>maintenance</html>', 'text/html')
+                return
+            if server_state['roster'] is not None:
+                # 名次與排行榜一致
+                rank, record = _ranking(server_state, game_type)[username]
+                record = dict(record, rank=rank)
+            else:
+                record = fake_record(game_type, username)
+            self._send(200, json.dumps(record))
+
+    return Handler
+
+
+def start_standin(port=0, broken=(), latency=0.0, error_rate=0.0, rate_limit=None, outage=0.0, seed=0,
+                  render_delay=0.0, roster_size=None, page_size=50):
+    # 在背景執行緒啟動，回傳 (server, base_url)；broken 中的用戶會回傳無法解碼的內容
+    # latency: 每次回應延遲秒數；error_rate: 回傳 500 的比例；rate_limit: 每秒超過此請求數回傳 429
+    # outage: 啟動後前幾秒所有請求都回傳 500；render_delay: 頁面取得資料後延遲多久才繪製紀錄表
+    # roster_size: 只有 standin_roster(roster_size) 中的用戶存在，其他用戶回傳 404 (None 為任何用戶都存在)
+    # page_size: 排行榜每頁的用戶數 (需要 roster_size)
+    state = {'lock': threading.Lock(), 'requests': 0, 'throttled': 0, 'broken': set(broken),
+             'latency': latency, 'error_rate': error_rate, 'rate_limit': rate_limit, 'recent': deque(),
+             'outage_until': time.monotonic() + outage, 'rng': random.Random(seed), 'render_delay': render_delay,
+             'roster': standin_roster(roster_size) if roster_size is not None else None, 'page_size': page_size,
+             'games': {}, 'rankings': {}}
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def standin_endpoints(base_url):
+    return {game_type: f"{base_url}/{path}/user/{{username}}" for game_type, path in GAME_PATHS.items()}
+
+
+def standin_game_types(base_url):
+    # 與 GAME_TYPES 相同格式的頁面網址，供 Selenium 抓取使用
+    return {game_type: f"{base_url}/{path}/#user/" for game_type, path in GAME_PATHS.items()}
+
+
+def standin_leaderboard(base_url):
+    # 與 LEADERBOARD_ENDPOINTS、LEADERBOARD_PAGES 相同格式的排行榜網址
+    endpoints = {game_type: f"{base_url}/{path}/ranking/{{page}}" for game_type, path in GAME_PATHS.items()}
+    pages = {game_type: f"{base_url}/{path}/#ranking/{{page}}" for game_type, path in GAME_PATHS.items()}
+    return endpoints, pages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='questgames.net 本機替身伺服器')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='每次回應延遲秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回傳 500 的比例')
+    parser.add_argument('--rate-limit', type=float, help='每秒超過此請求數回傳 429')
+    parser.add_argument('--render-delay', type=float, default=0.0, help='頁面取得資料後延遲繪製紀錄表的秒數')
+    parser.add_argument('--roster-size', type=int, help='只提供這麼多位用戶 (名單見 /roster.txt)')
+    parser.add_argument('--page-size', type=int, default=50, help='排行榜每頁的用戶數')
+    args = parser.parse_args()
+    server, base_url = start_standin(args.port, latency=args.latency, error_rate=args.error_rate,
+                                     rate_limit=args.rate_limit, render_delay=args.render_delay,
+                                     roster_size=args.roster_size, page_size=args.page_size)
+    print(f"替身伺服器已啟動: {base_url}")
+    for game_type, endpoint in standin_endpoints(base_url).items():
+        print(f"  {game_type}: {endpoint}")
+    for game_type, page in standin_game_types(base_url).items():
+        print(f"  {game_type} 頁面: {page}")
+    if args.roster_size:
+        print(f"  用戶名單: {base_url}/roster.txt")
+        for game_type, page in standin_leaderboard(base_url)[1].items():
+            print(f"  {game_type} 排行榜: {page.format(page=1)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
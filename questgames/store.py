@@ -0,0 +1,205 @@
+# 以單一 SQLite 資料庫保存所有快照，取代每次執行產生一個 xlsx
+# 匯入既有檔案: python -m questgames.store import ./othello/files/
+# 匯出 xlsx:   python -m questgames.store export ./othello/export/ --game-type 5min
+import argparse
+import os
+import re
+import sqlite3
+
+DEFAULT_STORE = './othello/snapshots.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_type TEXT NOT NULL,
+    snapshot_time TEXT NOT NULL,  -- YYYYMMDDHHMM，與檔名格式相同
+    username TEXT NOT NULL,
+    rating TEXT,
+    rank INTEGER,
+    win_loss TEXT,
+    streak TEXT,
+    fetched_time TEXT,  -- 沿用舊紀錄時為實際抓取的快照時間；本次有抓取則為 NULL
+    PRIMARY KEY (game_type, snapshot_time, username)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_username ON snapshots (username, game_type, snapshot_time);
+CREATE INDEX IF NOT EXISTS idx_snapshots_time ON snapshots (snapshot_time, game_type);
+"""
+
+# 資料庫欄位對應到原本 xlsx 的欄位名稱
+_COLUMNS = {
+    'username': 'Username',
+    'rating': 'Rating',
+    'rank': 'Rank',
+    'win_loss': 'Win/Loss',
+    'streak': 'Streak',
+}
+
+# 沿用舊紀錄 (本次未抓取) 的資料列以此欄標示實際抓取時間
+FETCHED_TIME = 'FetchedTime'
+
+# Reversi_{game_type}_data_{YYYYMMDDHHMM}.xlsx
+_FILE_PATTERN = re.compile(r'Reversi_(\w+?)_data_(\d{12})\.xlsx$')
+
+
+def _time_key(value):
+    # 接受 datetime 或 YYYYMMDDHHMM 字串
+    if value is None or value != value:  # None、NaN 或 NaT
+        return None
+    if isinstance(value, str):
+        return value
+    return value.strftime("%Y%m%d%H%M")
+
+
+class SnapshotStore:
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        # 舊版資料庫沒有 fetched_time 欄位
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(snapshots)")]
+        if 'fetched_time' not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE snapshots ADD COLUMN fetched_time TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def append(self, game_type, snapshot_time, records):
+        # 寫入一次快照；同一 (game_type, snapshot_time, username) 已存在時保留原資料
+        # 紀錄帶有 FetchedTime 時表示沿用該次抓取的舊紀錄
+        rows = [(game_type, _time_key(snapshot_time), r['Username'], r['Rating'], int(r['Rank']),
+                 r['Win/Loss'], r['Streak'], _time_key(r.get(FETCHED_TIME))) for r in records]
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def _select(self, username=None, game_type=None, start=None, end=None, fetched_only=False):
+        conditions, params = [], []
+        if username is not None:
+            names = [username] if isinstance(username, str) else list(username)
+            conditions.append(f"username IN ({','.join('?' * len(names))})")
+            params.extend(names)
+        if game_type is not None:
+            conditions.append("game_type = ?")
+            params.append(game_type)
+        if start is not None:
+            conditions.append("snapshot_time >= ?")
+            params.append(_time_key(start))
+        if end is not None:
+            conditions.append("snapshot_time <= ?")
+            params.append(_time_key(end))
+        if fetched_only:
+            conditions.append("fetched_time IS NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return (f"SELECT game_type, snapshot_time, {', '.join(_COLUMNS)} FROM snapshots {where} "
+                "ORDER BY snapshot_time, rank"), params
+
+    @staticmethod
+    def _to_frame(df):
+        import pandas as pd
+        df = df.rename(columns=_COLUMNS)
+        df['Date'] = pd.to_datetime(df.pop('snapshot_time'), format='%Y%m%d%H%M')
+        df['GameType'] = df.pop('game_type')
+        return df
+
+    def query(self, username=None, game_type=None, start=None, end=None, fetched_only=False):
+        # 依用戶、棋類型、日期範圍查詢，回傳與 xlsx 相同欄位並加上 Date 與 GameType
+        # fetched_only 為 True 時不含沿用舊紀錄的資料列
+        # pandas 載入較慢，只在需要 DataFrame 時才匯入，status 等簡單查詢不受影響
+        import pandas as pd
+        sql, params = self._select(username, game_type, start, end, fetched_only)
+        return self._to_frame(pd.read_sql_query(sql, self.conn, params=params))
+
+    def iter_query(self, username=None, game_type=None, start=None, end=None, fetched_only=False,
+                   chunk_rows=200_000):
+        # 與 query 相同，但每次只產生 chunk_rows 列，供逐批轉換型別的讀取方式使用
+        import pandas as pd
+        sql, params = self._select(username, game_type, start, end, fetched_only)
+        for df in pd.read_sql_query(sql, self.conn, params=params, chunksize=chunk_rows):
+            yield self._to_frame(df)
+
+    def snapshot_times(self, game_type=None):
+        sql = "SELECT DISTINCT snapshot_time FROM snapshots"
+        params = ()
+        if game_type is not None:
+            sql += " WHERE game_type = ?"
+            params = (game_type,)
+        return [row[0] for row in self.conn.execute(sql + " ORDER BY snapshot_time", params)]
+
+    def latest(self, username, game_type=None, limit=10):
+        # 不經 pandas 直接查詢用戶最近幾次的紀錄，回傳 [(game_type, snapshot_time, rating, rank, win_loss, fetched_time), ...]
+        sql = ("SELECT game_type, snapshot_time, rating, rank, win_loss, fetched_time FROM snapshots "
+               "WHERE username = ?")
+        params = [username]
+        if game_type is not None:
+            sql += " AND game_type = ?"
+            params.append(game_type)
+        sql += " ORDER BY snapshot_time DESC LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def summary(self):
+        # 各棋類型的快照數、資料列數、用戶數與最早/最新快照時間
+        return self.conn.execute(
+            "SELECT game_type, COUNT(DISTINCT snapshot_time), COUNT(*), COUNT(DISTINCT username), "
+            "MIN(snapshot_time), MAX(snapshot_time) FROM snapshots GROUP BY game_type ORDER BY game_type").fetchall()
+
+    def delete(self, keys):
+        # keys: [(game_type, snapshot_time, username), ...]，回傳刪除的筆數
+        rows = [(game_type, _time_key(snapshot_time), username) for game_type, snapshot_time, username in keys]
+        with self.conn:
+            cursor = self.conn.executemany(
+                "DELETE FROM snapshots WHERE game_type = ? AND snapshot_time = ? AND username = ?", rows)
+        return cursor.rowcount
+
+    def import_xlsx_dir(self, directory):
+        # 將既有的 Reversi_{game_type}_data_{time}.xlsx 匯入資料庫，回傳新增的筆數
+        import pandas as pd
+        added = 0
+        for name in sorted(os.listdir(directory)):
+            match = _FILE_PATTERN.search(name)
+            if not match:
+                continue
+            game_type, snapshot_time = match.groups()
+            try:
+                df = pd.read_excel(os.path.join(directory, name))
+                added += self.append(game_type, snapshot_time, df.to_dict('records'))
+            except Exception as e:
+                print(f"無法匯入文件 {name}：{str(e)}")
+        return added
+
+    def export_xlsx(self, directory, game_type=None, start=None, end=None):
+        # 依快照匯出成原本的 Reversi_{game_type}_data_{time}.xlsx 格式
+        os.makedirs(directory, exist_ok=True)
+        df = self.query(game_type=game_type, start=start, end=end)
+        paths = []
+        for (gt, date), snapshot in df.groupby(['GameType', 'Date']):
+            path = os.path.join(directory, f"Reversi_{gt}_data_{date.strftime('%Y%m%d%H%M')}.xlsx")
+            snapshot.drop(columns=['GameType', 'Date']).sort_values(by='Rank').to_excel(path, index=False)
+            paths.append(path)
+        return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='快照資料庫的匯入與匯出')
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    import_parser = sub.add_parser('import', help='匯入既有的 xlsx 快照')
+    import_parser.add_argument('directory', nargs='?', default='./othello/files/')
+    export_parser = sub.add_parser('export', help='匯出成 xlsx')
+    export_parser.add_argument('directory')
+    export_parser.add_argument('--game-type')
+    export_parser.add_argument('--start', help='YYYYMMDDHHMM')
+    export_parser.add_argument('--end', help='YYYYMMDDHHMM')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if args.command == 'import':
+        print(f"已匯入 {store.import_xlsx_dir(args.directory)} 筆資料至 {args.store}")
+    else:
+        paths = store.export_xlsx(args.directory, args.game_type, args.start, args.end)
+        print(f"已匯出 {len(paths)} 個 xlsx 至 {args.directory}")
+    store.close()
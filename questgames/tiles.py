@@ -0,0 +1,110 @@
+# 每位用戶的子圖各自存成圖塊並以資料指紋快取，只重畫資料有變動的用戶，再拼成宮格圖
+# 需要重畫的圖塊可分給多個行程同時繪製 (workers > 1 時，呼叫端需放在 if __name__ == '__main__' 之下)
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib.font_manager as fm
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from questgames.plotting import draw_color_panel, draw_plain_panel, draw_rating_panel
+
+# 各腳本的子圖樣式：(繪圖函式, 圖塊尺寸(英吋), 影響畫面的欄位, 樣式版本)
+# 修改繪圖函式時調高樣式版本，舊圖塊會自動作廢
+PANEL_STYLES = {
+    'plain': (draw_plain_panel, (5, 5), ['Date', 'CurrentRating'], 1),
+    'color': (draw_color_panel, (5, 5), ['Date', 'CurrentRating', 'MaxRating'], 1),
+    'rating': (draw_rating_panel, (4, 6), ['Date', 'CurrentRating', 'MaxRating', 'Wins', 'Losses', 'Draws'], 1),
+}
+
+
+def _render_tile(job):
+    # job: (樣式, 字體路徑, dpi, 圖塊路徑, username, user_data)；可在子行程中執行
+    style, font_path, dpi, path, username, user_data = job
+    draw, size = PANEL_STYLES[style][:2]
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    draw(ax, username, user_data, fm.FontProperties(fname=font_path))
+    fig.tight_layout()
+    temp_path = f"{path}.tmp.png"
+    fig.savefig(temp_path, dpi=dpi)
+    os.replace(temp_path, path)
+    return path
+
+
+class TileCache:
+    def __init__(self, style, font_path, directory='./othello/cache/tiles', dpi=100, workers=1):
+        self.style = style
+        self.draw, self.size, self.columns, self.version = PANEL_STYLES[style]
+        self.font_path = font_path
+        self.dpi = dpi
+        self.directory = os.path.join(directory, style)
+        os.makedirs(self.directory, exist_ok=True)
+        self.workers = workers  # 同時繪製圖塊的行程數，1 為在目前行程依序繪製
+        self.used = set()
+        self.rendered = 0
+        self.reused = 0
+
+    def fingerprint(self, username, user_data):
+        # 用戶資料與樣式設定的雜湊；相同即可沿用之前畫好的圖塊
+        digest = hashlib.sha256(repr((username, self.style, self.version, self.size, self.dpi,
+                                      os.path.basename(self.font_path))).encode('utf-8'))
+        values = pd.util.hash_pandas_object(user_data[self.columns], index=False).to_numpy()
+        digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def tile_path(self, username, user_data):
+        path = os.path.join(self.directory, f"{self.fingerprint(username, user_data)}.png")
+        self.used.add(path)
+        return path
+
+    def tile(self, username, user_data):
+        # 回傳圖塊路徑，快取中沒有才重新繪製
+        return self.tiles([(username, user_data)])[0]
+
+    def tiles(self, panels):
+        # 回傳各用戶的圖塊路徑；快取中沒有的圖塊一起繪製，數量夠多時分給多個行程
+        paths = [self.tile_path(username, user_data) for username, user_data in panels]
+        stale = {}
+        for path, (username, user_data) in zip(paths, panels):
+            if not os.path.exists(path) and path not in stale:
+                stale[path] = (self.style, self.font_path, self.dpi, path, username, user_data[self.columns])
+        self.reused += len(paths) - len(stale)
+        self.rendered += len(stale)
+        if self.workers > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(stale))) as executor:
+                list(executor.map(_render_tile, stale.values()))
+        else:
+            for job in stale.values():
+                _render_tile(job)
+        return paths
+
+    def compose(self, panels, path, cols=6, rows=None):
+        # panels: [(username, user_data), ...]，依序拼成 rows × cols 的宮格圖，不足的格子留白
+        tiles = [mpimg.imread(tile_path) for tile_path in self.tiles(panels)]
+        rows = rows or max(1, -(-len(tiles) // cols))
+        height, width = int(self.size[1] * self.dpi), int(self.size[0] * self.dpi)
+        grid = np.ones((rows * height, cols * width, 4), dtype=np.float32)
+        for i, tile in enumerate(tiles):
+            row, col = divmod(i, cols)
+            h, w = min(height, tile.shape[0]), min(width, tile.shape[1])
+            grid[row * height:row * height + h, col * width:col * width + w, :tile.shape[2]] = tile[:h, :w]
+        mpimg.imsave(path, grid)
+        return path
+
+    def prune(self):
+        # 刪除這次沒有用到的舊圖塊
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path not in self.used:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def report(self):
+        print(f"重新繪製 {self.rendered} 位用戶，沿用快取 {self.reused} 位用戶")
@@ -1,11 +1,13 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from tqdm import tqdm  # 引入 tqdm 來顯示進度條
 import pandas as pd
-import time
-from datetime import datetime  # 引入 datetime 來處理日期
+from questgames.checkpoint import Checkpoint
+from questgames.record import read_record
+from questgames.navigation import HashNavigator
+from questgames.readiness import RecordReadiness
+from questgames.store import SnapshotStore
 
 # 設定 Selenium 的 Chrome 驅動
 chrome_options = Options()
@@ -36,36 +38,43 @@ game_types = {
     "1min": "http://questgames.net/reversi1/#user/"
 }
 
-# 獲取當前的日期和時間，格式為 YYYYMMDDHHMM
-current_time = datetime.now().strftime("%Y%m%d%H%M")
+# 依紀錄表是否填好判斷頁面載入完成
+readiness = RecordReadiness()
+# 每種棋類型只完整載入一次頁面，之後以 hash 切換用戶
+navigator = HashNavigator(driver, readiness=readiness)
+
+# 每取得一筆紀錄就寫入檢查點；上次中斷時沿用同一個快照時間，只抓取剩下的用戶
+# 只沿用 6 小時內開始的檢查點，更舊的移到 archive 子目錄後開始新的快照
+resume = True
+checkpoint = Checkpoint.open('./checkpoints', resume=resume, max_age_hours=6)
+# 快照時間，格式為 YYYYMMDDHHMM
+current_time = checkpoint.snapshot_time
+
+# 所有快照寫入同一個資料庫
+store = SnapshotStore('./othello/snapshots.db')
 
 # 處理每種棋類型
 for game_type, url_prefix in game_types.items():
-    data = []  # 初始化資料存儲列表
-    # 在進度條下處理每個用戶
+    # 在進度條下處理每個用戶，略過檢查點中已完成的用戶
     for username in tqdm(usernames, desc=f"處理 {game_type} 用戶中"):
+        if checkpoint.is_done(game_type, username):
+            continue
         attempts = 0
         success = False
         while attempts < 2 and not success:
-            driver.get(f"{url_prefix}{username}")
-            time.sleep(0.8)  # 等待內容加載
+            navigator.open(url_prefix, username, force_full=attempts > 0)  # 重試時完整載入
             try:
-                user_element = driver.find_element(By.CSS_SELECTOR, 'li.record')
-                rank = user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rank"]]/td').text.strip()
-                data.append({
-                    'Username': username,
-                    'Rating': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rating"]]/td').text,
-                    'Rank': int(rank.split()[0]),  # 假設排名是文本的第一部分且為數字
-                    'Win/Loss': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Win loss"]]/td').text,
-                    'Streak': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Streak"]]/td').text
-                })
+                checkpoint.add(game_type, read_record(driver, username))  # 一次取得整個紀錄表並寫入檢查點
                 success = True
             except Exception as e:
                 print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
                 attempts += 1
 
-    # 將數據轉換成 DataFrame
-    df = pd.DataFrame(data)
+    # 將檢查點中的數據寫入快照資料庫，再轉換成 DataFrame
+    records = checkpoint.game_records(game_type)
+    store.append(game_type, current_time, records)
+    print(f"{game_type} 共 {len(records)} 筆數據已寫入 ./othello/snapshots.db")
+    df = pd.DataFrame(records)
     # 按 'Rank' 升序排列 DataFrame
     df = df.sort_values(by='Rank')
     # 將 DataFrame 儲存到 Excel 文件，文件名包含當前日期和時間
@@ -73,5 +82,14 @@ for game_type, url_prefix in game_types.items():
     df.to_excel(excel_filename, index=False)
     print(f"數據已儲存至 {excel_filename} 並按排名排序。")
 
+store.close()
+
+# 輸出完成，刪除檢查點
+checkpoint.finish()
+
 # 關閉瀏覽器
 driver.quit()
+
+# 顯示等待頁面的時間統計
+readiness.report()
+navigator.report()
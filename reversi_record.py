@@ -1,10 +1,12 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from tqdm import tqdm  # 引入 tqdm 來顯示進度條
 import pandas as pd
-import time
+from questgames.record import read_record
+from questgames.navigation import HashNavigator
+from questgames.readiness import RecordReadiness
+from questgames.store import SnapshotStore
 from datetime import datetime  # 引入 datetime 來處理日期
 
 # 設定 Selenium 的 Chrome 驅動
@@ -30,8 +32,17 @@ game_types = {
     "1min": "http://questgames.net/reversi1/#user/"
 }
 
-# 獲取今天的日期，格式為 YYYYMMDD
+# 依紀錄表是否填好判斷頁面載入完成
+readiness = RecordReadiness()
+# 每種棋類型只完整載入一次頁面，之後以 hash 切換用戶
+navigator = HashNavigator(driver, readiness=readiness)
+
+# 獲取今天的日期，格式為 YYYYMMDD；快照時間格式為 YYYYMMDDHHMM
 today = datetime.now().strftime("%Y%m%d")
+current_time = datetime.now().strftime("%Y%m%d%H%M")
+
+# 所有快照寫入同一個資料庫
+store = SnapshotStore('./othello/snapshots.db')
 
 # 處理每種棋類型
 for game_type, url_prefix in game_types.items():
@@ -41,23 +52,17 @@ for game_type, url_prefix in game_types.items():
         attempts = 0
         success = False
         while attempts < 2 and not success:
-            driver.get(f"{url_prefix}{username}")
-            time.sleep(0.8)  # 等待內容加載
+            navigator.open(url_prefix, username, force_full=attempts > 0)  # 重試時完整載入
             try:
-                user_element = driver.find_element(By.CSS_SELECTOR, 'li.record')
-                rank = user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rank"]]/td').text.strip()
-                data.append({
-                    'Username': username,
-                    'Rating': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Rating"]]/td').text,
-                    'Rank': int(rank.split()[0]),
-                    'Win/Loss': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Win loss"]]/td').text,
-                    'Streak': user_element.find_element(By.XPATH, './table/tbody/tr[th[text()="Streak"]]/td').text
-                })
+                data.append(read_record(driver, username))  # 一次取得整個紀錄表
                 success = True
             except Exception as e:
                 print(f"第 {attempts+1} 次無法取得 {username} 的資料: {str(e)}")
                 attempts += 1
 
+    # 寫入快照資料庫
+    store.append(game_type, current_time, data)
+    print(f"{game_type} 共 {len(data)} 筆數據已寫入 ./othello/snapshots.db")
     # 將數據轉換成 DataFrame
     df = pd.DataFrame(data)
     # 按 'Rank' 升序排列 DataFrame
@@ -67,5 +72,11 @@ for game_type, url_prefix in game_types.items():
     df.to_excel(excel_filename, index=False)
     print(f"數據已儲存至 {excel_filename} 並按排名排序。")
 
+store.close()
+
 # 關閉瀏覽器
 driver.quit()
+
+# 顯示等待頁面的時間統計
+readiness.report()
+navigator.report()
@@ -0,0 +1,55 @@
+from questgames.analytics import STAT_COLUMNS, PlayerAnalytics
+from questgames.store import SnapshotStore
+
+
+def _records(step, users=5):
+    return [{'Username': f"user{i}", 'Rating': f"{1500 + 10 * i + step * (i % 3 - 1)} max: 1700", 'Rank': i + 1,
+             'Win/Loss': f"{100 + step * i}-{50 + step}-2 (60.0%)", 'Streak': f"W{step % 4}"} for i in range(users)]
+
+
+def _snapshot_time(step):
+    return f"202401{1 + step // 4:02d}{step % 4 * 6:02d}00"
+
+
+def _stats(analytics):
+    return sorted(analytics.conn.execute(f"SELECT {', '.join(STAT_COLUMNS)} FROM player_stats").fetchall())
+
+
+def _rebuilt(path, tmp_path):
+    # 以另一個資料庫從頭計算同樣的快照
+    source = SnapshotStore(path)
+    copy = SnapshotStore(str(tmp_path / 'copy.db'))
+    for (snapshot_time,) in source.conn.execute("SELECT DISTINCT snapshot_time FROM snapshots"):
+        rows = source.conn.execute("SELECT username, rating, rank, win_loss, streak FROM snapshots "
+                                   "WHERE snapshot_time = ?", (snapshot_time,)).fetchall()
+        copy.append('5min', snapshot_time, [{'Username': u, 'Rating': r, 'Rank': k, 'Win/Loss': w, 'Streak': s}
+                                            for u, r, k, w, s in rows])
+    source.close()
+    analytics = PlayerAnalytics(copy)
+    analytics.rebuild()
+    return _stats(analytics)
+
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    store = SnapshotStore(path)
+    analytics = PlayerAnalytics(store)
+    for step in range(12):
+        store.append('5min', _snapshot_time(step), _records(step))
+        assert analytics.update('5min') == {'5min': 1}
+    assert _stats(analytics) == _rebuilt(path, tmp_path)
+
+
+def test_update_rebuilds_after_delete(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    store = SnapshotStore(path)
+    analytics = PlayerAnalytics(store)
+    for step in range(8):
+        store.append('5min', _snapshot_time(step), _records(step))
+    analytics.update()
+    before = _stats(analytics)
+    # 刪除最後一次快照中的一位用戶：快照數不變，資料列數改變
+    assert store.delete([('5min', _snapshot_time(7), 'user4')]) == 1
+    analytics.update()
+    assert _stats(analytics) != before
+    assert _stats(analytics) == _rebuilt(path, tmp_path)
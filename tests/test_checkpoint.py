@@ -0,0 +1,26 @@
+import os
+from datetime import datetime
+
+from questgames.checkpoint import Checkpoint
+
+
+def leftover(directory, snapshot_time):
+    with open(os.path.join(directory, f'checkpoint_{snapshot_time}.jsonl'), 'w', encoding='utf-8') as file:
+        file.write('{"game_type": "5min", "record": {"Username": "alice"}}\n')
+
+
+def test_resumes_recent_checkpoint(tmp_path):
+    leftover(tmp_path, '202401011200')
+    checkpoint = Checkpoint.open(str(tmp_path), now=datetime(2024, 1, 1, 15, 0))
+    assert checkpoint.snapshot_time == '202401011200'
+    assert checkpoint.is_done('5min', 'alice')
+    checkpoint.close()
+
+
+def test_archives_stale_checkpoint(tmp_path):
+    leftover(tmp_path, '202401011200')
+    checkpoint = Checkpoint.open(str(tmp_path), now=datetime(2024, 1, 4, 9, 30))
+    assert checkpoint.snapshot_time == '202401040930'
+    assert not checkpoint.records
+    assert os.path.exists(tmp_path / 'archive' / 'checkpoint_202401011200.jsonl')
+    checkpoint.close()
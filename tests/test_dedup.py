@@ -0,0 +1,26 @@
+import pandas as pd
+
+from questgames.dedup import SNAPSHOT_SCOPE, find_duplicates, legacy_drop, make_history
+
+
+def test_matches_legacy_loop_per_snapshot():
+    history = make_history(0.05, 30, seed=1)
+    # 加入出現 3 次的重複紀錄 (應保留) 與低於 1000 分的重複紀錄 (不列入)
+    history.loc[[10, 11, 12], ['CurrentRating', 'MaxRating', 'Win/Loss']] = [1500, 1600, '1-1-0 (50.0)']
+    history.loc[[40, 41], ['CurrentRating', 'MaxRating', 'Win/Loss']] = [900, 1000, '2-1-0 (66.7)']
+    _, to_drop = find_duplicates(history, min_occurrences=3)
+    assert len(to_drop) > 0
+
+    expected = []
+    for _, snapshot in history.groupby(SNAPSHOT_SCOPE, sort=False):
+        kept = legacy_drop(snapshot.drop(columns=SNAPSHOT_SCOPE), min_occurrences=3)
+        expected.extend(kept.index[kept['CurrentRating'] >= 1000])
+    kept = history[(history['CurrentRating'] >= 1000) & ~history.index.isin(to_drop.index)]
+    assert sorted(kept.index) == sorted(expected)
+
+
+def test_same_user_repeating_record_is_not_duplicate():
+    df = pd.DataFrame({'GameType': '5min', 'Date': pd.date_range('2024-01-01', periods=4, freq='6h'),
+                       'Username': 'user0', 'CurrentRating': 1500, 'MaxRating': 1600, 'Win/Loss': '1-1-0 (50.0)'})
+    duplicated, to_drop = find_duplicates(df)
+    assert duplicated.empty and to_drop.empty
@@ -0,0 +1,55 @@
+import pytest
+
+from questgames import governor as governor_module
+from questgames.governor import CircuitOpenError, RequestGovernor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(governor_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    governor = RequestGovernor(rate=100, burst=100, failure_threshold=3, cooldown=10)
+    for _ in range(3):
+        governor.acquire()
+        governor.record(False, 0.1, 500)
+    assert governor.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        governor.acquire()
+
+    # 冷卻結束後只放行一個試探請求
+    clock[0] += 11
+    governor.acquire()
+    assert governor.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        governor.acquire()
+    # 試探失敗時再次開啟，冷卻時間加倍
+    governor.record(False)
+    assert governor.state == 'open' and governor.current_cooldown == 20
+
+    clock[0] += 21
+    governor.acquire()
+    governor.record(True, 0.1, 200)
+    assert governor.state == 'closed' and governor.current_cooldown == 10
+    governor.acquire()
+
+
+def test_client_errors_do_not_trip_breaker(clock):
+    governor = RequestGovernor(rate=100, burst=100, failure_threshold=3, cooldown=10)
+    for _ in range(10):
+        governor.acquire()
+        governor.record(False, 0.1, 404)
+    assert governor.state == 'closed'
+    assert governor.stats['client_errors'] == 10 and governor.stats['errors'] == 0
+
+
+def test_throttling_and_timeouts_count_as_failures(clock):
+    governor = RequestGovernor(rate=100, burst=100, failure_threshold=3, cooldown=10)
+    governor.record(False, 0.1, 429)
+    governor.record(False)
+    assert governor.state == 'closed'
+    governor.record(False, 0.1, 503)
+    assert governor.state == 'open'
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from questgames.http_backend import decode_json_record, decode_record
+
+
+def test_decode_json_record():
+    record = decode_json_record({'rating': '1500 ', 'maxRating': 1600, 'rank': ' 12 ', 'wins': 3, 'losses': 1,
+                                 'streak': 'W2'}, 'alice')
+    assert record == {'Username': 'alice', 'Rating': '1500 max: 1600', 'Rank': 12, 'Win/Loss': '3-1-0 (75.0)',
+                      'Streak': 'W2'}
+
+
+@pytest.mark.parametrize('field', ['rank', 'rating', 'streak'])
+def test_whitespace_only_field_is_missing(field):
+    payload = {'rating': '1500 max: 1600', 'rank': '12', 'winLoss': '3-1-0 (75.0)', 'streak': 'W2'}
+    payload[field] = '   '
+    with pytest.raises(ValueError):
+        decode_record(json.dumps(payload), 'alice')
+
+
+def test_wrong_field_type_is_decode_failure():
+    payload = {'rating': '1500 max: 1600', 'rank': '12', 'wins': [3], 'losses': 1, 'streak': 'W2'}
+    with pytest.raises(ValueError):
+        decode_record(json.dumps(payload), 'alice')
+
+
+def test_bad_record_does_not_abort_batch(monkeypatch):
+    from questgames import http_backend
+    from questgames.standin import standin_endpoints, start_standin
+
+    decode = http_backend.decode_json_record
+
+    def flaky_decode(payload, username):
+        if username == 'bob':
+            raise KeyError('rating')
+        return decode(payload, username)
+
+    monkeypatch.setattr(http_backend, 'decode_json_record', flaky_decode)
+    server, base_url = start_standin()
+    try:
+        backend = http_backend.HttpRecordBackend(standin_endpoints(base_url))
+        results = backend.fetch({'5min': None}, ['alice', 'bob', 'carol'])
+    finally:
+        server.shutdown()
+    assert [record['Username'] for record in results['5min']] == ['alice', 'carol']
+    assert [(game_type, username) for game_type, username, _ in backend.failed] == [('5min', 'bob')]
@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+
+from questgames.loading import CompactHistory
+from questgames.parse_cache import ParseCache
+from questgames.parsing import parse_snapshot_columns
+
+
+def snapshot(usernames, date, fetched_time=None):
+    df = pd.DataFrame({
+        'Username': usernames,
+        'Rating': [f"{1500 + i} max: {1600 + i}" for i in range(len(usernames))],
+        'Rank': range(1, len(usernames) + 1),
+        'Win/Loss': [f"{10 + i}-5-1 (62.5)" for i in range(len(usernames))],
+        'Streak': 'W1',
+    })
+    if fetched_time is not None:
+        # 只有含沿用紀錄的文件才有 FetchedTime 欄位
+        df['FetchedTime'] = [fetched_time] + [None] * (len(usernames) - 1)
+    df['Date'] = pd.Timestamp(date)
+    return parse_snapshot_columns(df)
+
+
+def test_compact_history_takes_union_of_columns():
+    history = CompactHistory(keep_text=('Win/Loss',))
+    history.add(snapshot(['alice', 'bob'], '2024-01-01'))
+    history.add(snapshot(['bob', 'carol'], '2024-01-02', fetched_time='202312311200'))
+    history.add(snapshot(['alice'], '2024-01-03'))
+    df = history.frame()
+
+    assert len(df) == 5
+    assert df['FetchedTime'][:2].isna().all()
+    assert df['FetchedTime'][2] == '202312311200'
+    assert df['FetchedTime'][3:].isna().all()
+    assert df['Username'].tolist() == ['alice', 'bob', 'bob', 'carol', 'alice']
+    assert df['Win/Loss'].tolist()[2] == '10-5-1 (62.5)'
+    assert str(df['CurrentRating'].dtype) == 'int16'
+    assert df['Wins'].tolist() == [10, 11, 10, 11, 10]
+
+
+def test_compact_history_fills_missing_integer_columns():
+    first = snapshot(['alice'], '2024-01-01')
+    second = snapshot(['bob'], '2024-01-02').drop(columns=['MaxRating'])
+    history = CompactHistory()
+    history.add(first)
+    history.add(second)
+    df = history.frame()
+    assert df['MaxRating'].tolist()[0] == 1600
+    assert df['MaxRating'].isna().tolist() == [False, True]
+
+
+def test_parse_cache_mixed_schema_files(tmp_path):
+    frames = {'a.xlsx': snapshot(['alice', 'bob'], '2024-01-01'),
+              'b.xlsx': snapshot(['alice', 'bob'], '2024-01-02', fetched_time='202401011800'),
+              'c.xlsx': snapshot(['alice', 'bob'], '2024-01-03')}
+    paths = []
+    for name in frames:
+        path = tmp_path / name
+        path.write_text(name)
+        paths.append(str(path))
+
+    def parse_file(path):
+        return '5min', frames[os.path.basename(path)].copy()
+
+    cache = ParseCache(str(tmp_path / 'cache.pkl'), compact=True)
+    df = cache.update(paths, parse_file)['5min']
+    assert len(df) == 6
+    assert df['FetchedTime'].notna().sum() == 1
+    # 再次讀取時沿用快取
+    assert len(ParseCache(str(tmp_path / 'cache.pkl'), compact=True).update(paths, parse_file)['5min']) == 6
@@ -0,0 +1,17 @@
+from questgames.metrics import Metrics
+
+
+def test_one_type_line_per_metric_name():
+    metrics = Metrics()
+    for game_type in ('5min', '1min'):
+        metrics.count('users_fetched', 3, game_type=game_type)
+        metrics.count('users_carried', 1, game_type=game_type)
+        metrics.observe('load', 0.2, game_type=game_type)
+    lines = metrics.to_prometheus().splitlines()
+    types = [line for line in lines if line.startswith('# TYPE')]
+    assert len(types) == len(set(types))
+    fetched = [line for line in lines if line.startswith('questgames_users_fetched')]
+    assert fetched == ['questgames_users_fetched{game_type="1min"} 3', 'questgames_users_fetched{game_type="5min"} 3']
+    # 每個名稱的數值緊接在它的 TYPE 之後
+    start = lines.index('# TYPE questgames_users_fetched gauge')
+    assert lines[start + 1:start + 3] == fetched
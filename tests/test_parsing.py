@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from questgames import parsing
+from questgames.parsing import ParseReport, _legacy_parse, make_sample, parse_snapshot_columns
+
+COLUMNS = ['CurrentRating', 'MaxRating', 'Wins', 'Losses', 'Draws', 'Win Rate']
+
+
+@pytest.mark.parametrize('use_pyarrow', [True, False])
+def test_matches_legacy_parse(monkeypatch, use_pyarrow):
+    if not use_pyarrow:
+        monkeypatch.setattr(parsing, 'pc', None)
+    elif parsing.pc is None:
+        pytest.skip('pyarrow 未安裝')
+    df = make_sample(2000, seed=3)
+    # 無法解析的 Win/Loss 兩種寫法都應為缺值
+    df.loc[5, 'Win/Loss'] = 'n/a'
+    expected = _legacy_parse(df.copy())
+    report = ParseReport()
+    result = parse_snapshot_columns(df.copy(), report=report)
+    pd.testing.assert_frame_equal(result[COLUMNS].astype(float), expected[COLUMNS].astype(float))
+    assert report.to_frame()[['Username', 'Column']].values.tolist() == [['user5', 'Win/Loss']]
+
+
+def test_unparseable_rating_is_reported_and_dropped():
+    df = make_sample(10)
+    df.loc[3, 'Rating'] = 'unrated'
+    report = ParseReport()
+    result = parse_snapshot_columns(df, report=report)
+    assert 3 not in result.index and len(result) == 9
+    assert report.to_frame()['Value'].tolist() == ['unrated']
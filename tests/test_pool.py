@@ -0,0 +1,69 @@
+from functools import partial
+
+import questgames.record
+import questgames.session
+from questgames.pool import ScrapePool
+from questgames.record import fetch_user_record
+
+
+class CrashingDriver:
+    # 開啟 crash 用戶的頁面時拋出例外，模擬瀏覽器當機
+    def __init__(self):
+        self.opened = []
+
+    def get(self, url):
+        if url.endswith('crash'):
+            raise RuntimeError('tab crashed')
+        self.opened.append(url)
+
+    def execute_script(self, script):
+        return 1
+
+    window_handles = ['main']
+
+    def quit(self):
+        pass
+
+
+class FakeService:
+    process = None
+
+    def stop(self):
+        pass
+
+
+def test_worker_survives_driver_exception(monkeypatch):
+    drivers = []
+
+    def create_driver(executable_path, chrome_options=None):
+        drivers.append(CrashingDriver())
+        return drivers[-1], FakeService()
+
+    monkeypatch.setattr(questgames.session, 'create_driver', create_driver)
+    monkeypatch.setattr(questgames.record, 'read_record', lambda driver, username: {'Username': username})
+    pool = ScrapePool('chromedriver', num_workers=1, fetch=partial(fetch_user_record, wait=0))
+    usernames = ['alice', 'crash', 'bob', 'carol']
+    results = pool.run({'5min': 'http://example/#user/'}, usernames)
+
+    stats = pool.stats[0]
+    assert [record['Username'] for record in results['5min']] == ['alice', 'bob', 'carol']
+    assert stats.failed == [('5min', 'crash')]
+    assert stats.error is None
+    # 例外之後重新啟動瀏覽器，其餘用戶由新的瀏覽器處理
+    assert stats.session.starts == 2
+    assert stats.session.recycles['unhealthy'] == 1
+    assert drivers[1].opened == ['http://example/#user/bob', 'http://example/#user/carol']
+
+
+def test_tasks_left_when_browsers_fail_are_failed(monkeypatch):
+    def create_driver(executable_path, chrome_options=None):
+        raise RuntimeError('chromedriver missing')
+
+    monkeypatch.setattr(questgames.session, 'create_driver', create_driver)
+    pool = ScrapePool('chromedriver', num_workers=2, fetch=partial(fetch_user_record, wait=0))
+    results = pool.run({'5min': 'http://example/#user/'}, ['alice', 'bob', 'carol'])
+
+    assert results == {'5min': []}
+    failed = [pair for stats in pool.stats for pair in stats.failed]
+    assert sorted(failed) == [('5min', 'alice'), ('5min', 'bob'), ('5min', 'carol')]
+    pool.report()